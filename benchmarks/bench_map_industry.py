@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+"""Benchmark the compiled NAICS crosswalk matcher against the legacy row-wise matcher.
+
+Both matchers run over every NAICS code found in the raw MRTS/MSRS files plus a
+synthetic melted frame; the script exits non-zero if any mapping differs.
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import transform_fact_tables as tft  # noqa: E402
+
+RAW_MSRS_PATH = REPO_ROOT / "data" / "raw" / "msrs" / "state_retail_yy.csv"
+RAW_MTRS_PATH = REPO_ROOT / "data" / "raw" / "mtrs" / "mrtssales92-present.xlsx"
+
+EDGE_CODES = ["", " ", "TOTAL", "44-45", "4411,4412", "442,443", "722513, 722514, 722515", "4532", "45431", "9"]
+
+
+def _legacy_map_industry(df: pd.DataFrame, naics_col: str) -> pd.DataFrame:
+    """The original per-row matcher, kept verbatim as the reference implementation."""
+    crosswalk = pd.read_csv(tft.CROSSWALK_PATH, dtype=str)
+    cw = crosswalk[["naics_prefix", "industry_group"]].dropna()
+
+    def map_prefix(code: str) -> str | None:
+        if code is None:
+            return None
+        code = str(code).strip()
+        if not code:
+            return None
+        tokens = re.findall(r"\d{3,5}", code)
+        if not tokens:
+            return None
+        for prefix, group in cw.itertuples(index=False):
+            if prefix in ("", None):
+                continue
+            if "-" in prefix:
+                lo, hi = prefix.split("-")
+                if any(t.startswith(lo) or t.startswith(hi) for t in tokens):
+                    return group
+            else:
+                if any(t.startswith(prefix) for t in tokens):
+                    return group
+        return None
+
+    df["industry"] = df[naics_col].map(map_prefix)
+    return df
+
+
+def _raw_codes() -> list:
+    codes: list = list(EDGE_CODES)
+    if RAW_MSRS_PATH.exists():
+        codes += pd.read_csv(RAW_MSRS_PATH, usecols=["naics"])["naics"].unique().tolist()
+    if RAW_MTRS_PATH.exists():
+        codes += pd.read_excel(RAW_MTRS_PATH, sheet_name="2024", header=None)[0].dropna().unique().tolist()
+    return codes
+
+
+def _timed(fn, df: pd.DataFrame) -> tuple[pd.Series, float]:
+    start = time.perf_counter()
+    out = fn(df.copy(), "naics")["industry"]
+    return out, time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50_000, help="rows in the synthetic melted frame")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    codes = _raw_codes()
+    rng = np.random.default_rng(args.seed)
+    sample = pd.Series(codes, dtype=object).take(rng.integers(0, len(codes), size=args.rows))
+    df = pd.DataFrame({"naics": sample.to_numpy()})
+
+    legacy, legacy_s = _timed(_legacy_map_industry, df)
+    compiled, compiled_s = _timed(tft._map_industry, df)
+
+    mismatches = int((legacy.fillna("<none>") != compiled.astype(object).fillna("<none>")).sum())
+    print(f"distinct codes: {len(set(map(str, codes)))}, rows: {args.rows}")
+    print(f"legacy   matcher: {legacy_s:8.3f}s")
+    print(f"compiled matcher: {compiled_s:8.3f}s ({legacy_s / max(compiled_s, 1e-9):.0f}x)")
+    print(f"mismatches: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
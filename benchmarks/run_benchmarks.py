@@ -0,0 +1,281 @@
+#!/usr/bin/env python
+"""Time the pipeline stages on synthetic data and write the results as JSON.
+
+Each case runs in its own worker process against a synthetic raw tree (see
+``synthetic.py``) so module state and peak RSS are isolated per case:
+
+- ``load_mtrs``: parse every year sheet of the MRTS workbook (cache disabled)
+- ``load_msrs``: melt/map/aggregate the MSRS wide CSV
+- ``map_industry``: crosswalk matching over an MSRS-sized NAICS column
+- ``build_marts``: ``build_marts.main()`` over the synthetic fact tables
+- ``generate_reports``: ``generate_reports.main()`` with figures rendered cold,
+  reading the rank index built from the synthetic facts
+
+Results record wall time (min/median over ``--repeat`` runs), the Python heap
+peak from a separate tracemalloc run and the worker's peak RSS, together with
+the commit, library versions and scale, so runs from different releases can be
+compared offline with ``--compare``.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Sequence
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+RESULTS_DIR = REPO_ROOT / "benchmarks" / "results"
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+sys.path.insert(0, str(REPO_ROOT / "benchmarks"))
+
+CASES = ["load_mtrs", "load_msrs", "map_industry", "build_marts", "generate_reports"]
+NEEDS_FACTS = {"build_marts", "generate_reports"}
+
+
+def _configure(data_dir: Path, years: Sequence[int]) -> None:
+    """Point the stage modules at the synthetic tree instead of the repo's data/."""
+    import build_marts
+    import generate_reports
+    import transform_fact_tables as tft
+
+    processed, published = data_dir / "processed", data_dir / "published"
+    tft.RAW_MTRS_DIR = data_dir / "raw" / "mtrs"
+    tft.RAW_MSRS_DIR = data_dir / "raw" / "msrs"
+    tft.CROSSWALK_PATH = data_dir / "reference" / "industry_crosswalk.csv"
+    tft.STATE_REGION_PATH = data_dir / "reference" / "state_region_map.csv"
+    tft.MTRS_CACHE_DIR = data_dir / "cache" / "mtrs"
+    tft.PROCESSED_DIR, tft.PUBLISHED_DIR = processed, published
+    tft.MTRS_YEARS = list(years)
+    tft.DATE_START, tft.DATE_END = f"{min(years)}-01", f"{max(years)}-12"
+
+    build_marts.PROCESSED_DIR, build_marts.PUBLISHED_DIR = processed, published
+    build_marts.MARTS_DIR = data_dir / "marts"
+    build_marts.FACTS = {name: processed / f"{name}.parquet" for name in build_marts.FACTS}
+    build_marts.REFERENCE = {name: data_dir / "reference" / f"{name}.csv" for name in build_marts.REFERENCE}
+
+    generate_reports.PROCESSED_DIR = processed
+    generate_reports.MARTS_DIR = build_marts.MARTS_DIR  # the report reads the synthetic rank index
+    generate_reports.DOCS_DIR = data_dir / "docs"
+    generate_reports.FIG_DIR = data_dir / "docs" / "figures"
+    generate_reports.FANOUT_DIR = generate_reports.FIG_DIR / "fanout"
+    generate_reports.DATE_START, generate_reports.DATE_END = tft.DATE_START, tft.DATE_END
+
+
+def _case(name: str):
+    """Return (run, reset) callables for a case; setup work happens here, untimed."""
+    import build_marts
+    import generate_reports
+    import transform_fact_tables as tft
+
+    if name == "load_mtrs":
+        return (lambda: tft.load_mtrs(use_cache=False)), None
+    if name == "load_msrs":
+        return tft.load_msrs, None
+    if name == "map_industry":
+        import pandas as pd
+
+        raw = pd.read_csv(tft.RAW_MSRS_DIR / "state_retail_yy.csv", usecols=["naics"], dtype=str)
+        months = 12 * len(tft.MTRS_YEARS)
+        frame = pd.DataFrame({"naics": raw["naics"].repeat(months).to_numpy()})
+
+        def run():
+            tft._crosswalk_index.cache_clear()
+            return tft._map_industry(frame.copy(), "naics")
+
+        return run, None
+    if name == "build_marts":
+        return (lambda: build_marts.main([])), None
+    if name == "generate_reports":
+        return (lambda: generate_reports.main([])), lambda: shutil.rmtree(generate_reports.FIG_DIR, ignore_errors=True)
+    raise ValueError(f"unknown case: {name}")
+
+
+def _peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _worker(name: str, data_dir: Path, years: Sequence[int], repeat: int) -> dict:
+    _configure(data_dir, years)
+    with contextlib.redirect_stdout(io.StringIO()):
+        if name == "prepare":
+            import build_marts
+            import transform_fact_tables as tft
+
+            tft.main([])
+            # Marts too, so generate_reports ranks from the synthetic rank index, not the repo's.
+            build_marts.main([])
+            return {}
+
+        run, reset = _case(name)
+        rss_before = _peak_rss_mb()
+        seconds = []
+        for _ in range(repeat):
+            if reset:
+                reset()
+            start = time.perf_counter()
+            run()
+            seconds.append(time.perf_counter() - start)
+        rss_peak = _peak_rss_mb()
+
+        if reset:
+            reset()
+        tracemalloc.start()
+        run()
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "seconds_min": round(min(seconds), 4),
+        "seconds_median": round(statistics.median(seconds), 4),
+        "runs": [round(s, 4) for s in seconds],
+        "peak_python_mb": round(traced_peak / 1024**2, 1),
+        "peak_rss_mb": rss_peak,
+        "rss_before_mb": rss_before,
+    }
+
+
+def _spawn(name: str, data_dir: Path, years: Sequence[int], repeat: int) -> dict:
+    cmd = [
+        sys.executable,
+        __file__,
+        "--worker",
+        name,
+        "--data-dir",
+        str(data_dir),
+        "--repeat",
+        str(repeat),
+        "--years-list",
+        ",".join(map(str, years)),
+    ]
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True, cwd=REPO_ROOT).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=REPO_ROOT)
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+def _environment() -> dict:
+    import duckdb
+    import matplotlib
+    import numpy
+    import pandas
+    import pyarrow
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "pandas": pandas.__version__,
+        "numpy": numpy.__version__,
+        "pyarrow": pyarrow.__version__,
+        "duckdb": duckdb.__version__,
+        "matplotlib": matplotlib.__version__,
+    }
+
+
+def compare(current: dict, baseline: dict) -> dict[str, float]:
+    """Median-time ratio (current / baseline) for every case present in both runs."""
+    ratios = {}
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base and base["seconds_median"] > 0:
+            ratios[name] = round(result["seconds_median"] / base["seconds_median"], 3)
+    return ratios
+
+
+def run(cases: Sequence[str], years: int, states: int, naics: int, repeat: int, data_dir: Path | None = None) -> dict:
+    import synthetic
+
+    tmp = None
+    if data_dir is None:
+        tmp = tempfile.TemporaryDirectory(prefix="retail-bench-")
+        data_dir = Path(tmp.name)
+    try:
+        layout = synthetic.generate(data_dir, years=years, states=states, naics=naics)
+        if NEEDS_FACTS & set(cases):
+            _spawn("prepare", data_dir, layout["years"], 1)
+
+        results = {}
+        for name in cases:
+            results[name] = _spawn(name, data_dir, layout["years"], repeat)
+            print(
+                f"{name:<18} median {results[name]['seconds_median']:8.3f}s  "
+                f"python peak {results[name]['peak_python_mb']:7.1f} MB  rss {results[name]['peak_rss_mb']} MB"
+            )
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "environment": _environment(),
+        "scale": {"years": years, "states": states, "naics": naics, "repeat": repeat},
+        "results": results,
+    }
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages on synthetic data.")
+    parser.add_argument("--case", action="append", choices=CASES, help="run only this case (repeatable)")
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--states", type=int, default=51)
+    parser.add_argument("--naics", type=int, default=12, help="distinct NAICS codes per state")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--data-dir", type=Path, help="write the synthetic tree here instead of a temp dir")
+    parser.add_argument("--output", type=Path, help="JSON results path (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", type=Path, help="baseline results JSON to compare median times against")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        help="with --compare, exit 1 if any case's median time exceeds the baseline by this ratio (e.g. 1.25)",
+    )
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--years-list", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        years = [int(y) for y in args.years_list.split(",")]
+        print(json.dumps(_worker(args.worker, args.data_dir, years, args.repeat)))
+        return 0
+
+    report = run(args.case or CASES, args.years, args.states, args.naics, args.repeat, args.data_dir)
+
+    output = args.output or RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}-{report['commit'] or 'nogit'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"wrote {output}")
+
+    if args.compare:
+        ratios = compare(report, json.loads(args.compare.read_text(encoding="utf-8")))
+        for name, ratio in ratios.items():
+            print(f"{name:<18} {ratio:6.2f}x baseline")
+        if args.max_regression and any(r > args.max_regression for r in ratios.values()):
+            print(f"regression above {args.max_regression}x", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+"""Generate synthetic MRTS/MSRS raw files at a configurable scale.
+
+The layout mirrors the Census downloads closely enough for the real loaders:
+
+- ``mtrs/mrtssales-synthetic.xlsx``: one sheet per year with the title rows,
+  a "NAICS Code / Kind of Business" row, a ``Jan. YYYY`` month header row, a
+  "NOT ADJUSTED" row and one row per NAICS code.
+- ``msrs/state_retail_yy.csv``: ``fips,stateabbr,naics,yyYYYYMM...`` wide CSV.
+- ``reference/``: the repo's industry crosswalk plus a state/region map that
+  covers the synthetic states (real states first, then ``X001``...).
+"""
+from __future__ import annotations
+
+import argparse
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+REFERENCE_DIR = REPO_ROOT / "data" / "reference"
+
+MONTH_LABELS = ["Jan.", "Feb.", "Mar.", "Apr.", "May", "Jun.", "Jul.", "Aug.", "Sep.", "Oct.", "Nov.", "Dec."]
+# Three-digit retail subsectors; longer codes are generated beneath them.
+NAICS_BASES = ["441", "442", "443", "444", "445", "446", "447", "448", "451", "452", "453", "454"]
+REGIONS = ["Northeast", "Midwest", "South", "West"]
+
+
+def naics_codes(n: int) -> list[str]:
+    """``n`` distinct NAICS codes: the subsectors first, then 4- and 5-digit children."""
+    codes = list(NAICS_BASES)
+    width = 1
+    while len(codes) < n:
+        codes += [f"{base}{i:0{width}d}" for i in range(1, 10**width) for base in NAICS_BASES]
+        width += 1
+    return codes[:n]
+
+
+def state_map(n: int) -> pd.DataFrame:
+    real = pd.read_csv(REFERENCE_DIR / "state_region_map.csv", dtype=str)
+    if n <= len(real):
+        return real.head(n).reset_index(drop=True)
+    extra = pd.DataFrame(
+        {
+            "state_abbr": [f"X{i:03d}" for i in range(1, n - len(real) + 1)],
+            "region": [REGIONS[i % len(REGIONS)] for i in range(n - len(real))],
+        }
+    )
+    extra["state_name"] = "Synthetic " + extra["state_abbr"]
+    extra["division"] = "Synthetic"
+    extra["fips"] = [f"{100 + i}" for i in range(len(extra))]
+    return pd.concat([real, extra[real.columns]], ignore_index=True)
+
+
+def write_mtrs(path: Path, years: list[int], codes: list[str], rng: np.random.Generator) -> None:
+    wb = Workbook(write_only=True)
+    for year in sorted(years, reverse=True):
+        ws = wb.create_sheet(str(year))
+        ws.append([f"Estimates of Monthly Retail and Food Services Sales by Kind of Business: {year}"])
+        ws.append(["[Estimates are shown in millions of dollars]"])
+        ws.append([])
+        ws.append(["NAICS  Code", "Kind of Business"])
+        ws.append([None, None] + [f"{m} {year}" for m in MONTH_LABELS] + ["TOTAL"])
+        ws.append([None, "NOT ADJUSTED"])
+        ws.append([None, "Retail and food services sales, total"] + [None] * 13)
+        sales = rng.uniform(500, 50_000, size=(len(codes), 12)).round(0)
+        for code, row in zip(codes, sales):
+            ws.append([code, f"Synthetic business {code}"] + row.tolist() + [float(row.sum())])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    wb.save(path)
+
+
+def write_msrs(path: Path, years: list[int], states: pd.DataFrame, codes: list[str], rng: np.random.Generator) -> None:
+    months = [f"yy{y}{m:02d}" for y in sorted(years) for m in range(1, 13)]
+    ids = pd.DataFrame(
+        {
+            "fips": np.repeat(states["fips"].to_numpy(), len(codes)),
+            "stateabbr": np.repeat(states["state_abbr"].to_numpy(), len(codes)),
+            "naics": np.tile(codes, len(states)),
+        }
+    )
+    values = pd.DataFrame(rng.normal(2, 6, size=(len(ids), len(months))).round(1), columns=months)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pd.concat([ids, values], axis=1).to_csv(path, index=False)
+
+
+def generate(out_dir: Path, years: int = 3, states: int = 51, naics: int = 12, end_year: int = 2024, seed: int = 0) -> dict:
+    """Write a synthetic raw/reference tree under ``out_dir``; returns its layout."""
+    rng = np.random.default_rng(seed)
+    year_list = list(range(end_year - years + 1, end_year + 1))
+    codes = naics_codes(naics)
+    smap = state_map(states)
+
+    layout = {
+        "raw_mtrs_dir": out_dir / "raw" / "mtrs",
+        "raw_msrs_dir": out_dir / "raw" / "msrs",
+        "crosswalk": out_dir / "reference" / "industry_crosswalk.csv",
+        "state_region_map": out_dir / "reference" / "state_region_map.csv",
+        "years": year_list,
+    }
+    layout["crosswalk"].parent.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(REFERENCE_DIR / "industry_crosswalk.csv", layout["crosswalk"])
+    smap.to_csv(layout["state_region_map"], index=False)
+
+    write_mtrs(layout["raw_mtrs_dir"] / "mrtssales-synthetic.xlsx", year_list, codes, rng)
+    write_msrs(layout["raw_msrs_dir"] / "state_retail_yy.csv", year_list, smap, codes, rng)
+    return layout
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("out_dir", type=Path)
+    parser.add_argument("--years", type=int, default=3, help="number of years ending at --end-year")
+    parser.add_argument("--end-year", type=int, default=2024)
+    parser.add_argument("--states", type=int, default=51)
+    parser.add_argument("--naics", type=int, default=12, help="distinct NAICS codes per state")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    layout = generate(args.out_dir, args.years, args.states, args.naics, args.end_year, args.seed)
+    print(f"wrote {layout['raw_mtrs_dir']}")
+    print(f"wrote {layout['raw_msrs_dir']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
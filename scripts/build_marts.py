@@ -1,47 +1,399 @@
 #!/usr/bin/env python
-"""Materialize marts from SQL into parquet (primary) and CSV (published)."""
+"""Materialize marts from SQL into parquet (primary) and CSV (published).
+
+The fact tables are registered once as DuckDB views and every mart is written
+straight from DuckDB with ``COPY ... TO``, so results never pass through pandas.
+The published CSV copies are written in the background (see ``publish.py``).
+Marts that read another mart (see ``MART_DEPS``) are built after it, over a view
+of its Parquet output, so shared intermediates are computed once. Reference
+tables (``REFERENCE``, e.g. the state -> division map) are registered as views
+over their CSVs.
+
+With ``--catalog`` the marts are materialized as tables in the persistent DuckDB
+catalog (see ``catalog.py``), which rebuilds only the marts whose SQL or inputs
+changed, and only those are exported.
+
+``build_in_memory`` runs the same SQL over Arrow tables registered with DuckDB
+(no Parquet round trip) and returns the marts as Arrow; ``export_arrow`` writes
+them out later.
+"""
 from __future__ import annotations
 
+import argparse
+import hashlib
+import json
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Sequence
+
 import duckdb
+import pyarrow as pa
+
+from fact_store import resolve, scan_sql
+from instrument import current, instrumented, step
+from publish import csv_path, flush, publish_csv
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
 SQL_DIR = REPO_ROOT / "sql"
+PROCESSED_DIR = REPO_ROOT / "data" / "processed"
 MARTS_DIR = REPO_ROOT / "data" / "marts"
 PUBLISHED_DIR = REPO_ROOT / "data" / "published"
+REFERENCE_DIR = REPO_ROOT / "data" / "reference"
+CATALOG_PATH = REPO_ROOT / "data" / "catalog.duckdb"
+
+FACTS = {
+    "fact_national_retail_sales": PROCESSED_DIR / "fact_national_retail_sales.parquet",
+    "fact_state_retail_growth": PROCESSED_DIR / "fact_state_retail_growth.parquet",
+}
 
 MARTS = {
     "marts_market_trends": SQL_DIR / "marts_market_trends.sql",
+    "marts_growth_rank_index": SQL_DIR / "marts_growth_rank_index.sql",
     "marts_growth_contribution": SQL_DIR / "marts_growth_contribution.sql",
+    "marts_growth_rollup": SQL_DIR / "marts_growth_rollup.sql",
+}
+# Marts built from other marts rather than straight from the facts.
+MART_DEPS = {
+    "marts_growth_contribution": ("marts_growth_rank_index",),
+    "marts_growth_rollup": ("marts_growth_rank_index",),
+}
+# Reference CSVs the mart SQL joins (read as text, e.g. FIPS codes keep their zeros).
+REFERENCE = {
+    "state_region_map": REFERENCE_DIR / "state_region_map.csv",
 }
 
+# Incremental refresh: the fact (or upstream mart) each mart reads, how many calendar months its window
+# functions look back (12 for YoY), and whether it anchors on the first month
+# (FIRST_VALUE for sales_index).
+INCREMENTAL = {
+    "marts_market_trends": {"source": "fact_national_retail_sales", "lookback": 12, "anchor_first": True},
+    "marts_growth_rank_index": {"source": "fact_state_retail_growth", "lookback": 0, "anchor_first": False},
+    "marts_growth_contribution": {"source": "marts_growth_rank_index", "lookback": 0, "anchor_first": False},
+    "marts_growth_rollup": {"source": "marts_growth_rank_index", "lookback": 0, "anchor_first": False},
+}
+STATE_NAME = "_refresh_state.json"
 
-def _run_query(con: duckdb.DuckDBPyConnection, sql_path: Path):
-    sql = sql_path.read_text(encoding="utf-8")
-    return con.execute(sql).df()
+PARQUET_COMPRESSION = "snappy"
+PARQUET_CODECS = ("snappy", "zstd", "gzip", "lz4", "uncompressed")
+PARQUET_ROW_GROUP_SIZE = 122_880
 
 
-def _write(df, name: str) -> None:
-    MARTS_DIR.mkdir(parents=True, exist_ok=True)
-    PUBLISHED_DIR.mkdir(parents=True, exist_ok=True)
+def _sql_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _parquet_options(compression: str, row_group_size: int) -> str:
+    # The codec is spliced into SQL, so only known names get through.
+    if compression not in PARQUET_CODECS:
+        raise ValueError(f"unknown Parquet compression {compression!r}; expected one of {', '.join(PARQUET_CODECS)}")
+    return f"(FORMAT PARQUET, COMPRESSION {compression}, ROW_GROUP_SIZE {int(row_group_size)})"
+
+
+def _source_path(name: str) -> Path:
+    return FACTS[name] if name in FACTS else MARTS_DIR / f"{name}.parquet"
+
+
+def _fact_view_source(name: str) -> str:
+    # Upstream marts are read from their single-file export (also written by incremental refreshes).
+    return scan_sql(FACTS[name]) if name in FACTS else f"read_parquet({_sql_literal(_source_path(name).as_posix())})"
 
-    parquet_path = MARTS_DIR / f"{name}.parquet"
-    csv_path = PUBLISHED_DIR / f"{name}.csv"
 
-    df.to_parquet(parquet_path, index=False)
-    df.to_csv(csv_path, index=False)
+def _fact_view_sql(name: str, where: str | None = None, temp: bool = False) -> str:
+    source = _fact_view_source(name)
+    sql = f"CREATE OR REPLACE {'TEMP ' if temp else ''}VIEW {name} AS SELECT * FROM {source}"
+    return f"{sql} WHERE {where}" if where else sql
 
+
+def _reference_scan_sql(name: str) -> str:
+    path = REFERENCE[name]
+    if not path.exists():
+        raise FileNotFoundError(f"missing reference table: {path}")
+    return f"read_csv({_sql_literal(path.as_posix())}, all_varchar = true)"
+
+
+def _register_reference(con: duckdb.DuckDBPyConnection) -> None:
+    for name in REFERENCE:
+        con.execute(f"CREATE OR REPLACE VIEW {name} AS SELECT * FROM {_reference_scan_sql(name)}")
+
+
+def connect() -> duckdb.DuckDBPyConnection:
+    """In-memory connection with each fact and reference table registered once as a view."""
+    con = duckdb.connect()
+    for name, path in FACTS.items():
+        if not resolve(path).exists():
+            raise FileNotFoundError(f"missing fact table: {path}")
+        con.execute(_fact_view_sql(name))
+    _register_reference(con)
+    return con
+
+
+def _read_sql(sql_path: Path) -> str:
+    return sql_path.read_text(encoding="utf-8").strip().rstrip(";")
+
+
+def mart_inputs(name: str) -> list[str]:
+    """The facts, reference tables and marts a mart's SQL reads (comments ignored)."""
+    sql = re.sub(r"--[^\n]*", "", _read_sql(MARTS[name]))
+    tables = [*FACTS, *REFERENCE, *MARTS]
+    return [t for t in tables if t != name and re.search(rf"\b{t}\b", sql)]
+
+
+def _export(
+    cur: duckdb.DuckDBPyConnection,
+    relation: str,
+    name: str,
+    compression: str = PARQUET_COMPRESSION,
+    row_group_size: int = PARQUET_ROW_GROUP_SIZE,
+) -> None:
+    MARTS_DIR.mkdir(parents=True, exist_ok=True)
+    parquet_path = MARTS_DIR / f"{name}.parquet"
+
+    cur.execute(
+        f"COPY {relation} TO {_sql_literal(parquet_path.as_posix())} {_parquet_options(compression, row_group_size)}"
+    )
+    current().rows_out = cur.execute(f"SELECT count(*) FROM {relation}").fetchone()[0]
+    current().wrote(parquet_path)
     print(f"wrote {parquet_path}")
-    print(f"wrote {csv_path}")
+
+    # The CSV is published from the Parquet file in the background.
+    publish_csv(parquet_path, csv_path(PUBLISHED_DIR, name), "build_marts")
+
+
+def _build(
+    con: duckdb.DuckDBPyConnection,
+    name: str,
+    sql_path: Path,
+    compression: str = PARQUET_COMPRESSION,
+    row_group_size: int = PARQUET_ROW_GROUP_SIZE,
+) -> None:
+    # Each worker gets its own cursor; the temp table is local to it and feeds both COPYs.
+    cur = con.cursor()
+    cur.execute(f"CREATE OR REPLACE TEMP TABLE {name} AS {_read_sql(sql_path)}")
+    _export(cur, name, name, compression, row_group_size)
+    cur.close()
 
 
-def main() -> int:
+def _waves(names: Sequence[str]):
+    """Groups of marts that can be built concurrently, each after the marts it reads."""
+    remaining = list(names)
+    while remaining:
+        wave = [name for name in remaining if not set(MART_DEPS.get(name, ())) & set(remaining)]
+        if not wave:
+            raise ValueError(f"dependency cycle among marts: {remaining}")
+        yield wave
+        remaining = [name for name in remaining if name not in wave]
+
+
+def _build_arrow(con: duckdb.DuckDBPyConnection, name: str, tables: dict[str, pa.Table]) -> pa.Table:
+    source = INCREMENTAL[name]["source"]
+    with step("build_marts", name) as s:
+        s.rows_in = tables[source].num_rows
+        # Registrations are per cursor; DuckDB scans the Arrow buffers in place.
+        cur = con.cursor()
+        for table_name, table in tables.items():
+            cur.register(table_name, table)
+        result = cur.execute(_read_sql(MARTS[name])).arrow()
+        if isinstance(result, pa.RecordBatchReader):  # duckdb >= 1.4 streams batches
+            result = result.read_all()
+        cur.close()
+        s.rows_out = result.num_rows
+    return result
+
+
+def build_in_memory(facts: dict[str, pa.Table], jobs: int = 1) -> dict[str, pa.Table]:
+    """Every mart as an Arrow table, computed from in-memory Arrow fact tables."""
+    tables = dict(facts)
     con = duckdb.connect()
-    for name, sql_path in MARTS.items():
+    _register_reference(con)
+    with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(MARTS)))) as pool:
+        for wave in _waves(list(MARTS)):
+            futures = {name: pool.submit(_build_arrow, con, name, dict(tables)) for name in wave}
+            for name, future in futures.items():
+                tables[name] = future.result()
+    con.close()
+    return {name: tables[name] for name in MARTS}
+
+
+def export_arrow(
+    name: str,
+    table: pa.Table,
+    compression: str = PARQUET_COMPRESSION,
+    row_group_size: int = PARQUET_ROW_GROUP_SIZE,
+) -> None:
+    """Write an in-memory mart to its Parquet and CSV outputs."""
+    with step("build_marts", f"write_{name}") as s:
+        s.rows_in = table.num_rows
+        con = duckdb.connect()
+        con.register(f"{name}_arrow", table)
+        _export(con, f"{name}_arrow", name, compression, row_group_size)
+        con.close()
+
+
+def _sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _date_fingerprints(con: duckdb.DuckDBPyConnection, fact: str) -> dict[str, str]:
+    """Row count and order-independent content hash per fact ``date``."""
+    rows = con.execute(f"SELECT date, count(*), sum(hash(f)) FROM {fact} f GROUP BY date").fetchall()
+    return {date: f"{n}:{h}" for date, n, h in rows}
+
+
+def _month_number(date: str) -> int:
+    year, month = date.split("-")
+    return int(year) * 12 + int(month) - 1
+
+
+def _plan_refresh(old: dict, current: dict[str, str], lookback: int, anchor_first: bool) -> tuple[list[str], bool]:
+    """Dates whose mart rows must be recomputed, and whether that is a full rebuild.
+
+    A changed month also invalidates the months up to ``lookback`` calendar months
+    after it (by month, not by position, so gaps in the source do not shift it). Removed
+    months, or a changed first month for anchored marts, force a full rebuild.
+    """
+    dates = sorted(current)
+    if not old or set(old) - set(current) or not dates:
+        return dates, True
+    if anchor_first and (min(old) != dates[0] or old[dates[0]] != current[dates[0]]):
+        return dates, True
+
+    changed = [_month_number(date) for date in dates if old.get(date) != current[date]]
+    affected = [date for date in dates if any(0 <= _month_number(date) - c <= lookback for c in changed)]
+    return affected, False
+
+
+def _refresh_incremental(
+    con: duckdb.DuckDBPyConnection,
+    name: str,
+    sql_path: Path,
+    compression: str = PARQUET_COMPRESSION,
+    row_group_size: int = PARQUET_ROW_GROUP_SIZE,
+) -> None:
+    """Recompute only new/revised months into ``data/marts/<name>/date=YYYY-MM/`` partitions.
+
+    The mart SQL runs over fact views narrowed to the affected months plus their
+    lookback (and the first month when anchored); the single-file Parquet/CSV
+    outputs are then re-exported from the partitions. An edited SQL file or
+    reference CSV that the mart joins forces a full rebuild.
+    """
+    spec = INCREMENTAL[name]
+    part_root = MARTS_DIR / name
+    state_path = part_root / STATE_NAME
+    state = json.loads(state_path.read_text(encoding="utf-8")) if state_path.exists() else {}
+
+    cur = con.cursor()
+    current = _date_fingerprints(cur, spec["source"])
+    sql_sha = _sha256(sql_path)
+    # Reference tables are joined whole, so any edit to one invalidates every month.
+    reference_sha = {ref: _sha256(REFERENCE[ref]) for ref in mart_inputs(name) if ref in REFERENCE}
+    unchanged = state.get("sql_sha256") == sql_sha and state.get("reference_sha256", {}) == reference_sha
+    old = state.get("dates", {}) if unchanged else {}
+    affected, full = _plan_refresh(old, current, spec["lookback"], spec["anchor_first"])
+
+    if full and part_root.exists():
+        shutil.rmtree(part_root)
+    part_root.mkdir(parents=True, exist_ok=True)
+
+    if affected:
+        where = f"month_date >= DATE {_sql_literal(affected[0] + '-01')} - INTERVAL {spec['lookback']} MONTH"
+        if spec["anchor_first"]:
+            # FIRST_VALUE (the sales_index base) reads the first month.
+            where += f" OR month_date = (SELECT min(month_date) FROM {_fact_view_source(spec['source'])})"
+        cur.execute(_fact_view_sql(spec["source"], where=where, temp=True))
+        cur.execute(f"CREATE OR REPLACE TEMP TABLE {name} AS {_read_sql(sql_path)}")
+
+        for date in affected:
+            part_dir = part_root / f"date={date}"
+            part_dir.mkdir(exist_ok=True)
+            tmp = part_dir / "part.parquet.tmp"
+            cur.execute(
+                f"COPY (SELECT * FROM {name} WHERE date = {_sql_literal(date)}) TO {_sql_literal(tmp.as_posix())} "
+                f"{_parquet_options(compression, row_group_size)}"
+            )
+            tmp.replace(part_dir / "part.parquet")
+
+    state = {"sql_sha256": sql_sha, "reference_sha256": reference_sha, "dates": current}
+    state_path.write_text(json.dumps(state, indent=2, sort_keys=True), encoding="utf-8")
+    print(f"refreshed {name}: {len(affected)} of {len(current)} months ({'full' if full else 'incremental'})")
+
+    # Partitions are read in date order, which preserves the mart's ORDER BY date, ...
+    parts = sorted(part_root.glob("date=*/part.parquet"))
+    files = "[" + ", ".join(_sql_literal(p.as_posix()) for p in parts) + "]"
+    cur.execute(f"CREATE OR REPLACE TEMP VIEW {name}_all AS SELECT * FROM read_parquet({files})")
+    _export(cur, f"{name}_all", name, compression, row_group_size)
+    cur.close()
+
+
+def _export_catalog(catalog_path: Path, compression: str, row_group_size: int) -> None:
+    """Refresh the persistent catalog (``catalog.py``) and export the marts it rebuilt."""
+    import catalog  # catalog imports this module's registry
+
+    con = catalog.open_catalog(catalog_path)
+    rebuilt = set(catalog.refresh(con))
+    for name in MARTS:
+        if name not in rebuilt and (MARTS_DIR / f"{name}.parquet").exists():
+            print(f"unchanged {name}")
+            continue
+        with step("build_marts", name) as s:
+            s.rows_in = con.execute(f"SELECT count(*) FROM {INCREMENTAL[name]['source']}").fetchone()[0]
+            _export(con, name, name, compression, row_group_size)
+    con.close()
+
+
+def _run_mart(build, con: duckdb.DuckDBPyConnection, name: str, *args) -> None:
+    source = INCREMENTAL[name]["source"]
+    with step("build_marts", name) as s:
+        s.read(resolve(_source_path(source)))
+        s.rows_in = con.cursor().execute(f"SELECT count(*) FROM {source}").fetchone()[0]
+        build(con, name, *args)
+
+
+@instrumented("build_marts", "main")
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Materialize marts from SQL.")
+    parser.add_argument("--jobs", type=int, default=1, help="build marts concurrently with this many threads")
+    parser.add_argument("--compression", default=PARQUET_COMPRESSION, choices=PARQUET_CODECS, help="Parquet codec")
+    parser.add_argument("--row-group-size", type=int, default=PARQUET_ROW_GROUP_SIZE, help="Parquet row group size in rows")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="recompute only new/revised months into date-partitioned marts under data/marts/<mart>/",
+    )
+    parser.add_argument(
+        "--catalog",
+        nargs="?",
+        type=Path,
+        const=CATALOG_PATH,
+        help="build in the persistent DuckDB catalog (default data/catalog.duckdb) and export only the marts it rebuilt",
+    )
+    args = parser.parse_args(argv)
+
+    if args.catalog:
+        _export_catalog(args.catalog, args.compression, args.row_group_size)
+        flush()
+        return 0
+
+    for sql_path in MARTS.values():
         if not sql_path.exists():
             raise FileNotFoundError(f"missing SQL: {sql_path}")
-        df = _run_query(con, sql_path)
-        _write(df, name)
+
+    build = _refresh_incremental if args.incremental else _build
+    con = connect()
+    upstream = {dep for deps in MART_DEPS.values() for dep in deps}
+    with ThreadPoolExecutor(max_workers=max(1, min(args.jobs, len(MARTS)))) as pool:
+        for wave in _waves(list(MARTS)):
+            futures = [
+                pool.submit(_run_mart, build, con, name, MARTS[name], args.compression, args.row_group_size)
+                for name in wave
+            ]
+            for future in futures:
+                future.result()
+            for name in wave:
+                if name in upstream:
+                    con.execute(_fact_view_sql(name))
+    flush()
     return 0
 
 
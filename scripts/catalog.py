@@ -0,0 +1,225 @@
+#!/usr/bin/env python
+"""Persistent DuckDB catalog of the fact tables, reference tables and marts.
+
+    python scripts/catalog.py refresh                  # load changed facts, rebuild the marts they feed
+    python scripts/catalog.py query "SELECT ..."       # ad-hoc SQL over the loaded tables
+    python scripts/catalog.py status
+
+``data/catalog.duckdb`` holds every fact and reference table as a native DuckDB
+table loaded from its Parquet/CSV source (by absolute path, so it works from any
+working directory), and every mart as a table materialized from its SQL file in
+dependency order. The ``_catalog_sources`` table records a version per table: the
+source files' size/mtime for loaded tables, and for marts a hash of the SQL and
+the versions of the tables it reads. ``refresh`` reloads or rebuilds only the
+tables whose version changed, inside one transaction, so readers never see a
+half-refreshed catalog and table statistics persist between runs. Facts also
+record which columns are categorical (and ordered), so readers get
+``read_fact``'s dtypes without touching the Parquet files; ``check_current`` fails when any source
+changed after the last refresh.
+
+``build_marts.py --catalog`` exports the marts from here, and
+``generate_reports.py --catalog`` reads the facts and rank index from here.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import sys
+from pathlib import Path
+from typing import Iterable, Sequence
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import build_marts
+from build_marts import CATALOG_PATH
+from fact_store import PARTITION_COLS, filter_sql, resolve, scan_sql
+
+SOURCES_TABLE = "_catalog_sources"
+
+
+def open_catalog(path: Path = CATALOG_PATH, read_only: bool = False) -> duckdb.DuckDBPyConnection:
+    """Connect to the catalog file (one writer process at a time; readers use ``read_only``)."""
+    if read_only and not path.exists():
+        raise FileNotFoundError(f"missing catalog: {path} (run scripts/catalog.py refresh)")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    con = duckdb.connect(str(path), read_only=read_only)
+    if not read_only:
+        con.execute(
+            f"CREATE TABLE IF NOT EXISTS {SOURCES_TABLE} ("
+            "name VARCHAR PRIMARY KEY, kind VARCHAR, version VARCHAR, rows BIGINT, refreshed_at TIMESTAMP, "
+            "categoricals VARCHAR)"
+        )
+        con.execute(f"ALTER TABLE {SOURCES_TABLE} ADD COLUMN IF NOT EXISTS categoricals VARCHAR")
+    return con
+
+
+def versions(con: duckdb.DuckDBPyConnection) -> dict[str, str]:
+    return dict(con.execute(f"SELECT name, version FROM {SOURCES_TABLE}").fetchall())
+
+
+def _file_version(path: Path) -> str:
+    source = resolve(path)
+    files = sorted(source.rglob("*.parquet")) if source.is_dir() else [source]
+    h = hashlib.sha256()
+    for f in files:
+        st = f.stat()
+        h.update(f"{f}:{st.st_size}:{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+def source_versions() -> dict[str, str]:
+    """The version every catalog table should have given the current sources and SQL, in build order."""
+    current: dict[str, str] = {}
+    for name, path in build_marts.FACTS.items():
+        if not resolve(path).exists():
+            raise FileNotFoundError(f"missing fact table: {path}")
+        current[name] = _file_version(path)
+    for name, path in build_marts.REFERENCE.items():
+        if not path.exists():
+            raise FileNotFoundError(f"missing reference table: {path}")
+        current[name] = hashlib.sha256(path.read_bytes()).hexdigest()
+    for wave in build_marts._waves(list(build_marts.MARTS)):
+        for name in wave:
+            if not build_marts.MARTS[name].exists():
+                raise FileNotFoundError(f"missing SQL: {build_marts.MARTS[name]}")
+            h = hashlib.sha256(build_marts._read_sql(build_marts.MARTS[name]).encode())
+            for dep in build_marts.mart_inputs(name):
+                h.update(f"\n{dep}:{current[dep]}".encode())
+            current[name] = h.hexdigest()
+    return current
+
+
+def stale(con: duckdb.DuckDBPyConnection) -> list[str]:
+    """Catalog tables whose source files or SQL changed since the last refresh (or that are missing)."""
+    known = versions(con)
+    return [name for name, version in source_versions().items() if known.get(name) != version]
+
+
+def check_current(con: duckdb.DuckDBPyConnection) -> None:
+    """Fail rather than serve tables older than their sources."""
+    names = stale(con)
+    if names:
+        raise RuntimeError(f"catalog is out of date for {', '.join(names)}; run scripts/catalog.py refresh")
+
+
+def _categoricals(name: str) -> dict[str, bool]:
+    """Columns ``read_fact`` returns as categoricals (-> ordered), from the fact's stored schema."""
+    source = resolve(build_marts.FACTS[name])
+    first = next(iter(sorted(source.rglob("*.parquet")))) if source.is_dir() else source
+    categoricals = {f.name: f.type.ordered for f in pq.read_schema(first) if pa.types.is_dictionary(f.type)}
+    if source.is_dir():
+        categoricals.update({col: col == "date" for col in PARTITION_COLS.get(name, [])})
+    return categoricals
+
+
+def _record(
+    con: duckdb.DuckDBPyConnection, name: str, kind: str, version: str, categoricals: dict[str, bool] | None = None
+) -> None:
+    rows = con.execute(f"SELECT count(*) FROM {name}").fetchone()[0]
+    con.execute(
+        f"INSERT OR REPLACE INTO {SOURCES_TABLE} (name, kind, version, rows, refreshed_at, categoricals) "
+        "VALUES (?, ?, ?, ?, now()::TIMESTAMP, ?)",
+        [name, kind, version, rows, json.dumps(categoricals) if categoricals is not None else None],
+    )
+
+
+def refresh(con: duckdb.DuckDBPyConnection, force: bool = False) -> list[str]:
+    """Reload changed sources and rebuild the marts downstream of them; returns what was (re)built."""
+    current = source_versions()
+    known = versions(con)
+    rebuilt = [name for name, version in current.items() if force or known.get(name) != version]
+    con.begin()
+    try:
+        for name in rebuilt:
+            if name in build_marts.FACTS:
+                # The dtypes are captured with the data, so readers never consult the (maybe newer) files.
+                categoricals = _categoricals(name)
+                con.execute(f"CREATE OR REPLACE TABLE {name} AS SELECT * FROM {scan_sql(build_marts.FACTS[name])}")
+                _record(con, name, "fact", current[name], categoricals)
+            elif name in build_marts.REFERENCE:
+                con.execute(f"CREATE OR REPLACE TABLE {name} AS SELECT * FROM {build_marts._reference_scan_sql(name)}")
+                _record(con, name, "reference", current[name])
+            else:
+                con.execute(f"CREATE OR REPLACE TABLE {name} AS {build_marts._read_sql(build_marts.MARTS[name])}")
+                _record(con, name, "mart", current[name])
+        con.commit()
+    except BaseException:
+        con.rollback()
+        raise
+    return rebuilt
+
+
+def _fact_frame(table: pa.Table, categoricals: dict[str, bool]) -> pd.DataFrame:
+    """Give a fact read from the catalog ``read_fact``'s dtypes: sorted categoricals over the values read."""
+    df = table.to_pandas(date_as_object=False)
+    for col, ordered in categoricals.items():
+        if col in df.columns:
+            categories = sorted(df[col].dropna().unique())
+            df[col] = df[col].astype(pd.CategoricalDtype(categories, ordered=ordered))
+    return df
+
+
+def read_table(
+    con: duckdb.DuckDBPyConnection,
+    name: str,
+    columns: Sequence[str] | None = None,
+    date_start: str | None = None,
+    date_end: str | None = None,
+    industries: Iterable[str] | None = None,
+    where: str | None = None,
+) -> pd.DataFrame:
+    """A catalog table as a frame, with ``read_fact``'s month/industry filters (facts keep its dtypes)."""
+    cur = con.cursor()
+    clauses = [c for c in (filter_sql(date_start, date_end, industries), where) if c]
+    select = ", ".join(f'"{c}"' for c in columns) if columns else "*"
+    sql = f"SELECT {select} FROM {name}"
+    if clauses:
+        sql += " WHERE " + " AND ".join(f"({c})" for c in clauses)
+    table = cur.execute(sql).arrow()
+    if isinstance(table, pa.RecordBatchReader):  # duckdb >= 1.4 streams batches
+        table = table.read_all()
+    row = cur.execute(f"SELECT categoricals FROM {SOURCES_TABLE} WHERE name = ?", [name]).fetchone()
+    if row is None or row[0] is None:
+        return table.to_pandas(date_as_object=False)
+    return _fact_frame(table, json.loads(row[0]))
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Maintain and query the persistent DuckDB catalog.")
+    parser.add_argument("--catalog", type=Path, default=CATALOG_PATH, help="catalog file (default: data/catalog.duckdb)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    refresh_cmd = commands.add_parser("refresh", help="load changed sources and rebuild the marts they feed")
+    refresh_cmd.add_argument("--force", action="store_true", help="reload and rebuild every table")
+    query_cmd = commands.add_parser("query", help="run SQL against the catalog and print the result")
+    query_cmd.add_argument("sql")
+    commands.add_parser("status", help="list the catalog tables with their row counts and refresh times")
+    args = parser.parse_args(argv)
+
+    if args.command == "refresh":
+        con = open_catalog(args.catalog)
+        rebuilt = refresh(con, force=args.force)
+        con.close()
+        for name in rebuilt:
+            print(f"refreshed {name}")
+        print(f"wrote {args.catalog} ({len(rebuilt)} tables refreshed)")
+        return 0
+
+    con = open_catalog(args.catalog, read_only=True)
+    out_of_date = stale(con)
+    if out_of_date:
+        print(f"warning: catalog is out of date for {', '.join(out_of_date)}; run refresh", file=sys.stderr)
+    if args.command == "query":
+        df = con.execute(args.sql).df()
+    else:
+        df = con.execute(f"SELECT name, kind, rows, refreshed_at FROM {SOURCES_TABLE} ORDER BY kind, name").df()
+    con.close()
+    print(df.to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
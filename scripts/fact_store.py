@@ -0,0 +1,185 @@
+"""Storage layout for the processed fact tables.
+
+A fact table lives either as a single Parquet file (``data/processed/<name>.parquet``,
+the default) or as a Hive-partitioned dataset directory next to it
+(``data/processed/<name>/date=YYYY-MM[/industry=...]/part-0.parquet``) with rows
+sorted inside each file and column statistics written. Readers resolve whichever
+layout is present and push date/industry filters down to partition pruning and
+row-group statistics.
+
+Besides the ``YYYY-MM`` ``date`` string (the published key), each fact stores a
+native ``month_date`` (Parquet DATE, first day of the month) so readers never
+reparse the strings.
+"""
+from __future__ import annotations
+
+import shutil
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+MONTH_COL = "month_date"
+COLUMNS = {
+    "fact_national_retail_sales": ["date", MONTH_COL, "industry", "sales_amount"],
+    "fact_state_retail_growth": ["date", MONTH_COL, "state", "region", "industry", "yoy_pct"],
+}
+PARTITION_COLS = {
+    "fact_national_retail_sales": ["date"],
+    "fact_state_retail_growth": ["date", "industry"],
+}
+SORT_COLS = {
+    "fact_national_retail_sales": ["date", "industry"],
+    "fact_state_retail_growth": ["date", "industry", "state"],
+}
+ROW_GROUP_SIZE = 64_000
+# ``--start``/``--end`` value for an open end of the month window.
+ALL_MONTHS = "all"
+
+
+@lru_cache(maxsize=None)
+def _parse_month(value: str) -> pd.Timestamp:
+    return pd.to_datetime(value[:7], format="%Y-%m", errors="coerce")
+
+
+def month_start(values: pd.Series) -> pd.Series:
+    """First day of each ``YYYY-MM`` value, parsing every distinct string once (memoized)."""
+    codes, uniques = pd.factorize(values)
+    parsed = pd.DatetimeIndex([_parse_month(str(u)) for u in uniques] + [pd.NaT])
+    return pd.Series(parsed.take(codes), index=values.index, name=MONTH_COL)
+
+
+def month_bound(value: str) -> str | None:
+    """Parse a ``--start``/``--end`` argument: a ``YYYY-MM`` month, or ``all`` (None, unbounded)."""
+    if value.strip().lower() == ALL_MONTHS:
+        return None
+    return str(pd.Period(value.strip(), freq="M"))
+
+
+def to_arrow(df: pd.DataFrame) -> pa.Table:
+    """A fact frame as an Arrow table in the stored schema (categoricals as dictionaries, DATE month)."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if MONTH_COL in table.column_names:
+        i = table.schema.get_field_index(MONTH_COL)
+        table = table.set_column(i, MONTH_COL, table.column(i).cast(pa.date32()))
+    return table
+
+
+def resolve(path: Path) -> Path:
+    """The partitioned dataset directory for ``<name>.parquet`` if present, else the file itself."""
+    dataset_dir = path.with_suffix("")
+    return dataset_dir if path.suffix == ".parquet" and dataset_dir.is_dir() else path
+
+
+def write_fact(df: pd.DataFrame, path: Path, partitioned: bool = False) -> Path:
+    """Write a fact table to ``path`` (``<name>.parquet``), replacing the other layout."""
+    name = path.stem
+    dataset_dir = path.with_suffix("")
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    if not partitioned:
+        pq.write_table(to_arrow(df), path)
+        if dataset_dir.is_dir():
+            shutil.rmtree(dataset_dir)
+        return path
+
+    table = to_arrow(df.sort_values(SORT_COLS[name], ignore_index=True))
+    tmp_dir = dataset_dir.with_name(f".{dataset_dir.name}.tmp")
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    pq.write_to_dataset(
+        table,
+        tmp_dir,
+        partition_cols=PARTITION_COLS[name],
+        basename_template="part-{i}.parquet",
+        max_rows_per_group=ROW_GROUP_SIZE,
+    )
+    if dataset_dir.is_dir():
+        shutil.rmtree(dataset_dir)
+    tmp_dir.rename(dataset_dir)
+    path.unlink(missing_ok=True)
+    return dataset_dir
+
+
+def _filters(date_start: str | None, date_end: str | None, industries: Iterable[str] | None) -> list[tuple]:
+    filters = []
+    if date_start:
+        filters.append(("date", ">=", date_start))
+    if date_end:
+        filters.append(("date", "<=", date_end))
+    if industries is not None:
+        filters.append(("industry", "in", list(industries)))
+    return filters
+
+
+def _sql_literal(value: str) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def filter_sql(date_start: str | None, date_end: str | None, industries: Iterable[str] | None) -> str:
+    """The ``read_fact`` filters as a SQL predicate ("" when unfiltered), for DuckDB scans."""
+    where = []
+    if date_start:
+        where.append(f"date >= {_sql_literal(date_start)}")
+    if date_end:
+        where.append(f"date <= {_sql_literal(date_end)}")
+    if industries is not None:
+        where.append(f"industry IN ({', '.join(_sql_literal(i) for i in industries) or 'NULL'})")
+    return " AND ".join(where)
+
+
+def read_fact(
+    path: Path,
+    columns: Sequence[str] | None = None,
+    date_start: str | None = None,
+    date_end: str | None = None,
+    industries: Iterable[str] | None = None,
+) -> pd.DataFrame:
+    """Read a fact table, pushing optional ``YYYY-MM`` bounds and industry filters into the scan."""
+    source = resolve(path)
+    filters = _filters(date_start, date_end, industries)
+    table = pq.read_table(source, columns=list(columns) if columns else None, filters=filters or None)
+    df = table.to_pandas(date_as_object=False)
+
+    # Partition keys come back as trailing categoricals over every partition value;
+    # restore the file layout and keep only the categories that were read.
+    order = [c for c in COLUMNS.get(path.stem, df.columns) if c in df.columns]
+    df = df[order]
+    for col in PARTITION_COLS.get(path.stem, []):
+        if col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype):
+            used = df[col].cat.remove_unused_categories()
+            df[col] = used.cat.reorder_categories(sorted(used.cat.categories), ordered=col == "date")
+
+    # Facts written before month_date existed: derive it once per distinct month.
+    if columns is None and MONTH_COL not in df.columns and "date" in df.columns:
+        df.insert(df.columns.get_loc("date") + 1, MONTH_COL, month_start(df["date"]))
+    return df
+
+
+def fact_frame(
+    table: pa.Table,
+    columns: Sequence[str] | None = None,
+    date_start: str | None = None,
+    date_end: str | None = None,
+    industries: Iterable[str] | None = None,
+) -> pd.DataFrame:
+    """``read_fact`` over an in-memory Arrow table (see ``to_arrow``) instead of a file."""
+    filters = _filters(date_start, date_end, industries)
+    if filters:
+        table = table.filter(pq.filters_to_expression(filters))
+    if columns:
+        table = table.select(list(columns))
+    return table.to_pandas(date_as_object=False)
+
+
+def scan_sql(path: Path) -> str:
+    """DuckDB table expression over either layout; filters on date/industry prune partitions."""
+    source = resolve(path)
+    if source.is_dir():
+        glob = (source / "**" / "*.parquet").as_posix().replace("'", "''")
+        types = ", ".join(f"'{c}': VARCHAR" for c in PARTITION_COLS.get(path.stem, []))
+        return f"read_parquet('{glob}', hive_partitioning = true, hive_types = {{{types}}})"
+    return "read_parquet('" + source.as_posix().replace("'", "''") + "')"
@@ -2,52 +2,155 @@
 """Generate data validation doc, metrics snapshot, and key figures."""
 from __future__ import annotations
 
+import argparse
+import hashlib
+import inspect
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-import pandas as pd
+from typing import Sequence
+
 import numpy as np
-import matplotlib.pyplot as plt
+import pandas as pd
+import pyarrow.parquet as pq
+import matplotlib
+import matplotlib.dates as mdates
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from PIL import Image
+
+from fact_store import month_bound, month_start, read_fact, resolve
+from growth_cube import GrowthCube
+from instrument import instrumented, step
+from validation import Source, out_of_range_rows, validate
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
 PROCESSED_DIR = REPO_ROOT / "data" / "processed"
+MARTS_DIR = REPO_ROOT / "data" / "marts"
+RANK_INDEX = "marts_growth_rank_index"
+RANK_INDEX_COLUMNS = ["date", "month_date", "state", "state_rank", "cum_pos_share"]
 DOCS_DIR = REPO_ROOT / "docs"
 FIG_DIR = DOCS_DIR / "figures"
-
-EXPECTED_INDUSTRIES = [
-    "Food & Beverage Stores",
-    "General Merchandise",
-    "Motor Vehicles & Parts",
-    "Clothing & Accessories",
-    "Electronics & Appliances",
-    "Nonstore Retail (E-commerce)",
-    "Other Specialty Retail",
-]
-
-DATE_START = "2022-01"
-DATE_END = "2024-12"
-
-
-def _load():
-    mtrs = pd.read_parquet(PROCESSED_DIR / "fact_national_retail_sales.parquet")
-    msrs = pd.read_parquet(PROCESSED_DIR / "fact_state_retail_growth.parquet")
+FANOUT_DIR = FIG_DIR / "fanout"
+REPORTS_DIR = DOCS_DIR / "reports"  # filtered runs write under reports/<window>/, never over the canonical docs
+FANOUT_BATCH = 50  # charts drawn per template figure / worker task
+FIG_HASH_KEY = "InputHash"  # PNG text chunk recording the inputs a figure was drawn from
+
+# Report window; None covers every month in the fact tables (whatever window transform kept).
+DATE_START: str | None = None
+DATE_END: str | None = None
+# Months loaded before the window start so its first months still have a YoY base.
+HISTORY_MONTHS = 12
+
+# Top-N cut-offs computed by the metrics engine (the snapshot and figures use top 5).
+TOP_NS = (5, 10)
+
+
+def _load(date_start: str | None = None, date_end: str | None = None, industries: Sequence[str] | None = None):
+    """Load both fact tables, pushing optional month/industry filters into the Parquet scan."""
+    filters = {"date_start": date_start, "date_end": date_end, "industries": industries}
+    mtrs = read_fact(PROCESSED_DIR / "fact_national_retail_sales.parquet", **filters)
+    msrs = read_fact(PROCESSED_DIR / "fact_state_retail_growth.parquet", **filters)
     return mtrs, msrs
 
 
-def _to_dt(s: pd.Series) -> pd.Series:
-    return pd.to_datetime(s.astype(str) + "-01")
+def _history_start(date_start: str | None) -> str | None:
+    """First month to load for a report starting at ``date_start``."""
+    if not date_start:
+        return None
+    return (pd.Period(date_start, freq="M") - HISTORY_MONTHS).strftime("%Y-%m")
+
+
+def _in_window(df: pd.DataFrame, date_start: str | None, col: str = "month_date") -> pd.DataFrame:
+    """Drop the history rows loaded before ``date_start``."""
+    return df[df[col] >= pd.Timestamp(f"{date_start}-01")] if date_start else df
+
+
+def _window_dir(date_start: str | None, date_end: str | None, industries: Sequence[str] | None) -> Path:
+    """Output directory of a filtered report, named after its window and industries."""
+    name = f"{date_start or 'first'}_{date_end or 'last'}"
+    if industries:
+        name += "-" + "-".join(_slug(pd.Series(sorted(industries))))
+    return REPORTS_DIR / name
+
+
+def _load_rank_index(date_start: str | None = None, date_end: str | None = None) -> pd.DataFrame | None:
+    """The all-industry rows of the growth rank index mart, or None when it has not been built."""
+    path = MARTS_DIR / f"{RANK_INDEX}.parquet"
+    if not path.exists():
+        return None
+    filters = [("industry", "==", "All Industries")]
+    if date_start:
+        filters.append(("date", ">=", date_start))
+    if date_end:
+        filters.append(("date", "<=", date_end))
+    return pq.read_table(path, columns=RANK_INDEX_COLUMNS, filters=filters).to_pandas(date_as_object=False)
+
+
+def _load_catalog(
+    catalog_path: Path,
+    date_start: str | None = None,
+    date_end: str | None = None,
+    industries: Sequence[str] | None = None,
+):
+    """Facts and rank index from the persistent DuckDB catalog (``catalog.py``) instead of Parquet.
+
+    Raises RuntimeError when a source changed after the catalog's last refresh.
+    """
+    import catalog  # catalog imports build_marts, which only this path needs
+
+    con = catalog.open_catalog(catalog_path, read_only=True)
+    try:
+        catalog.check_current(con)
+        filters = {"date_start": date_start, "date_end": date_end, "industries": industries}
+        mtrs = catalog.read_table(con, "fact_national_retail_sales", **filters)
+        msrs = catalog.read_table(con, "fact_state_retail_growth", **filters)
+        rank_index = None
+        if not industries:
+            rank_index = catalog.read_table(
+                con, RANK_INDEX, RANK_INDEX_COLUMNS, date_start, date_end, where="industry = 'All Industries'"
+            )
+    finally:
+        con.close()
+    return mtrs, msrs, rank_index
 
 
 def _month_range(start: str, end: str) -> list[str]:
     return pd.period_range(start=start, end=end, freq="M").astype(str).tolist()
 
 
-def _data_validation(mtrs: pd.DataFrame, msrs: pd.DataFrame) -> str:
-    expected_months = _month_range(DATE_START, DATE_END)
+def _expected_months(present: Sequence[str], date_start: str | None, date_end: str | None) -> list[str]:
+    """Every month of the window, with open ends at the first/last ``present`` month."""
+    start = date_start or (present[0] if present else None)
+    end = date_end or (present[-1] if present else None)
+    return _month_range(start, end) if start and end else []
+
+
+def _data_validation(
+    mtrs: Source,
+    msrs: Source,
+    date_start: str | None = DATE_START,
+    date_end: str | None = DATE_END,
+    industries: Sequence[str] | None = None,
+) -> str:
+    """Validation doc for the facts, given as frames or as fact files (validated with the same filters).
+
+    An open end of the window is taken from each table's own first/last month, so a
+    source that starts later (MSRS) is checked for gaps over the months it covers.
+    """
+    # One aggregate scan per table (see validation.CHECKS); file results are cached.
+    filters = {"date_start": date_start, "date_end": date_end, "industries": industries}
+    mtrs_v = validate(mtrs, "fact_national_retail_sales", **filters)
+    msrs_v = validate(msrs, "fact_state_retail_growth", **filters)
 
     # Coverage
-    mtrs_months = sorted(mtrs["date"].unique().tolist())
-    msrs_months = sorted(msrs["date"].unique().tolist())
-    mtrs_missing = sorted(set(expected_months) - set(mtrs_months))
-    msrs_missing = sorted(set(expected_months) - set(msrs_months))
+    mtrs_months = mtrs_v["periods"]
+    msrs_months = msrs_v["periods"]
+    mtrs_expected = _expected_months(mtrs_months, date_start, date_end)
+    msrs_expected = _expected_months(msrs_months, date_start, date_end)
+    expected_months = sorted(set(mtrs_expected) | set(msrs_expected))
+    mtrs_missing = sorted(set(mtrs_expected) - set(mtrs_months))
+    msrs_missing = sorted(set(msrs_expected) - set(msrs_months))
 
     coverage_tbl = pd.DataFrame(
         [
@@ -58,8 +161,8 @@ def _data_validation(mtrs: pd.DataFrame, msrs: pd.DataFrame) -> str:
     )
 
     # Uniqueness
-    mtrs_dupes = mtrs.duplicated(subset=["date", "industry"]).sum()
-    msrs_dupes = msrs.duplicated(subset=["date", "state", "industry"]).sum()
+    mtrs_dupes = mtrs_v["duplicate_rows"]
+    msrs_dupes = msrs_v["duplicate_rows"]
     uniq_tbl = pd.DataFrame(
         [
             ["MRTS", "date+industry", int(mtrs_dupes)],
@@ -69,31 +172,31 @@ def _data_validation(mtrs: pd.DataFrame, msrs: pd.DataFrame) -> str:
     )
 
     # Missing YoY
-    msrs_missing_yoy = msrs["yoy_pct"].isna().mean() * 100
+    msrs_missing_yoy = msrs_v["nulls"]["yoy_pct"] / msrs_v["rows"] * 100 if msrs_v["rows"] else float("nan")
     missing_tbl = pd.DataFrame(
         [["MSRS", f"{msrs_missing_yoy:.2f}%"]],
         columns=["dataset", "yoy_pct_missing_rate"],
     )
 
     # Value range
-    yoy_min = msrs["yoy_pct"].min()
-    yoy_max = msrs["yoy_pct"].max()
-    out_of_range = msrs[(msrs["yoy_pct"] < -100) | (msrs["yoy_pct"] > 300)]
+    # min/max are NULL when the filters leave no state rows (e.g. an MRTS-only industry).
+    yoy_min = float("nan") if msrs_v["min"]["yoy_pct"] is None else msrs_v["min"]["yoy_pct"]
+    yoy_max = float("nan") if msrs_v["max"]["yoy_pct"] is None else msrs_v["max"]["yoy_pct"]
+    out_of_range = msrs_v["out_of_range"]["yoy_pct"]
     range_tbl = pd.DataFrame(
         [
-            ["MSRS", float(yoy_min), float(yoy_max), int(len(out_of_range))],
+            ["MSRS", float(yoy_min), float(yoy_max), int(out_of_range)],
         ],
         columns=["dataset", "yoy_min", "yoy_max", "out_of_range_rows"],
     )
 
     # Industry consistency
-    mtrs_ind = sorted(mtrs["industry"].unique().tolist())
-    msrs_ind = sorted(msrs["industry"].unique().tolist())
-    expected_set = set(EXPECTED_INDUSTRIES)
-    mtrs_missing_ind = sorted(expected_set - set(mtrs_ind))
-    msrs_missing_ind = sorted(expected_set - set(msrs_ind))
-    mtrs_unexpected = sorted(set(mtrs_ind) - expected_set)
-    msrs_unexpected = sorted(set(msrs_ind) - expected_set)
+    mtrs_ind = mtrs_v["values"]["industry"]
+    msrs_ind = msrs_v["values"]["industry"]
+    mtrs_missing_ind = mtrs_v["missing_values"]["industry"]
+    msrs_missing_ind = msrs_v["missing_values"]["industry"]
+    mtrs_unexpected = mtrs_v["unexpected_values"]["industry"]
+    msrs_unexpected = msrs_v["unexpected_values"]["industry"]
 
     industry_tbl = pd.DataFrame(
         [
@@ -104,8 +207,8 @@ def _data_validation(mtrs: pd.DataFrame, msrs: pd.DataFrame) -> str:
     )
 
     # State mapping coverage
-    states = msrs["state"].nunique()
-    missing_region = msrs["region"].isna().sum()
+    states = msrs_v["distinct"]["state"]
+    missing_region = msrs_v["nulls"]["region"]
     mapping_tbl = pd.DataFrame(
         [["MSRS", int(states), int(missing_region)]],
         columns=["dataset", "states_present", "missing_region_rows"],
@@ -117,7 +220,7 @@ def _data_validation(mtrs: pd.DataFrame, msrs: pd.DataFrame) -> str:
     lines = [
         "# Data Validation",
         "",
-        "## 1) Coverage (36 months, no gaps)",
+        f"## 1) Coverage ({len(expected_months)} months, no gaps)",
         f"Conclusion: MRTS missing months = {len(mtrs_missing)}, MSRS missing months = {len(msrs_missing)}.",
         md_table(coverage_tbl),
         "",
@@ -130,13 +233,14 @@ def _data_validation(mtrs: pd.DataFrame, msrs: pd.DataFrame) -> str:
         md_table(missing_tbl),
         "",
         "## 4) Value Range (YoY %)",
-        f"Conclusion: min={yoy_min:.2f}%, max={yoy_max:.2f}%, out-of-range rows={len(out_of_range)}.",
+        f"Conclusion: min={yoy_min:.2f}%, max={yoy_max:.2f}%, out-of-range rows={out_of_range}.",
         md_table(range_tbl),
     ]
 
-    if len(out_of_range) > 0:
-        sample = out_of_range.sort_values("yoy_pct").head(5)
-        lines += ["", "Out-of-range sample:", sample[["date", "state", "industry", "yoy_pct"]].to_markdown(index=False)]
+    if out_of_range > 0:
+        columns = ["date", "state", "industry", "yoy_pct"]
+        sample = out_of_range_rows(msrs, "fact_state_retail_growth", "yoy_pct", columns, **filters)
+        lines += ["", "Out-of-range sample:", sample.to_markdown(index=False)]
 
     lines += [
         "",
@@ -152,15 +256,83 @@ def _data_validation(mtrs: pd.DataFrame, msrs: pd.DataFrame) -> str:
     return "\n".join(lines)
 
 
-def _metrics_snapshot(mtrs: pd.DataFrame, msrs: pd.DataFrame) -> pd.DataFrame:
-    # National total sales
-    mtrs_dt = mtrs.copy()
-    mtrs_dt["date_dt"] = _to_dt(mtrs_dt["date"])
-    total = mtrs_dt.groupby("date_dt", as_index=False)["sales_amount"].sum()
-    total = total.sort_values("date_dt")
+def _topn_shares(msrs: pd.DataFrame, ns: Sequence[int]) -> pd.DataFrame:
+    """Share of positive all-industry growth held by the top-N states per month, for every N in one pass.
+
+    The state fact is scattered into a dense growth cube and ranked with array reductions.
+    """
+    if msrs.empty:
+        return pd.DataFrame({"date_dt": pd.Series(dtype="datetime64[ms]"), **{f"top{n}_share_pct": pd.Series(dtype=float) for n in ns}})
+    cube = GrowthCube.from_frame(msrs, dtype=np.float64)
+    shares = cube.topn_shares(ns)
+    frame = pd.DataFrame({"date_dt": month_start(pd.Series(cube.dates)).to_numpy()})
+    for j, n in enumerate(ns):
+        frame[f"top{n}_share_pct"] = shares[:, j]
+    return frame
+
+
+def _topn_shares_from_index(rank_index: pd.DataFrame, ns: Sequence[int]) -> pd.DataFrame:
+    """``_topn_shares`` read off the rank index: the cumulative share at rank N (or the last rank)."""
+    index = rank_index.rename(columns={"month_date": "date_dt"})
+    shares = pd.DataFrame(index=pd.Index(sorted(index["date_dt"].unique()), name="date_dt"))
+    for n in ns:
+        # cum_pos_share never decreases with rank, so the max over ranks <= N is the value at min(N, states).
+        top = index[index["state_rank"] <= n].groupby("date_dt")["cum_pos_share"].max()
+        shares[f"top{n}_share_pct"] = (top * 100).astype(float)
+    return shares.reset_index()
+
+
+def _compute_metrics(
+    mtrs: pd.DataFrame,
+    msrs: pd.DataFrame,
+    top_ns: Sequence[int] = TOP_NS,
+    rank_index: pd.DataFrame | None = None,
+    date_start: str | None = None,
+) -> dict[str, pd.DataFrame]:
+    """Aggregate the fact tables once into the frames shared by the snapshot and the figures.
+
+    Growth is computed over every loaded month; the frames are then trimmed to
+    ``date_start``, so history loaded before the window only serves as YoY base.
+
+    - ``total``: national sales per month with MoM/YoY growth
+    - ``industry_share``: each industry's share of national sales per month
+    - ``industry_yoy``: each industry's national sales YoY % per month
+    - ``topn_share``: top-N states' share of positive all-industry growth per month,
+      read from the growth rank index mart when given (else ranked here)
+    - ``state_yoy``: the state fact with parsed dates (source of the fan-out charts)
+    """
+    mtrs_dt = mtrs.assign(date_dt=mtrs["month_date"])
+    total = mtrs_dt.groupby("date_dt", as_index=False)["sales_amount"].sum().sort_values("date_dt", ignore_index=True)
     total["mom_growth_pct"] = total["sales_amount"].pct_change() * 100
     total["yoy_growth_pct"] = total["sales_amount"].pct_change(12) * 100
 
+    industry_share = mtrs_dt[["date_dt", "industry", "sales_amount"]].copy()
+    industry_share["share_pct"] = (
+        industry_share["sales_amount"] / industry_share.groupby("date_dt")["sales_amount"].transform("sum") * 100
+    )
+    industry_yoy = industry_share[["date_dt", "industry", "sales_amount"]].sort_values(["industry", "date_dt"])
+    industry_yoy["yoy_growth_pct"] = industry_yoy.groupby("industry", observed=True)["sales_amount"].pct_change(12) * 100
+
+    msrs_dt = msrs.assign(date_dt=msrs["month_date"])
+    if rank_index is not None:
+        topn_share = _topn_shares_from_index(rank_index, top_ns)
+    else:
+        topn_share = _topn_shares(msrs, top_ns)
+
+    metrics = {
+        "total": total,
+        "industry_share": industry_share,
+        "industry_yoy": industry_yoy[["date_dt", "industry", "yoy_growth_pct"]],
+        "topn_share": topn_share,
+        "state_yoy": msrs_dt[["date_dt", "state", "region", "industry", "yoy_pct"]],
+    }
+    return {key: _in_window(frame, date_start, "date_dt").reset_index(drop=True) for key, frame in metrics.items()}
+
+
+def _metrics_snapshot(metrics: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    total = metrics["total"]
+    top5 = metrics["topn_share"]
+
     latest = total["date_dt"].max()
     last12 = total[total["date_dt"] > (latest - pd.DateOffset(months=12))]
 
@@ -170,152 +342,392 @@ def _metrics_snapshot(mtrs: pd.DataFrame, msrs: pd.DataFrame) -> pd.DataFrame:
     def last12_avg(col: str):
         return float(last12[col].mean())
 
-    # MSRS Top5 share (all-industry, positive-only)
-    msrs_dt = msrs.copy()
-    msrs_dt["date_dt"] = _to_dt(msrs_dt["date"])
-
-    all_ind = msrs_dt.groupby(["date_dt", "state"], as_index=False)["yoy_pct"].mean()
-    all_ind["pos_yoy"] = all_ind["yoy_pct"].clip(lower=0)
-
-    def topn_share(n: int) -> pd.DataFrame:
-        shares = []
-        for d, g in all_ind.groupby("date_dt"):
-            total_pos = g["pos_yoy"].sum()
-            if total_pos == 0:
-                share = np.nan
-            else:
-                share = g.sort_values("pos_yoy", ascending=False).head(n)["pos_yoy"].sum() / total_pos * 100
-            shares.append([d, share])
-        return pd.DataFrame(shares, columns=["date_dt", f"top{n}_share_pct"]).sort_values("date_dt")
-
-    top5 = topn_share(5)
-
-    latest_top5 = float(top5.loc[top5["date_dt"] == latest, "top5_share_pct"].iloc[0])
-    last12_top5 = float(top5[top5["date_dt"] > (latest - pd.DateOffset(months=12))]["top5_share_pct"].mean())
+    # The state series can end before the national one (MSRS is published later than MRTS),
+    # and is empty when the filters leave no state rows (e.g. an MRTS-only industry).
+    latest_state = top5["date_dt"].max()
+    if top5.empty:
+        latest_top5 = last12_top5 = float("nan")
+    else:
+        latest_top5 = float(top5.loc[top5["date_dt"] == latest_state, "top5_share_pct"].iloc[0])
+        last12_top5 = float(top5[top5["date_dt"] > (latest_state - pd.DateOffset(months=12))]["top5_share_pct"].mean())
 
     snapshot = pd.DataFrame(
         [
             ["total_sales", latest.strftime("%Y-%m"), latest_val("sales_amount"), last12_avg("sales_amount")],
             ["yoy_growth_pct", latest.strftime("%Y-%m"), latest_val("yoy_growth_pct"), last12_avg("yoy_growth_pct")],
             ["mom_growth_pct", latest.strftime("%Y-%m"), latest_val("mom_growth_pct"), last12_avg("mom_growth_pct")],
-            ["top5_state_growth_share_pct", latest.strftime("%Y-%m"), latest_top5, last12_top5],
+            [
+                "top5_state_growth_share_pct",
+                None if top5.empty else latest_state.strftime("%Y-%m"),
+                latest_top5,
+                last12_top5,
+            ],
         ],
         columns=["metric", "latest_month", "latest_value", "last_12m_avg"],
     )
     return snapshot
 
 
-def _figures(mtrs: pd.DataFrame, msrs: pd.DataFrame) -> None:
-    FIG_DIR.mkdir(parents=True, exist_ok=True)
+def _fig_total_sales(fig: Figure, total: pd.DataFrame) -> None:
+    ax = fig.add_subplot()
+    ax.plot(total["date_dt"], total["sales_amount"], color="#1f77b4", linewidth=2)
+    ax.set_title("National Retail Sales (Total)")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Sales (Millions $)")
 
-    mtrs_dt = mtrs.copy()
-    mtrs_dt["date_dt"] = _to_dt(mtrs_dt["date"])
-    total = mtrs_dt.groupby("date_dt", as_index=False)["sales_amount"].sum().sort_values("date_dt")
-    total["mom_growth_pct"] = total["sales_amount"].pct_change() * 100
-    total["yoy_growth_pct"] = total["sales_amount"].pct_change(12) * 100
 
-    # Figure 1: Total sales trend
-    plt.figure(figsize=(8, 4))
-    plt.plot(total["date_dt"], total["sales_amount"], color="#1f77b4", linewidth=2)
-    plt.title("National Retail Sales (Total)")
-    plt.xlabel("Date")
-    plt.ylabel("Sales (Millions $)")
-    plt.tight_layout()
-    plt.savefig(FIG_DIR / "total_sales_trend.png", dpi=150)
-    plt.close()
-
-    # Figure 2: YoY and MoM growth
-    plt.figure(figsize=(8, 4))
-    plt.plot(total["date_dt"], total["yoy_growth_pct"], label="YoY %", color="#2ca02c")
-    plt.plot(total["date_dt"], total["mom_growth_pct"], label="MoM %", color="#ff7f0e")
-    plt.axhline(0, color="#999999", linewidth=0.8)
-    plt.title("National Retail Sales Growth")
-    plt.xlabel("Date")
-    plt.ylabel("Growth (%)")
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig(FIG_DIR / "growth_yoy_mom.png", dpi=150)
-    plt.close()
-
-    # Figure 3: Seasonality heatmap
+def _fig_growth(fig: Figure, total: pd.DataFrame) -> None:
+    ax = fig.add_subplot()
+    ax.plot(total["date_dt"], total["yoy_growth_pct"], label="YoY %", color="#2ca02c")
+    ax.plot(total["date_dt"], total["mom_growth_pct"], label="MoM %", color="#ff7f0e")
+    ax.axhline(0, color="#999999", linewidth=0.8)
+    ax.set_title("National Retail Sales Growth")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Growth (%)")
+    ax.legend()
+
+
+def _fig_seasonality(fig: Figure, total: pd.DataFrame) -> None:
     season = total.copy()
     season["year"] = season["date_dt"].dt.year
     season["month"] = season["date_dt"].dt.month
     pivot = season.pivot(index="month", columns="year", values="sales_amount")
 
-    plt.figure(figsize=(8, 4))
-    plt.imshow(pivot, aspect="auto", cmap="YlGnBu")
-    plt.title("Seasonality Heatmap (Total Sales)")
-    plt.xlabel("Year")
-    plt.ylabel("Month")
-    plt.xticks(range(len(pivot.columns)), pivot.columns, rotation=0)
-    plt.yticks(range(1, 13), range(1, 13))
-    plt.colorbar(label="Sales (Millions $)")
-    plt.tight_layout()
-    plt.savefig(FIG_DIR / "seasonality_heatmap.png", dpi=150)
-    plt.close()
-
-    # Figure 4: Top5 growth share trend
-    msrs_dt = msrs.copy()
-    msrs_dt["date_dt"] = _to_dt(msrs_dt["date"])
-    all_ind = msrs_dt.groupby(["date_dt", "state"], as_index=False)["yoy_pct"].mean()
-    all_ind["pos_yoy"] = all_ind["yoy_pct"].clip(lower=0)
-
-    shares = []
-    for d, g in all_ind.groupby("date_dt"):
-        total_pos = g["pos_yoy"].sum()
-        share = np.nan
-        if total_pos > 0:
-            share = g.sort_values("pos_yoy", ascending=False).head(5)["pos_yoy"].sum() / total_pos * 100
-        shares.append([d, share])
-    share_df = pd.DataFrame(shares, columns=["date_dt", "top5_share_pct"]).sort_values("date_dt")
-
-    plt.figure(figsize=(8, 4))
-    plt.plot(share_df["date_dt"], share_df["top5_share_pct"], color="#9467bd", linewidth=2)
-    plt.title("Top 5 States Share of Positive Growth")
-    plt.xlabel("Date")
-    plt.ylabel("Share (%)")
-    plt.tight_layout()
-    plt.savefig(FIG_DIR / "top5_growth_share_trend.png", dpi=150)
-    plt.close()
-
-    # Figure 5: Industry share trend (national level)
-    shares = mtrs_dt.copy()
-    total_month = shares.groupby("date_dt", as_index=False)["sales_amount"].sum().rename(columns={"sales_amount": "total_sales"})
-    shares = shares.merge(total_month, on="date_dt", how="left")
-    shares["share_pct"] = shares["sales_amount"] / shares["total_sales"] * 100
-
-    plt.figure(figsize=(8, 4))
-    for industry, g in shares.groupby("industry"):
-        plt.plot(g["date_dt"], g["share_pct"], label=industry, linewidth=1.5)
-    plt.title("Industry Share of National Sales (MRTS)")
-    plt.xlabel("Date")
-    plt.ylabel("Share (%)")
-    plt.legend(loc="upper left", fontsize=7, ncol=2, frameon=False)
-    plt.tight_layout()
-    plt.savefig(FIG_DIR / "industry_share_trend.png", dpi=150)
-    plt.close()
-
-
-def main() -> int:
-    mtrs, msrs = _load()
+    ax = fig.add_subplot()
+    im = ax.imshow(pivot, aspect="auto", cmap="YlGnBu")
+    ax.set_title("Seasonality Heatmap (Total Sales)")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Month")
+    # Label at most ~12 years so a full-history window stays readable.
+    step = max(1, -(-len(pivot.columns) // 12))
+    ax.set_xticks(range(0, len(pivot.columns), step), pivot.columns[::step], rotation=0)
+    ax.set_yticks(range(1, 13), range(1, 13))
+    fig.colorbar(im, ax=ax, label="Sales (Millions $)")
+
+
+def _fig_top5_share(fig: Figure, topn_share: pd.DataFrame) -> None:
+    ax = fig.add_subplot()
+    ax.plot(topn_share["date_dt"], topn_share["top5_share_pct"], color="#9467bd", linewidth=2)
+    ax.set_title("Top 5 States Share of Positive Growth")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Share (%)")
+
+
+def _fig_industry_share(fig: Figure, industry_share: pd.DataFrame) -> None:
+    ax = fig.add_subplot()
+    for industry, g in industry_share.groupby("industry", observed=True):
+        ax.plot(g["date_dt"], g["share_pct"], label=industry, linewidth=1.5)
+    ax.set_title("Industry Share of National Sales (MRTS)")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Share (%)")
+    ax.legend(loc="upper left", fontsize=7, ncol=2, frameon=False)
+
+
+# PNG name -> (renderer, metrics frame it draws)
+FIGURES = {
+    "total_sales_trend.png": (_fig_total_sales, "total"),
+    "growth_yoy_mom.png": (_fig_growth, "total"),
+    "seasonality_heatmap.png": (_fig_seasonality, "total"),
+    "top5_growth_share_trend.png": (_fig_top5_share, "topn_share"),
+    "industry_share_trend.png": (_fig_industry_share, "industry_share"),
+}
+
+
+def _input_hash(renderer, data: pd.DataFrame) -> str:
+    """Hash of the renderer's source, the matplotlib version and the plotted frame."""
+    h = hashlib.sha256(inspect.getsource(renderer).encode())
+    h.update(matplotlib.__version__.encode())
+    h.update(",".join(map(str, data.columns)).encode())
+    h.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _rendered_hash(path: Path) -> str | None:
+    if not path.exists():
+        return None
+    try:
+        with Image.open(path) as img:
+            return img.text.get(FIG_HASH_KEY)
+    except OSError:
+        return None
+
+
+def _render(renderer, data: pd.DataFrame, path: Path, input_hash: str) -> None:
+    """Draw one figure with the Agg object-oriented API (no pyplot state)."""
+    fig = Figure(figsize=(8, 4))
+    FigureCanvasAgg(fig)
+    renderer(fig, data)
+    fig.tight_layout()
+    fig.savefig(path, dpi=150, metadata={FIG_HASH_KEY: input_hash})
+
+
+def _figures(metrics: dict[str, pd.DataFrame], jobs: int = 1, fig_dir: Path | None = None) -> list[str]:
+    """Render figures across a process pool, skipping PNGs whose input hash is unchanged.
+
+    Returns the names of the figures that were (re)drawn. Figures with no data to
+    plot (the top-N chart when no state rows pass the filters) are skipped, and an
+    earlier run's PNG of them is removed.
+    """
+    fig_dir = fig_dir or FIG_DIR
+    fig_dir.mkdir(parents=True, exist_ok=True)
+
+    tasks = []
+    for name, (renderer, key) in FIGURES.items():
+        if metrics[key].empty:
+            (fig_dir / name).unlink(missing_ok=True)
+            print(f"skipped {name}: no rows after filtering")
+            continue
+        input_hash = _input_hash(renderer, metrics[key])
+        if _rendered_hash(fig_dir / name) != input_hash:
+            tasks.append((renderer, metrics[key], fig_dir / name, input_hash))
+
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as pool:
+            for future in [pool.submit(_render, *task) for task in tasks]:
+                future.result()
+    else:
+        for task in tasks:
+            _render(*task)
+    return [task[2].name for task in tasks]
+
+
+def _slug(s: pd.Series) -> pd.Series:
+    return s.astype(str).str.lower().str.replace(r"[^a-z0-9]+", "_", regex=True).str.strip("_")
+
+
+def _fanout_frame(metrics: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Every fan-out chart as one long frame: chart, title, date_dt, value, reference.
+
+    - ``industry/<industry>``: national sales YoY % vs total retail (MRTS)
+    - ``region/<region>-<industry>``: mean state YoY % in the region vs all states (MSRS)
+    - ``state/<state>-<industry>``: state YoY % vs all states (MSRS)
+    """
+    cols = ["chart", "title", "date_dt", "value", "reference"]
+
+    ind = metrics["industry_yoy"].rename(columns={"yoy_growth_pct": "value"})
+    ind = ind.merge(
+        metrics["total"][["date_dt", "yoy_growth_pct"]].rename(columns={"yoy_growth_pct": "reference"}), on="date_dt"
+    )
+    ind["chart"] = "industry/" + _slug(ind["industry"])
+    ind["title"] = ind["industry"].astype(str) + " (national YoY % vs total retail)"
+
+    state = metrics["state_yoy"].rename(columns={"yoy_pct": "value"})
+    us_avg = state.groupby(["date_dt", "industry"], observed=True)["value"].transform("mean")
+    state = state.assign(reference=us_avg)
+    state["chart"] = "state/" + state["state"].astype(str) + "-" + _slug(state["industry"])
+    state["title"] = state["state"].astype(str) + ": " + state["industry"].astype(str) + " (YoY % vs US avg)"
 
-    # Data validation doc
-    report = _data_validation(mtrs, msrs)
-    DOCS_DIR.mkdir(parents=True, exist_ok=True)
-    (DOCS_DIR / "data_validation.md").write_text(report, encoding="utf-8")
+    region = state.groupby(["date_dt", "region", "industry"], as_index=False, observed=True).agg(
+        value=("value", "mean"), reference=("reference", "first")
+    )
+    region["chart"] = "region/" + _slug(region["region"]) + "-" + _slug(region["industry"])
+    region["title"] = region["region"].astype(str) + ": " + region["industry"].astype(str) + " (YoY % vs US avg)"
+
+    frame = pd.concat([ind[cols], region[cols], state[cols]], ignore_index=True)
+    return frame.sort_values(["chart", "date_dt"], ignore_index=True)
+
+
+def _render_fanout_batch(charts: list[tuple], out_dir: Path) -> list[tuple[str, float]]:
+    """Render a batch of charts on one shared template figure, swapping only the line data."""
+    fig = Figure(figsize=(4, 2.5))
+    FigureCanvasAgg(fig)
+    fig.subplots_adjust(left=0.14, right=0.97, top=0.88, bottom=0.14)
+    ax = fig.add_subplot()
+    series, = ax.plot([], [], color="#1f77b4", linewidth=1.5, label="YoY %")
+    reference, = ax.plot([], [], color="#999999", linewidth=1, linestyle="--", label="Benchmark")
+    ax.axhline(0, color="#cccccc", linewidth=0.8)
+    ax.xaxis_date()
+    ax.tick_params(labelsize=6)
+    ax.legend(loc="upper left", fontsize=6, frameon=False)
+    title = ax.set_title("", fontsize=8)
+
+    timings = []
+    for chart, chart_title, x, value, ref, input_hash in charts:
+        start = time.perf_counter()
+        series.set_data(x, value)
+        reference.set_data(x, ref)
+        title.set_text(chart_title)
+        ax.relim()
+        ax.autoscale_view()
+        path = out_dir / f"{chart}.png"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fig.savefig(path, dpi=100, metadata={FIG_HASH_KEY: input_hash})
+        timings.append((chart, time.perf_counter() - start))
+    return timings
+
+
+def _fanout_figures(
+    metrics: dict[str, pd.DataFrame], jobs: int = 1, out_dir: Path | None = None, batch_size: int = FANOUT_BATCH
+) -> pd.DataFrame:
+    """Render per-industry, per-region and per-state small multiples; returns per-chart timings.
+
+    Charts whose stored input hash matches are skipped; the rest are rendered in
+    batches (one template figure per batch) across a process pool.
+    """
+    out_dir = out_dir or FANOUT_DIR
+    frame = _fanout_frame(metrics)
+    template = inspect.getsource(_render_fanout_batch).encode()
+
+    todo, rows = [], []
+    for chart, g in frame.groupby("chart", sort=False):
+        x = mdates.date2num(g["date_dt"].to_numpy())
+        value, ref = g["value"].to_numpy(dtype=float), g["reference"].to_numpy(dtype=float)
+        h = hashlib.sha256(template + matplotlib.__version__.encode() + g["title"].iat[0].encode())
+        for arr in (x, value, ref):
+            h.update(arr.tobytes())
+        input_hash = h.hexdigest()
+        if _rendered_hash(out_dir / f"{chart}.png") == input_hash:
+            rows.append((chart, 0.0, "skipped"))
+        else:
+            todo.append((chart, g["title"].iat[0], x, value, ref, input_hash))
+
+    batches = [todo[i : i + batch_size] for i in range(0, len(todo), batch_size)]
+    if jobs > 1 and len(batches) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(batches))) as pool:
+            results = list(pool.map(_render_fanout_batch, batches, [out_dir] * len(batches)))
+    else:
+        results = [_render_fanout_batch(batch, out_dir) for batch in batches]
+    rows += [(chart, seconds, "rendered") for timings in results for chart, seconds in timings]
+
+    timings = pd.DataFrame(rows, columns=["chart", "seconds", "status"]).sort_values("chart", ignore_index=True)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    timings.to_csv(out_dir / "timings.csv", index=False)
+    return timings
+
+
+def report(
+    mtrs: pd.DataFrame,
+    msrs: pd.DataFrame,
+    rank_index: pd.DataFrame | None,
+    date_start: str | None,
+    date_end: str | None,
+    jobs: int = 1,
+    fan_out: bool = False,
+    industries: Sequence[str] | None = None,
+    fact_paths: tuple[Path, Path] | None = None,
+    out_dir: Path | None = None,
+) -> None:
+    """Write the validation doc, metrics snapshot and figures from already-loaded facts.
+
+    The frames may start up to ``HISTORY_MONTHS`` before ``date_start`` (the YoY
+    base); only the window is validated and reported. With ``fact_paths`` the
+    validation scans (and caches) the fact files instead of the frames. ``out_dir``
+    replaces ``docs/`` (figures go to ``<out_dir>/figures``).
+    """
+    docs_dir = out_dir or DOCS_DIR
+    fig_dir = FIG_DIR if out_dir is None else out_dir / "figures"
+    fanout_dir = FANOUT_DIR if out_dir is None else fig_dir / "fanout"
 
-    # Metrics snapshot
-    snapshot = _metrics_snapshot(mtrs, msrs)
-    snapshot_path = DOCS_DIR / "metrics_snapshot.csv"
-    snapshot.to_csv(snapshot_path, index=False)
+    # Data validation doc
+    with step("generate_reports", "data_validation") as s:
+        s.rows_in = len(mtrs) + len(msrs)
+        sources = fact_paths or (_in_window(mtrs, date_start), _in_window(msrs, date_start))
+        validation = _data_validation(*sources, date_start, date_end, industries)
+        docs_dir.mkdir(parents=True, exist_ok=True)
+        (docs_dir / "data_validation.md").write_text(validation, encoding="utf-8")
+        s.wrote(docs_dir / "data_validation.md")
+
+    # Metrics snapshot (aggregates shared with the figures)
+    with step("generate_reports", "metrics") as s:
+        s.rows_in = len(mtrs) + len(msrs)
+        metrics = _compute_metrics(mtrs, msrs, rank_index=rank_index, date_start=date_start)
+        snapshot = _metrics_snapshot(metrics)
+        snapshot_path = docs_dir / "metrics_snapshot.csv"
+        snapshot.to_csv(snapshot_path, index=False)
+        s.rows_out = len(snapshot)
+        s.wrote(snapshot_path)
 
     # Figures
-    _figures(mtrs, msrs)
+    with step("generate_reports", "figures") as s:
+        rendered = _figures(metrics, jobs=jobs, fig_dir=fig_dir)
+        s.wrote(*(fig_dir / name for name in rendered))
+        s.extra["figures_rendered"] = len(rendered)
 
-    print(f"wrote {DOCS_DIR / 'data_validation.md'}")
+    print(f"wrote {docs_dir / 'data_validation.md'}")
     print(f"wrote {snapshot_path}")
-    print(f"wrote figures to {FIG_DIR}")
+    print(f"wrote {len(rendered)} of {len(FIGURES)} figures to {fig_dir} (others unchanged)")
+
+    if fan_out:
+        with step("generate_reports", "fanout") as s:
+            timings = _fanout_figures(metrics, jobs=jobs, out_dir=fanout_dir)
+            done = timings[timings["status"] == "rendered"]
+            s.wrote(*(fanout_dir / f"{chart}.png" for chart in done["chart"]))
+            s.extra["charts_rendered"] = len(done)
+        print(
+            f"wrote {len(done)} of {len(timings)} fan-out charts to {fanout_dir} "
+            f"({done['seconds'].sum():.2f}s drawing, {done['seconds'].mean() if len(done) else 0:.3f}s/chart)"
+        )
+
+
+@instrumented("generate_reports", "main")
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate validation doc, metrics snapshot and figures.")
+    parser.add_argument(
+        "--start", type=month_bound, default=DATE_START, help="first month (YYYY-MM) to report on (default: all)"
+    )
+    parser.add_argument(
+        "--end", type=month_bound, default=DATE_END, help="last month (YYYY-MM) to report on (default: all)"
+    )
+    parser.add_argument("--industry", action="append", help="restrict to this industry (repeatable)")
+    parser.add_argument("--jobs", type=int, default=1, help="render figures in this many worker processes")
+    parser.add_argument(
+        "--fan-out",
+        action="store_true",
+        help="also render per-industry, per-region and per-state small multiples into docs/figures/fanout/",
+    )
+    parser.add_argument(
+        "--catalog",
+        nargs="?",
+        type=Path,
+        const=REPO_ROOT / "data" / "catalog.duckdb",
+        help="read the facts and rank index from the persistent DuckDB catalog (default data/catalog.duckdb)",
+    )
+    parser.add_argument(
+        "--out-dir",
+        type=Path,
+        help="write the report here instead of docs/ (filtered runs default to docs/reports/<window>/)",
+    )
+    args = parser.parse_args(argv)
+    filtered = (args.start, args.end, args.industry) != (DATE_START, DATE_END, None)
+    out_dir = args.out_dir or (_window_dir(args.start, args.end, args.industry) if filtered else None)
+    load_start = _history_start(args.start)
+
+    fact_paths = (
+        PROCESSED_DIR / "fact_national_retail_sales.parquet",
+        PROCESSED_DIR / "fact_state_retail_growth.parquet",
+    )
+    with step("generate_reports", "load") as s:
+        if args.catalog:
+            try:
+                mtrs, msrs, rank_index = _load_catalog(args.catalog, load_start, args.end, args.industry)
+            except RuntimeError as exc:
+                parser.error(str(exc))
+            s.read(args.catalog)
+            fact_paths = None  # validate the loaded frames, not the Parquet files
+        else:
+            mtrs, msrs = _load(load_start, args.end, args.industry)
+            s.read(*(resolve(p) for p in fact_paths))
+            # The rank index covers every industry, so an industry-filtered report ranks its own subset.
+            rank_index = None if args.industry else _load_rank_index(args.start, args.end)
+            if rank_index is not None:
+                s.read(MARTS_DIR / f"{RANK_INDEX}.parquet")
+        s.rows_out = len(mtrs) + len(msrs)
+    # Without national rows there is no report to draw; a missing state series is reported as NaN.
+    if _in_window(mtrs, args.start).empty:
+        parser.error("no national sales rows match --start/--end/--industry")
+
+    report(
+        mtrs,
+        msrs,
+        rank_index,
+        args.start,
+        args.end,
+        jobs=args.jobs,
+        fan_out=args.fan_out,
+        industries=args.industry,
+        fact_paths=fact_paths,
+        out_dir=out_dir,
+    )
     return 0
 
 
@@ -0,0 +1,200 @@
+"""Dense date x state x industry cube of the state growth fact, for vectorized slicing.
+
+The long ``fact_state_retail_growth`` table becomes one array of YoY % (NaN where a
+state/industry/month has no value) plus the labels of each axis::
+
+    cube = load_cube()                             # built once per fact file, then memory-mapped
+    cube.sel(industry="General Merchandise")       # (date, state) view, no copy
+    cube.sel(date=["2024-11", "2024-12"], state="CA")
+    cube.topn_shares((5, 10))                      # (date, N) top-N share of positive growth, %
+    cube.region_sums(cube.positive(cube.all_industries()))   # (date, region)
+
+``load_cube`` caches the cube under ``data/cache/growth_cube/`` as ``values.npy``
+(float32 by default) and ``index.json`` (axis labels and the state -> region map),
+keyed by the fact file's size/mtime, and memory-maps the array on later loads.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import shutil
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+from typing import Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from fact_store import read_fact, resolve
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+FACT_PATH = REPO_ROOT / "data" / "processed" / "fact_state_retail_growth.parquet"
+CACHE_DIR = REPO_ROOT / "data" / "cache" / "growth_cube"
+
+AXES = ("date", "state", "industry")
+DTYPE = np.float32
+
+Labels = Union[str, Sequence[str], None]
+
+
+def _factorize(values: pd.Series) -> tuple[np.ndarray, tuple[str, ...]]:
+    """Codes into the sorted labels that occur (unused categories are dropped)."""
+    codes, uniques = pd.factorize(values, sort=True)
+    return codes, tuple(str(u) for u in np.asarray(uniques, dtype=object))
+
+
+@dataclass(frozen=True, eq=False)
+class GrowthCube:
+    values: np.ndarray  # (date, state, industry) YoY %, NaN where missing
+    dates: tuple[str, ...]
+    states: tuple[str, ...]
+    industries: tuple[str, ...]
+    regions: tuple[str, ...]
+    state_region: np.ndarray  # (state,) code into ``regions``, -1 when unmapped
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, dtype=DTYPE) -> "GrowthCube":
+        """Scatter a state growth fact frame into the cube (one vectorized assignment)."""
+        date_codes, dates = _factorize(df["date"])
+        state_codes, states = _factorize(df["state"])
+        industry_codes, industries = _factorize(df["industry"])
+        region_codes, regions = _factorize(df["region"])
+
+        keep = (date_codes >= 0) & (state_codes >= 0) & (industry_codes >= 0)
+        values = np.full((len(dates), len(states), len(industries)), np.nan, dtype=dtype)
+        values[date_codes[keep], state_codes[keep], industry_codes[keep]] = df["yoy_pct"].to_numpy(dtype=dtype)[keep]
+
+        state_region = np.full(len(states), -1, dtype=np.int16)
+        state_region[state_codes[keep]] = region_codes[keep]
+        return cls(values, dates, states, industries, regions, state_region)
+
+    @property
+    def mask(self) -> np.ndarray:
+        """True where the cube holds a value."""
+        return ~np.isnan(self.values)
+
+    @cached_property
+    def _positions(self) -> dict[str, dict[str, int]]:
+        labels = {"date": self.dates, "state": self.states, "industry": self.industries}
+        return {axis: {label: i for i, label in enumerate(labels[axis])} for axis in AXES}
+
+    def _index(self, axis: str, labels: Labels):
+        if labels is None:
+            return slice(None)
+        try:
+            if isinstance(labels, str):
+                return self._positions[axis][labels]
+            return np.array([self._positions[axis][label] for label in labels], dtype=np.intp)
+        except KeyError as exc:
+            raise KeyError(f"unknown {axis}: {exc.args[0]}") from None
+
+    def sel(self, date: Labels = None, state: Labels = None, industry: Labels = None) -> np.ndarray:
+        """Slice by label on any axis; a single label drops that axis, a list keeps it (in list order).
+
+        Without lists the result is a view of the (possibly memory-mapped) array.
+        """
+        index = [self._index(axis, labels) for axis, labels in zip(AXES, (date, state, industry))]
+        if not any(isinstance(i, np.ndarray) for i in index):
+            return self.values[tuple(index)]
+        # Outer selection: take the listed axes one at a time, last axis first so
+        # earlier axis numbers stay valid when a scalar drops an axis.
+        out = self.values
+        for axis in reversed(range(len(AXES))):
+            if not isinstance(index[axis], slice):
+                out = np.take(out, index[axis], axis=axis)
+        return out
+
+    def all_industries(self, values: np.ndarray | None = None) -> np.ndarray:
+        """(date, state) unweighted mean across industries, NaN where a state has no value."""
+        values = self.values if values is None else values
+        present = ~np.isnan(values)
+        count = present.sum(axis=-1)
+        total = np.where(present, values, 0).sum(axis=-1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(count > 0, total / count, np.nan).astype(values.dtype, copy=False)
+
+    @staticmethod
+    def positive(values: np.ndarray) -> np.ndarray:
+        """Positive-only growth, ``max(yoy, 0)``; missing values count as no growth."""
+        return np.clip(np.nan_to_num(values, nan=0.0), 0, None)
+
+    def topn_shares(self, ns: Sequence[int], industry: str | None = None) -> np.ndarray:
+        """(date, len(ns)) share in % of positive growth held by the top-N states per month.
+
+        Uses the all-industry mean unless ``industry`` is given. Months without
+        positive growth are NaN.
+        """
+        growth = self.all_industries() if industry is None else self.sel(industry=industry)
+        ranked = -np.sort(-self.positive(growth), axis=1)
+        cumulative = np.cumsum(ranked, axis=1, dtype=np.float64)
+        total = cumulative[:, -1] if cumulative.shape[1] else np.zeros(len(cumulative))
+        top = cumulative[:, np.minimum(np.asarray(ns), cumulative.shape[1]) - 1]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return top / np.where(total != 0, total, np.nan)[:, None] * 100
+
+    def region_sums(self, values: np.ndarray) -> np.ndarray:
+        """Sum a ``(date, state[, ...])`` array over the states of each region -> ``(date, region[, ...])``."""
+        members = (self.state_region[:, None] == np.arange(len(self.regions))).astype(values.dtype)
+        return np.moveaxis(np.tensordot(np.nan_to_num(values), members, axes=([1], [0])), -1, 1)
+
+    def save(self, path: Path) -> Path:
+        """Write ``values.npy`` and ``index.json`` into the directory ``path`` (replaced atomically)."""
+        tmp = path.with_name(f".{path.name}.tmp")
+        if tmp.exists():
+            shutil.rmtree(tmp)
+        tmp.mkdir(parents=True)
+        np.save(tmp / "values.npy", self.values)
+        index = {
+            "dates": self.dates,
+            "states": self.states,
+            "industries": self.industries,
+            "regions": self.regions,
+            "state_region": self.state_region.tolist(),
+        }
+        (tmp / "index.json").write_text(json.dumps(index), encoding="utf-8")
+        if path.exists():
+            shutil.rmtree(path)
+        tmp.rename(path)
+        return path
+
+    @classmethod
+    def load(cls, path: Path, mmap: bool = True) -> "GrowthCube":
+        index = json.loads((path / "index.json").read_text(encoding="utf-8"))
+        values = np.load(path / "values.npy", mmap_mode="r" if mmap else None)
+        return cls(
+            values,
+            tuple(index["dates"]),
+            tuple(index["states"]),
+            tuple(index["industries"]),
+            tuple(index["regions"]),
+            np.asarray(index["state_region"], dtype=np.int16),
+        )
+
+
+def _fingerprint(path: Path, dtype) -> str:
+    source = resolve(path)
+    files = sorted(source.rglob("*.parquet")) if source.is_dir() else [source]
+    h = hashlib.sha256(f"{np.dtype(dtype).str}\n".encode())
+    for f in files:
+        st = f.stat()
+        h.update(f"{f}:{st.st_size}:{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+def load_cube(path: Path = FACT_PATH, use_cache: bool = True, dtype=DTYPE) -> GrowthCube:
+    """The cube of a state growth fact file, built once per file version and memory-mapped after."""
+    if not resolve(path).exists():
+        raise FileNotFoundError(f"missing fact table: {path}")
+    if not use_cache:
+        return GrowthCube.from_frame(read_fact(path, columns=["date", "state", "region", "industry", "yoy_pct"]), dtype)
+
+    cube_dir = CACHE_DIR / f"{path.stem}-{_fingerprint(path, dtype)[:16]}"
+    if not (cube_dir / "index.json").exists():
+        cube = GrowthCube.from_frame(read_fact(path, columns=["date", "state", "region", "industry", "yoy_pct"]), dtype)
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Older versions of this fact are dropped.
+        for stale in CACHE_DIR.glob(f"{path.stem}-*"):
+            shutil.rmtree(stale, ignore_errors=True)
+        cube.save(cube_dir)
+    return GrowthCube.load(cube_dir)
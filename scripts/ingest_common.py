@@ -0,0 +1,161 @@
+"""Shared download logic for the ingest scripts.
+
+Downloads are recorded in a per-directory manifest (``.manifest.json``) with the
+URL, ETag, Last-Modified, size and sha256 of each file. Subsequent runs send
+conditional requests so unchanged files come back as 304, interrupted transfers
+resume from the ``.<name>.part`` file with a Range request, and completed files
+are moved into place atomically.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Iterable
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+MANIFEST_NAME = ".manifest.json"
+CHUNK_SIZE = 1024 * 1024
+TIMEOUT = 60
+
+
+def filename_from_url(url: str) -> str:
+    parsed = urlparse(url)
+    name = Path(parsed.path).name
+    return name or "download.bin"
+
+
+def make_session(pool_size: int = 4) -> requests.Session:
+    """A Session with pooled keep-alive connections and retries on transient errors."""
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=1, status_forcelist=(429, 500, 502, 503, 504), allowed_methods=("GET",))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def load_manifest(raw_dir: Path) -> dict:
+    path = raw_dir / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_manifest(raw_dir: Path, manifest: dict) -> None:
+    raw_dir.mkdir(parents=True, exist_ok=True)
+    tmp = raw_dir / f"{MANIFEST_NAME}.tmp"
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, raw_dir / MANIFEST_NAME)
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _validators(resp: requests.Response) -> dict:
+    return {"etag": resp.headers.get("ETag"), "last_modified": resp.headers.get("Last-Modified")}
+
+
+def _resumes_at(r: requests.Response, headers: dict, offset: int) -> bool:
+    """Whether a 206 continues the ``.part`` file: we sent a Range and it starts at ``offset``."""
+    return "Range" in headers and r.headers.get("Content-Range", "").startswith(f"bytes {offset}-")
+
+
+def download(session: requests.Session, url: str, dest: Path, manifest: dict) -> bool:
+    """Fetch ``url`` into ``dest`` and update ``manifest`` in place.
+
+    Returns True when ``dest`` now holds different bytes than before.
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    part = dest.with_name(f".{dest.name}.part")
+    entry = manifest.get(url, {})
+
+    headers = {}
+    if dest.exists() and entry.get("sha256"):
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    partial = entry.get("partial") or {}
+    offset = part.stat().st_size if part.exists() else 0
+    if offset and (partial.get("etag") or partial.get("last_modified")):
+        headers["Range"] = f"bytes={offset}-"
+        headers["If-Range"] = partial.get("etag") or partial["last_modified"]
+    else:
+        offset = 0
+
+    r = session.get(url, headers=headers, stream=True, timeout=TIMEOUT)
+    if r.status_code == 206 and not _resumes_at(r, headers, offset):
+        # A range we did not ask for: drop the partial file and fetch the whole body.
+        r.close()
+        part.unlink(missing_ok=True)
+        headers = {k: v for k, v in headers.items() if k not in ("Range", "If-Range")}
+        offset = 0
+        r = session.get(url, headers=headers, stream=True, timeout=TIMEOUT)
+        if r.status_code == 206:
+            r.close()
+            raise RuntimeError(f"{url}: partial response to a request without Range")
+
+    with r:
+        if r.status_code == 304:
+            part.unlink(missing_ok=True)
+            entry.pop("partial", None)
+            manifest[url] = entry
+            save_manifest(dest.parent, manifest)
+            print(f"unchanged {dest} (304)")
+            return False
+        r.raise_for_status()
+
+        if r.status_code != 206:
+            offset = 0
+
+        # Record the validators before streaming so an interrupted transfer can resume.
+        entry["partial"] = _validators(r)
+        manifest[url] = entry
+        save_manifest(dest.parent, manifest)
+
+        with part.open("ab" if offset else "wb") as f:
+            for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+                if chunk:
+                    f.write(chunk)
+
+    sha = _sha256(part)
+    changed = not dest.exists() or sha != entry.get("sha256")
+    if changed:
+        os.replace(part, dest)
+    else:
+        part.unlink()
+
+    manifest[url] = {"url": url, **entry["partial"], "size": dest.stat().st_size, "sha256": sha}
+    save_manifest(dest.parent, manifest)
+    action = "resumed" if offset else "saved"
+    print(f"{action} {dest} sha256={sha}" if changed else f"unchanged {dest} sha256={sha}")
+    return changed
+
+
+def download_all(urls: Iterable[str], raw_dir: Path, session: requests.Session | None = None) -> list[Path]:
+    """Download every URL into ``raw_dir`` over one pooled session; returns the changed files."""
+    own_session = session is None
+    session = session or make_session()
+    manifest = load_manifest(raw_dir)
+    changed = []
+    try:
+        for url in urls:
+            dest = raw_dir / filename_from_url(url)
+            if download(session, url, dest, manifest):
+                changed.append(dest)
+    finally:
+        if own_session:
+            session.close()
+    return changed
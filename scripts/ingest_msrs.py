@@ -2,39 +2,18 @@
 """Download MSRS files listed in config/data_sources.yaml (no scraping)."""
 from __future__ import annotations
 
-import hashlib
 import sys
 from pathlib import Path
-from urllib.parse import urlparse
 
-import requests
 import yaml
 
+from ingest_common import download_all
+
 REPO_ROOT = Path(__file__).resolve().parents[1]
 CONFIG_PATH = REPO_ROOT / "config" / "data_sources.yaml"
 RAW_DIR = REPO_ROOT / "data" / "raw" / "msrs"
 
 
-def _filename_from_url(url: str) -> str:
-    parsed = urlparse(url)
-    name = Path(parsed.path).name
-    return name or "download.bin"
-
-
-def _download(url: str, dest: Path) -> None:
-    dest.parent.mkdir(parents=True, exist_ok=True)
-    with requests.get(url, stream=True, timeout=60) as r:
-        r.raise_for_status()
-        h = hashlib.sha256()
-        with dest.open("wb") as f:
-            for chunk in r.iter_content(chunk_size=1024 * 1024):
-                if not chunk:
-                    continue
-                f.write(chunk)
-                h.update(chunk)
-    print(f"saved {dest} sha256={h.hexdigest()}")
-
-
 def main() -> int:
     if not CONFIG_PATH.exists():
         print(f"missing config: {CONFIG_PATH}", file=sys.stderr)
@@ -47,11 +26,7 @@ def main() -> int:
         print("No MSRS file URLs configured. Add URLs under msrs_state_growth.files in config/data_sources.yaml.")
         return 1
 
-    for url in files:
-        filename = _filename_from_url(url)
-        dest = RAW_DIR / filename
-        _download(url, dest)
-
+    download_all(files, RAW_DIR)
     return 0
 
 
@@ -0,0 +1,218 @@
+"""Step-level timing and resource instrumentation for the pipeline scripts.
+
+Wrap a unit of work in ``step(stage, name)`` (or decorate it with
+``instrumented``) and one JSON line is appended to the run log when it ends::
+
+    {"run_id": ..., "stage": "transform_fact_tables", "step": "load_msrs", "status": "ok",
+     "wall_s": 1.84, "cpu_s": 1.79, "process_peak_rss_mb": 412.0, "process_peak_rss_growth_mb": 96.5,
+     "rows_in": 216000, "rows_out": 18360, "bytes_read": 1482210, "bytes_written": 0, ...}
+
+Code running inside a step reports rows and I/O on ``current()``; ``read``/``wrote``
+count the files (or directories) they are given, so callers pass the paths they
+actually touched. ``process_peak_rss_mb`` is the process's high-water mark
+(``ru_maxrss``), not the step's own peak: ``process_peak_rss_growth_mb`` is how
+far the step raised it, and ``PIPELINE_PROFILE=tracemalloc`` measures a step's
+own Python allocations. Steps started
+by stages that ``run_pipeline.py`` launches share its ``PIPELINE_RUN_ID``.
+
+Environment:
+
+- ``PIPELINE_RUN_LOG``: log path (default ``data/cache/run_log.jsonl``); ``off`` disables.
+- ``PIPELINE_PROFILE``: ``cprofile`` and/or ``tracemalloc`` (comma-separated) to
+  profile matching steps; cProfile stats go to ``data/cache/profiles/``.
+- ``PIPELINE_PROFILE_STEP``: ``stage.step`` glob selecting the profiled steps
+  (default ``*.main``, i.e. whole stages).
+"""
+from __future__ import annotations
+
+import cProfile
+import fnmatch
+import functools
+import json
+import os
+import socket
+import sys
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+RUN_LOG_PATH = REPO_ROOT / "data" / "cache" / "run_log.jsonl"
+PROFILE_DIR = REPO_ROOT / "data" / "cache" / "profiles"
+DEFAULT_PROFILE_STEP = "*.main"
+TRACEMALLOC_TOP = 10
+
+_active: ContextVar[tuple] = ContextVar("instrument_active", default=())
+_profiling = False  # cProfile cannot nest; only the outermost matching step is profiled
+
+
+class Step:
+    """Counters for one instrumented step; code inside the step updates them."""
+
+    def __init__(self, stage: str, name: str):
+        self.stage = stage
+        self.name = name
+        self.rows_in: int | None = None
+        self.rows_out: int | None = None
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.extra: dict = {}
+
+    def read(self, *paths: Path) -> None:
+        self.bytes_read += sum(_size(p) for p in paths)
+
+    def wrote(self, *paths: Path) -> None:
+        self.bytes_written += sum(_size(p) for p in paths)
+
+    def add_rows_in(self, n: int) -> None:
+        self.rows_in = (self.rows_in or 0) + int(n)
+
+
+def _size(path: Path) -> int:
+    path = Path(path)
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+    return path.stat().st_size if path.exists() else 0
+
+
+def _process_peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def new_run_id() -> str:
+    return f"{datetime.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}"
+
+
+def run_id() -> str:
+    """The id shared by every step of this pipeline run (inherited by child processes)."""
+    rid = os.environ.get("PIPELINE_RUN_ID")
+    if not rid:
+        rid = os.environ["PIPELINE_RUN_ID"] = new_run_id()
+    return rid
+
+
+def current() -> Step:
+    """The innermost active step, or a detached one when running uninstrumented."""
+    stack = _active.get()
+    return stack[-1] if stack else Step("", "")
+
+
+def _log_path() -> Path | None:
+    value = os.environ.get("PIPELINE_RUN_LOG", "")
+    if value.lower() == "off":
+        return None
+    return Path(value) if value else RUN_LOG_PATH
+
+
+def _emit(record: dict) -> None:
+    path = _log_path()
+    if path is None:
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # One write per line keeps appends from worker processes intact.
+    with path.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(record, default=str) + "\n")
+
+
+def _profilers(stage: str, name: str) -> set[str]:
+    wanted = {p.strip().lower() for p in os.environ.get("PIPELINE_PROFILE", "").split(",") if p.strip()}
+    pattern = os.environ.get("PIPELINE_PROFILE_STEP") or DEFAULT_PROFILE_STEP
+    return wanted if wanted and fnmatch.fnmatch(f"{stage}.{name}", pattern) else set()
+
+
+@contextmanager
+def step(stage: str, name: str) -> Iterator[Step]:
+    """Time a unit of work and append its record to the run log."""
+    global _profiling
+
+    rid = run_id()  # set before any worker processes are started inside the step
+    record = Step(stage, name)
+    token = _active.set(_active.get() + (record,))
+    profilers = _profilers(stage, name)
+
+    profiler = None
+    if "cprofile" in profilers and not _profiling:
+        profiler, _profiling = cProfile.Profile(), True
+    own_trace = "tracemalloc" in profilers and not tracemalloc.is_tracing()
+    if own_trace:
+        tracemalloc.start()
+
+    started = datetime.now(timezone.utc)
+    rss_before = _process_peak_rss_mb()
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    status = "ok"
+    if profiler:
+        profiler.enable()
+    try:
+        yield record
+    except BaseException as exc:
+        status = f"error: {type(exc).__name__}"
+        raise
+    finally:
+        if profiler:
+            profiler.disable()
+        wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+        rss_after = _process_peak_rss_mb()
+        _active.reset(token)
+
+        out = {
+            "run_id": rid,
+            "stage": stage,
+            "step": name,
+            "status": status,
+            "started": started.isoformat(timespec="milliseconds"),
+            "wall_s": round(wall, 4),
+            "cpu_s": round(cpu, 4),
+            "process_peak_rss_mb": None if rss_after is None else round(rss_after, 1),
+            "process_peak_rss_growth_mb": None if rss_after is None else round(rss_after - rss_before, 1),
+            "rows_in": record.rows_in,
+            "rows_out": record.rows_out,
+            "bytes_read": record.bytes_read,
+            "bytes_written": record.bytes_written,
+            "pid": os.getpid(),
+            "host": socket.gethostname(),
+            **record.extra,
+        }
+        if own_trace:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            out["tracemalloc_peak_mb"] = round(peak / 1024**2, 1)
+            out["tracemalloc_top"] = [
+                {"where": str(stat.traceback[0]), "kib": round(stat.size / 1024, 1)}
+                for stat in snapshot.statistics("lineno")[:TRACEMALLOC_TOP]
+            ]
+        if profiler:
+            _profiling = False
+            PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+            prof_path = PROFILE_DIR / f"{out['run_id']}-{stage}-{name}-{os.getpid()}.prof"
+            profiler.dump_stats(prof_path)
+            out["profile"] = str(prof_path)
+        _emit(out)
+
+
+def instrumented(stage: str, name: str | None = None):
+    """Decorator form of ``step``; records ``len(result)`` as rows_out when unset."""
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with step(stage, name or fn.__name__) as s:
+                result = fn(*args, **kwargs)
+                if s.rows_out is None and hasattr(result, "__len__") and hasattr(result, "columns"):
+                    s.rows_out = len(result)
+                return result
+
+        return wrapper
+
+    return decorate
@@ -0,0 +1,105 @@
+"""Publish the CSV copies of Parquet outputs on background threads.
+
+Stages write their Parquet output on the critical path and queue the CSV with
+``publish_csv``. A small thread pool writes it with DuckDB ``COPY`` (the same
+bytes ``DataFrame.to_csv`` produced, several times faster) into a hidden temp
+file next to the target and renames it into place, so readers never see a
+partial CSV. With ``PIPELINE_PUBLISH_GZIP=1`` the published file is
+``<name>.csv.gz`` instead, and the other variant is removed.
+
+Call ``flush()`` before exiting: it waits for the queued writes and re-raises
+the first failure.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Sequence, Union
+
+import duckdb
+import pyarrow as pa
+
+from instrument import step
+
+PUBLISH_THREADS = 2
+GZIP_ENV = "PIPELINE_PUBLISH_GZIP"
+
+Source = Union[pa.Table, Path]
+
+_pool: ThreadPoolExecutor | None = None
+_pending: list[Future] = []
+_lock = threading.Lock()
+
+
+def gzip_enabled() -> bool:
+    return os.environ.get(GZIP_ENV, "").lower() in {"1", "true", "yes", "on"}
+
+
+def csv_path(published_dir: Path, name: str) -> Path:
+    """Where ``name`` is published: ``<name>.csv``, or ``<name>.csv.gz`` with gzip enabled."""
+    return published_dir / f"{name}.csv{'.gz' if gzip_enabled() else ''}"
+
+
+def _sql_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def write_csv(source: Source, path: Path, exclude: Sequence[str] = ()) -> Path:
+    """Write an Arrow table or Parquet file as CSV at ``path`` (gzip for ``.gz``), atomically."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    columns = f"* EXCLUDE ({', '.join(exclude)})" if exclude else "*"
+    compression = "gzip" if path.suffix == ".gz" else "none"
+
+    con = duckdb.connect()
+    try:
+        if isinstance(source, pa.Table):
+            con.register("source", source)
+            relation = "source"
+        else:
+            relation = f"read_parquet({_sql_literal(Path(source).as_posix())})"
+        con.execute(
+            f"COPY (SELECT {columns} FROM {relation}) TO {_sql_literal(tmp.as_posix())} "
+            f"(FORMAT CSV, HEADER, COMPRESSION {compression})"
+        )
+    finally:
+        con.close()
+
+    tmp.replace(path)
+    stale = path.with_suffix("") if path.suffix == ".gz" else path.with_name(f"{path.name}.gz")
+    if stale.exists():
+        stale.unlink()
+    return path
+
+
+def _publish(source: Source, path: Path, stage: str, exclude: Sequence[str]) -> Path:
+    with step(stage, f"publish_{path.name.split('.')[0]}") as s:
+        if isinstance(source, pa.Table):
+            s.rows_in = source.num_rows
+        else:
+            s.read(source)
+        write_csv(source, path, exclude)
+        s.wrote(path)
+    print(f"wrote {path}")
+    return path
+
+
+def publish_csv(source: Source, path: Path, stage: str, exclude: Sequence[str] = ()) -> Future:
+    """Queue a CSV copy of ``source`` at ``path`` on the publishing threads."""
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=PUBLISH_THREADS, thread_name_prefix="publish")
+        future = _pool.submit(_publish, source, path, stage, tuple(exclude))
+        _pending.append(future)
+    return future
+
+
+def flush() -> list[Path]:
+    """Wait for every queued CSV; re-raises the first failure."""
+    with _lock:
+        pending = list(_pending)
+        _pending.clear()
+    return [future.result() for future in pending]
@@ -0,0 +1,342 @@
+#!/usr/bin/env python
+"""Run the pipeline stages in dependency order, skipping stages whose inputs are unchanged.
+
+Each stage declares the files/directories it reads and writes. Before a stage
+runs, its inputs (including its own script) are fingerprinted by content; if the
+fingerprint matches the last successful run and all outputs exist, the stage is
+skipped. Ingest stages talk to census.gov and always run unless --offline.
+Independent stages (the two ingests) run concurrently; reports wait for the marts
+because they read the growth rank index mart.
+
+``--in-process`` rebuilds transform -> marts -> reports in this process instead:
+the fact frames become Arrow tables that DuckDB scans for the marts and the
+reports read directly, and every Parquet/CSV output is written by background
+threads while later stages run.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Sequence
+
+from fact_store import fact_frame, resolve, to_arrow
+from instrument import new_run_id, run_id as current_run_id, step
+from publish import csv_path, flush
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS_DIR = REPO_ROOT / "scripts"
+STATE_PATH = REPO_ROOT / "data" / "cache" / "pipeline_state.json"
+
+CONFIG_PATH = REPO_ROOT / "config" / "data_sources.yaml"
+RAW_MTRS_DIR = REPO_ROOT / "data" / "raw" / "mtrs"
+RAW_MSRS_DIR = REPO_ROOT / "data" / "raw" / "msrs"
+REFERENCE_DIR = REPO_ROOT / "data" / "reference"
+PROCESSED_DIR = REPO_ROOT / "data" / "processed"
+MARTS_DIR = REPO_ROOT / "data" / "marts"
+PUBLISHED_DIR = REPO_ROOT / "data" / "published"
+SQL_DIR = REPO_ROOT / "sql"
+DOCS_DIR = REPO_ROOT / "docs"
+
+FACTS = [
+    PROCESSED_DIR / "fact_national_retail_sales.parquet",
+    PROCESSED_DIR / "fact_state_retail_growth.parquet",
+]
+# Shared modules imported by the stage scripts.
+FACT_STORE = SCRIPTS_DIR / "fact_store.py"
+INSTRUMENT = SCRIPTS_DIR / "instrument.py"
+PUBLISH = SCRIPTS_DIR / "publish.py"
+VALIDATION = SCRIPTS_DIR / "validation.py"
+GROWTH_CUBE = SCRIPTS_DIR / "growth_cube.py"
+
+RANK_INDEX = MARTS_DIR / "marts_growth_rank_index.parquet"
+# Background threads writing fact/mart files during an in-process run.
+WRITER_THREADS = 2
+
+MARTS = [
+    MARTS_DIR / "marts_market_trends.parquet",
+    RANK_INDEX,
+    MARTS_DIR / "marts_growth_contribution.parquet",
+    MARTS_DIR / "marts_growth_rollup.parquet",
+]
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    script: Path
+    inputs: tuple[Path, ...]
+    outputs: tuple[Path, ...]
+    deps: tuple[str, ...] = ()
+    remote: bool = False
+    parallel: bool = False  # script accepts --jobs
+
+
+STAGES = [
+    Stage(
+        "ingest_mtrs",
+        SCRIPTS_DIR / "ingest_mtrs.py",
+        inputs=(CONFIG_PATH,),
+        outputs=(RAW_MTRS_DIR,),
+        remote=True,
+    ),
+    Stage(
+        "ingest_msrs",
+        SCRIPTS_DIR / "ingest_msrs.py",
+        inputs=(CONFIG_PATH,),
+        outputs=(RAW_MSRS_DIR,),
+        remote=True,
+    ),
+    Stage(
+        "transform_fact_tables",
+        SCRIPTS_DIR / "transform_fact_tables.py",
+        inputs=(RAW_MTRS_DIR, RAW_MSRS_DIR, REFERENCE_DIR, FACT_STORE, INSTRUMENT, PUBLISH),
+        outputs=tuple(FACTS) + tuple(csv_path(PUBLISHED_DIR, p.stem) for p in FACTS),
+        deps=("ingest_mtrs", "ingest_msrs"),
+        parallel=True,
+    ),
+    Stage(
+        "build_marts",
+        SCRIPTS_DIR / "build_marts.py",
+        inputs=tuple(FACTS) + (SQL_DIR, REFERENCE_DIR, FACT_STORE, INSTRUMENT, PUBLISH),
+        outputs=tuple(MARTS) + tuple(csv_path(PUBLISHED_DIR, p.stem) for p in MARTS),
+        deps=("transform_fact_tables",),
+        parallel=True,
+    ),
+    Stage(
+        "generate_reports",
+        SCRIPTS_DIR / "generate_reports.py",
+        inputs=tuple(FACTS) + (RANK_INDEX, FACT_STORE, INSTRUMENT, VALIDATION, GROWTH_CUBE),
+        outputs=(DOCS_DIR / "data_validation.md", DOCS_DIR / "metrics_snapshot.csv", DOCS_DIR / "figures"),
+        deps=("transform_fact_tables", "build_marts"),
+        parallel=True,
+    ),
+]
+
+
+def _iter_files(path: Path):
+    if path.is_dir():
+        yield from sorted(p for p in path.rglob("*") if p.is_file() and not p.name.startswith("."))
+    elif path.is_file():
+        yield path
+
+
+def _file_digest(path: Path, digests: dict) -> str:
+    """sha256 of a file, reusing the previous digest when size and mtime are unchanged."""
+    st = path.stat()
+    key = str(path)
+    cached = digests.get(key)
+    if cached and cached["size"] == st.st_size and cached["mtime_ns"] == st.st_mtime_ns:
+        return cached["sha256"]
+
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    digests[key] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": h.hexdigest()}
+    return h.hexdigest()
+
+
+def fingerprint(stage: Stage, digests: dict) -> str:
+    h = hashlib.sha256()
+    for root in (stage.script,) + stage.inputs:
+        root = resolve(root)
+        if not root.exists():
+            h.update(f"{root}:missing\n".encode())
+            continue
+        for path in _iter_files(root):
+            h.update(f"{path.relative_to(REPO_ROOT) if path.is_relative_to(REPO_ROOT) else path}:".encode())
+            h.update(_file_digest(path, digests).encode() + b"\n")
+    return h.hexdigest()
+
+
+def _outputs_present(stage: Stage) -> bool:
+    return all(resolve(p).exists() for p in stage.outputs)
+
+
+def _load_state(path: Path) -> dict:
+    if not path.exists():
+        return {"stages": {}, "digests": {}}
+    state = json.loads(path.read_text(encoding="utf-8"))
+    state.setdefault("stages", {})
+    state.setdefault("digests", {})
+    return state
+
+
+def _save_state(path: Path, state: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, indent=2, sort_keys=True), encoding="utf-8")
+    tmp.replace(path)
+
+
+def _run_stage(stage: Stage, jobs: int = 1, run_id: str | None = None) -> int:
+    cmd = [sys.executable, str(stage.script)]
+    if stage.parallel:
+        cmd += ["--jobs", str(jobs)]
+    # Stages log their steps under the runner's id (see instrument.py).
+    env = {**os.environ, "PIPELINE_RUN_ID": run_id} if run_id else None
+    return subprocess.call(cmd, cwd=REPO_ROOT, env=env)
+
+
+def run_stages(
+    stages: Sequence[Stage],
+    state_path: Path = STATE_PATH,
+    force: bool = False,
+    offline: bool = False,
+    jobs: int = 1,
+) -> int:
+    """Run stages as their dependencies complete, up to ``jobs`` at a time."""
+    names = {stage.name for stage in stages}
+    for stage in stages:
+        unknown = [d for d in stage.deps if d not in names]
+        if unknown:
+            raise ValueError(f"stage {stage.name} depends on unknown stages: {unknown}")
+
+    state = _load_state(state_path)
+    run_id = new_run_id()
+    pending = list(stages)
+    done: set[str] = set()
+    running: dict[Future, tuple[Stage, str, float]] = {}
+    rc = 0
+
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as pool:
+        while pending or running:
+            # Schedule until nothing else is ready; skipped stages can unblock their dependents.
+            while True:
+                ready = [s for s in pending if rc == 0 and all(d in done for d in s.deps)]
+                if not ready:
+                    break
+                for stage in ready:
+                    pending.remove(stage)
+                    if stage.remote and offline:
+                        print(f"[skip] {stage.name} (offline)")
+                        done.add(stage.name)
+                        continue
+
+                    fp = fingerprint(stage, state["digests"])
+                    last = state["stages"].get(stage.name, {})
+                    if not force and not stage.remote and last.get("fingerprint") == fp and _outputs_present(stage):
+                        print(f"[skip] {stage.name} (inputs unchanged)")
+                        done.add(stage.name)
+                        continue
+
+                    print(f"[run]  {stage.name}")
+                    running[pool.submit(_run_stage, stage, jobs, run_id)] = (stage, fp, time.perf_counter())
+
+            if not running:
+                if pending and rc == 0:
+                    raise ValueError(f"dependency cycle among stages: {[s.name for s in pending]}")
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage, fp, start = running.pop(future)
+                stage_rc = future.result()
+                if stage_rc != 0:
+                    print(f"[fail] {stage.name} exited with {stage_rc}", file=sys.stderr)
+                    rc = rc or stage_rc
+                    continue
+                state["stages"][stage.name] = {
+                    "fingerprint": fp,
+                    "seconds": round(time.perf_counter() - start, 3),
+                    "run_id": run_id,
+                }
+                done.add(stage.name)
+            _save_state(state_path, state)
+
+    return rc
+
+
+def run_in_process(state_path: Path = STATE_PATH, offline: bool = False, jobs: int = 1) -> int:
+    """Full rebuild of the local stages in one process, handing data between them as Arrow."""
+    import build_marts
+    import generate_reports
+    import transform_fact_tables as tft
+
+    rc = run_stages([s for s in STAGES if s.remote], state_path, offline=offline, jobs=jobs)
+    if rc != 0:
+        return rc
+
+    start = time.perf_counter()
+    with step("run_pipeline", "in_process"), ThreadPoolExecutor(max_workers=WRITER_THREADS) as writer:
+        with step("transform_fact_tables", "main"):
+            mtrs, msrs = tft.load_facts(jobs)
+            writes = [
+                writer.submit(tft._write_outputs, mtrs, "fact_national_retail_sales"),
+                writer.submit(tft._write_outputs, msrs, "fact_state_retail_growth"),
+            ]
+            facts = {"fact_national_retail_sales": to_arrow(mtrs), "fact_state_retail_growth": to_arrow(msrs)}
+            del mtrs, msrs
+
+        with step("build_marts", "main"):
+            marts = build_marts.build_in_memory(facts, jobs)
+            writes += [writer.submit(build_marts.export_arrow, name, table) for name, table in marts.items()]
+
+        with step("generate_reports", "main"):
+            window = {"date_start": generate_reports.DATE_START, "date_end": generate_reports.DATE_END}
+            generate_reports.report(
+                fact_frame(
+                    facts["fact_national_retail_sales"],
+                    date_start=generate_reports._history_start(window["date_start"]),
+                    date_end=window["date_end"],
+                ),
+                fact_frame(facts["fact_state_retail_growth"], **window),
+                fact_frame(
+                    marts[generate_reports.RANK_INDEX],
+                    columns=generate_reports.RANK_INDEX_COLUMNS,
+                    industries=["All Industries"],
+                    **window,
+                ),
+                jobs=jobs,
+                **window,
+            )
+
+        for future in writes:
+            future.result()
+        flush()
+
+    # Record the stages as run so the next incremental run can skip them.
+    state = _load_state(state_path)
+    seconds = round(time.perf_counter() - start, 3)
+    for stage in STAGES:
+        if not stage.remote:
+            state["stages"][stage.name] = {
+                "fingerprint": fingerprint(stage, state["digests"]),
+                "seconds": seconds,
+                "run_id": current_run_id(),
+            }
+    _save_state(state_path, state)
+    return 0
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the pipeline, skipping stages whose inputs are unchanged.")
+    parser.add_argument("--force", action="store_true", help="run every stage regardless of fingerprints")
+    parser.add_argument("--offline", action="store_true", help="skip the ingest (download) stages")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="max stages (and per-stage workers) to run concurrently (default: CPU count)",
+    )
+    parser.add_argument(
+        "--in-process",
+        action="store_true",
+        help="rebuild transform, marts and reports in one process, passing Arrow tables between them",
+    )
+    args = parser.parse_args(argv)
+    if args.in_process:
+        return run_in_process(offline=args.offline, jobs=args.jobs)
+    return run_stages(STAGES, force=args.force, offline=args.offline, jobs=args.jobs)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
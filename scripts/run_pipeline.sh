@@ -1,8 +1,5 @@
 #!/usr/bin/env bash
 set -euo pipefail
 
-python scripts/ingest_mtrs.py
-python scripts/ingest_msrs.py
-python scripts/transform_fact_tables.py
-python scripts/build_marts.py
-python scripts/generate_reports.py
+# Stages are skipped when their inputs are unchanged; pass --force to rebuild everything.
+exec python scripts/run_pipeline.py "$@"
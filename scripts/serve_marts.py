@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+"""Serve the marts over a local HTTP query API backed by DuckDB.
+
+    GET /marts
+    GET /marts/<mart>?start=2024-01&end=2024-12&industry=...&region=...&topN_flag=Top5&format=json|csv|arrow
+    GET /marts/marts_growth_rank_index?industry=All%20Industries&max_rank=3
+    GET /marts/marts_growth_rollup?geo_level=division&region=West
+
+Filters are pushed into a parameterized DuckDB query over the mart Parquet file;
+repeat a parameter (``industry=A&industry=B``) to match several values. Queries
+run on a fixed pool of cursors sharing one connection, and results are kept in
+an LRU cache keyed by mart and filters. Each request checks the size and mtime of
+every Parquet file of the mart (each partition of an incremental mart), so a
+rebuilt or refreshed mart drops its cached results. ``format=arrow`` returns
+an Arrow IPC stream for clients that can read it without parsing text.
+``max_rank=N`` keeps the top N states of the rank index (``max_region_rank``
+within each region), so any top-N cut is one indexed read.
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import queue
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterator, Sequence
+from urllib.parse import parse_qs, unquote, urlparse
+
+import duckdb
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+from fact_store import resolve
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+MARTS_DIR = REPO_ROOT / "data" / "marts"
+
+# Mart -> filterable columns (besides the start/end date range) and result order.
+MARTS = {
+    "marts_market_trends": {"filters": ("industry",), "order": ("date", "industry")},
+    "marts_growth_contribution": {
+        "filters": ("industry", "region", "state", "topN_flag"),
+        "order": ("date", "industry", "state"),
+    },
+    "marts_growth_rank_index": {
+        "filters": ("industry", "region", "state"),
+        "ranks": {"max_rank": "state_rank", "max_region_rank": "region_rank"},
+        "order": ("date", "industry", "state_rank"),
+    },
+    "marts_growth_rollup": {
+        "filters": ("industry", "geo_level", "region", "division", "state", "parent_name"),
+        "ranks": {"max_rank": "geo_rank", "max_parent_rank": "parent_rank"},
+        "order": ("date", "industry", "geo_level", "geo_rank"),
+    },
+}
+POOL_SIZE = 4
+CACHE_SIZE = 256
+CONTENT_TYPES = {
+    "json": "application/json",
+    "csv": "text/csv; charset=utf-8",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+class QueryError(ValueError):
+    """A bad request (unknown mart, filter, column or format)."""
+
+
+class MartService:
+    """Filtered, cached queries over the mart Parquet files."""
+
+    def __init__(self, marts_dir: Path = MARTS_DIR, pool_size: int = POOL_SIZE, cache_size: int = CACHE_SIZE):
+        self.marts_dir = marts_dir
+        self.cache_size = cache_size
+        self._con = duckdb.connect()
+        self._pool: queue.Queue = queue.Queue()
+        for _ in range(max(pool_size, 1)):
+            self._pool.put(self._con.cursor())
+        self._cache: OrderedDict = OrderedDict()
+        self._versions: dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def path(self, name: str) -> Path:
+        if name not in MARTS:
+            raise QueryError(f"unknown mart: {name}")
+        path = resolve(self.marts_dir / f"{name}.parquet")
+        if not path.exists():
+            raise FileNotFoundError(f"missing mart: {path}")
+        return path
+
+    @contextmanager
+    def _cursor(self) -> Iterator[duckdb.DuckDBPyConnection]:
+        cur = self._pool.get()
+        try:
+            yield cur
+        finally:
+            self._pool.put(cur)
+
+    def _check_version(self, name: str) -> None:
+        """Drop a mart's cached results when any of its files has been rewritten."""
+        path = self.path(name)
+        files = sorted(path.rglob("*.parquet")) if path.is_dir() else [path]
+        version = tuple(
+            (f.relative_to(path).as_posix() if path.is_dir() else f.name, st.st_size, st.st_mtime_ns)
+            for f, st in ((f, f.stat()) for f in files)
+        )
+        with self._lock:
+            if self._versions.get(name) != version:
+                for key in [k for k in self._cache if k[0] == name]:
+                    del self._cache[key]
+                self._versions[name] = version
+
+    def _source(self, name: str) -> str:
+        path = self.path(name)
+        glob = (path / "**" / "*.parquet").as_posix() if path.is_dir() else path.as_posix()
+        return "read_parquet('" + glob.replace("'", "''") + "')"
+
+    def available(self) -> dict[str, list[str]]:
+        """Columns of every mart that has been built."""
+        return {name: self.columns(name) for name in MARTS if resolve(self.marts_dir / f"{name}.parquet").exists()}
+
+    def columns(self, name: str) -> list[str]:
+        with self._cursor() as cur:
+            return [row[0] for row in cur.execute(f"DESCRIBE SELECT * FROM {self._source(name)}").fetchall()]
+
+    def _sql(self, name: str, params: dict[str, list[str]]) -> tuple[str, list]:
+        spec = MARTS[name]
+        ranks = spec.get("ranks", {})
+        unknown = set(params) - set(spec["filters"]) - set(ranks) - {"start", "end", "columns", "limit", "format"}
+        if unknown:
+            raise QueryError(f"unsupported parameters for {name}: {sorted(unknown)}")
+
+        columns = "*"
+        if params.get("columns"):
+            wanted = [c for value in params["columns"] for c in value.split(",") if c]
+            bad = set(wanted) - set(self.columns(name))
+            if bad:
+                raise QueryError(f"unknown columns for {name}: {sorted(bad)}")
+            columns = ", ".join(f'"{c}"' for c in wanted)
+
+        where, args = [], []
+        if params.get("start"):
+            where.append("date >= ?")
+            args.append(params["start"][-1])
+        if params.get("end"):
+            where.append("date <= ?")
+            args.append(params["end"][-1])
+        for col in spec["filters"]:
+            values = params.get(col)
+            if values:
+                where.append(f'"{col}" IN ({", ".join("?" * len(values))})')
+                args.extend(values)
+        for param, col in ranks.items():
+            if params.get(param):
+                value = params[param][-1]
+                if not value.isdigit():
+                    raise QueryError(f"{param} must be a non-negative integer: {value}")
+                where.append(f'"{col}" <= ?')
+                args.append(int(value))
+
+        sql = f"SELECT {columns} FROM {self._source(name)}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY " + ", ".join(spec["order"])
+        if params.get("limit"):
+            limit = params["limit"][-1]
+            if not limit.isdigit():
+                raise QueryError(f"limit must be a non-negative integer: {limit}")
+            sql += f" LIMIT {int(limit)}"
+        return sql, args
+
+    def query(self, name: str, params: dict[str, list[str]]) -> tuple[bytes, str, bool]:
+        """Run a filtered query; returns (payload, content type, served from cache)."""
+        fmt = (params.get("format") or ["json"])[-1]
+        if fmt not in CONTENT_TYPES:
+            raise QueryError(f"unsupported format: {fmt}")
+
+        self._check_version(name)
+        key = (name, tuple(sorted((k, tuple(v)) for k, v in params.items())))
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key], CONTENT_TYPES[fmt], True
+
+        sql, args = self._sql(name, params)
+        with self._cursor() as cur:
+            table = cur.execute(sql, args).arrow()
+        if isinstance(table, pa.RecordBatchReader):  # duckdb >= 1.4 streams batches
+            table = table.read_all()
+        payload = _encode(table, fmt)
+
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = payload
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return payload, CONTENT_TYPES[fmt], False
+
+    def close(self) -> None:
+        self._con.close()
+
+
+def _encode(table: pa.Table, fmt: str) -> bytes:
+    if fmt == "arrow":
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    if fmt == "csv":
+        buf = io.BytesIO()
+        pacsv.write_csv(table, buf)
+        return buf.getvalue()
+    return json.dumps({"columns": table.column_names, "rows": table.to_pylist()}, default=str).encode()
+
+
+def make_handler(service: MartService):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            parts = [unquote(p) for p in url.path.strip("/").split("/") if p]
+            try:
+                if parts == ["marts"]:
+                    self._send(200, json.dumps(service.available()).encode(), CONTENT_TYPES["json"])
+                elif len(parts) == 2 and parts[0] == "marts":
+                    payload, content_type, cached = service.query(parts[1], parse_qs(url.query))
+                    self._send(200, payload, content_type, {"X-Cache": "hit" if cached else "miss"})
+                else:
+                    self._send(404, json.dumps({"error": f"not found: {url.path}"}).encode(), CONTENT_TYPES["json"])
+            except QueryError as exc:
+                self._send(400, json.dumps({"error": str(exc)}).encode(), CONTENT_TYPES["json"])
+            except FileNotFoundError as exc:
+                self._send(404, json.dumps({"error": str(exc)}).encode(), CONTENT_TYPES["json"])
+            except duckdb.Error as exc:
+                # e.g. a mart file caught mid-rebuild; the client still gets an answer.
+                self._send(500, json.dumps({"error": f"query failed: {exc}"}).encode(), CONTENT_TYPES["json"])
+
+        def _send(self, status: int, body: bytes, content_type: str, headers: dict | None = None) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve filtered mart queries over local HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pool-size", type=int, default=POOL_SIZE, help="DuckDB cursors serving queries concurrently")
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE, help="cached query results (LRU)")
+    args = parser.parse_args(argv)
+
+    service = MartService(pool_size=args.pool_size, cache_size=args.cache_size)
+    httpd = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    print(f"serving {', '.join(MARTS)} on http://{args.host}:{httpd.server_address[1]}/marts")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,34 +4,61 @@
 Outputs:
 - data/processed/*.parquet (primary)
 - data/published/*.csv (sharing / Tableau)
+
+The month window defaults to 2022-01..2024-12. ``--start``/``--end`` move it, and
+``all`` leaves an end open, so ``--start all --end all`` keeps every month the
+sources have (MRTS back to 1992, MSRS back to 2019). MRTS year sheets are parsed
+in up to ``--jobs`` worker processes.
 """
 from __future__ import annotations
 
+import argparse
+import hashlib
 import re
+import shutil
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Iterable, Sequence
+from typing import Iterable, Iterator, Sequence
 
+import numpy as np
 import pandas as pd
+from openpyxl import load_workbook
+
+from fact_store import MONTH_COL, month_bound, month_start, to_arrow, write_fact
+from instrument import current, instrumented, step
+from publish import csv_path, flush, publish_csv
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
 RAW_MTRS_DIR = REPO_ROOT / "data" / "raw" / "mtrs"
 RAW_MSRS_DIR = REPO_ROOT / "data" / "raw" / "msrs"
 PROCESSED_DIR = REPO_ROOT / "data" / "processed"
 PUBLISHED_DIR = REPO_ROOT / "data" / "published"
+MTRS_CACHE_DIR = REPO_ROOT / "data" / "cache" / "mtrs"
+# Part of the MTRS cache key: bump whenever _parse_mtrs_sheet (or the mapping it applies) changes its output.
+MTRS_PARSER_VERSION = 1
 
 CROSSWALK_PATH = REPO_ROOT / "data" / "reference" / "industry_crosswalk.csv"
 STATE_REGION_PATH = REPO_ROOT / "data" / "reference" / "state_region_map.csv"
 
-DATE_START = "2022-01"
-DATE_END = "2024-12"
-MTRS_YEARS = [2022, 2023, 2024]
+# Month window kept in the fact tables; None leaves that end open.
+DATE_START: str | None = "2022-01"
+DATE_END: str | None = "2024-12"
+# MRTS year sheets to parse; None derives them from the window (every year sheet when open).
+MTRS_YEARS: list[int] | None = None
+
+NAICS_TOKEN_RE = re.compile(r"\d{3,5}")
+
+MSRS_KEYS = ["date", "state", "region", "industry"]
+MSRS_FOLD_EVERY = 16
 
 
 def _list_files(dir_path: Path) -> list[Path]:
     if not dir_path.exists():
         return []
-    return sorted([p for p in dir_path.iterdir() if p.is_file()])
+    # Hidden files are ingest bookkeeping (manifest, partial downloads).
+    return sorted([p for p in dir_path.iterdir() if p.is_file() and not p.name.startswith(".")])
 
 
 def _parse_date_col(series: pd.Series) -> pd.Series:
@@ -42,10 +69,58 @@ def _to_yyyymm(series: pd.Series) -> pd.Series:
     return pd.to_datetime(series, errors="coerce").dt.to_period("M").astype(str)
 
 
-def _load_crosswalk() -> pd.DataFrame:
-    if not CROSSWALK_PATH.exists():
-        raise FileNotFoundError(f"missing crosswalk: {CROSSWALK_PATH}")
-    return pd.read_csv(CROSSWALK_PATH, dtype=str)
+def set_window(date_start: str | None, date_end: str | None) -> None:
+    """Set the month window (also the initializer of worker processes, which may not fork)."""
+    global DATE_START, DATE_END
+    DATE_START, DATE_END = date_start, date_end
+
+
+def _month_dtype(observed: Iterable[str] = ()) -> pd.CategoricalDtype:
+    """Ordered ``YYYY-MM`` categories for every month in ``DATE_START..DATE_END``.
+
+    An open end of the window stops at the first/last ``observed`` month.
+    """
+    months = sorted(m for m in observed if re.fullmatch(r"\d{4}-\d{2}", str(m)))
+    start = DATE_START or (months[0] if months else None)
+    end = DATE_END or (months[-1] if months else None)
+    if start is None or end is None:
+        return pd.CategoricalDtype([], ordered=True)
+    return pd.CategoricalDtype(pd.period_range(start, end, freq="M").astype(str).tolist(), ordered=True)
+
+
+def _broadcast_categorical(per_unique: Sequence, codes: np.ndarray) -> pd.Categorical:
+    """Expand values computed per distinct input (``pd.factorize`` codes) into a sorted categorical.
+
+    Missing values and code -1 (missing input) become NaN.
+    """
+    value_codes, categories = pd.factorize(pd.Series(list(per_unique), dtype=object), sort=True)
+    return pd.Categorical.from_codes(np.append(value_codes, -1)[codes], categories=categories.astype(str))
+
+
+def _concat_frames(frames: Sequence[pd.DataFrame]) -> pd.DataFrame:
+    """``pd.concat`` that keeps categorical columns categorical by unioning their categories."""
+    frames = list(frames)
+    for col in frames[0].columns:
+        if any(isinstance(f[col].dtype, pd.CategoricalDtype) for f in frames):
+            values: set = set()
+            for f in frames:
+                values.update(f[col].cat.categories if isinstance(f[col].dtype, pd.CategoricalDtype) else f[col].dropna())
+            dtype = pd.CategoricalDtype(sorted(values), ordered=getattr(frames[0][col].dtype, "ordered", False))
+            frames = [f.assign(**{col: f[col].astype(dtype)}) for f in frames]
+    return pd.concat(frames, ignore_index=True)
+
+
+def _drop_unused_categories(df: pd.DataFrame) -> pd.DataFrame:
+    """Fact tables only carry categories that occur (e.g. no unmapped "USA" state)."""
+    cats = [c for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)]
+    return df.assign(**{c: df[c].cat.remove_unused_categories() for c in cats})
+
+
+def _with_month_date(df: pd.DataFrame) -> pd.DataFrame:
+    """Add the native month (first day, stored as Parquet DATE) next to the ``date`` string."""
+    df = df.copy()
+    df.insert(df.columns.get_loc("date") + 1, MONTH_COL, month_start(df["date"]))
+    return df
 
 
 def _load_state_region() -> pd.DataFrame:
@@ -54,32 +129,46 @@ def _load_state_region() -> pd.DataFrame:
     return pd.read_csv(STATE_REGION_PATH, dtype=str)
 
 
-def _map_industry(df: pd.DataFrame, naics_col: str) -> pd.DataFrame:
-    crosswalk = _load_crosswalk()
-    cw = crosswalk[["naics_prefix", "industry_group"]].dropna()
-
-    def map_prefix(code: str) -> str | None:
-        if code is None:
-            return None
-        code = str(code).strip()
-        if not code:
-            return None
-        tokens = re.findall(r"\d{3,5}", code)
-        if not tokens:
-            return None
-        for prefix, group in cw.itertuples(index=False):
-            if prefix in ("", None):
-                continue
-            if "-" in prefix:
-                lo, hi = prefix.split("-")
-                if any(t.startswith(lo) or t.startswith(hi) for t in tokens):
-                    return group
-            else:
-                if any(t.startswith(prefix) for t in tokens):
-                    return group
+@lru_cache(maxsize=None)
+def _crosswalk_index(path: Path) -> dict[str, tuple[int, str]]:
+    """Compile the crosswalk into a prefix -> (priority, industry_group) lookup.
+
+    Priority is the crosswalk row order, so the first matching row still wins.
+    Range prefixes such as ``44-45`` expand to both of their endpoints.
+    """
+    if not path.exists():
+        raise FileNotFoundError(f"missing crosswalk: {path}")
+    cw = pd.read_csv(path, dtype=str)[["naics_prefix", "industry_group"]].dropna()
+
+    index: dict[str, tuple[int, str]] = {}
+    for priority, (prefix, group) in enumerate(cw.itertuples(index=False)):
+        prefix = prefix.strip()
+        if not prefix:
+            continue
+        for p in prefix.split("-") if "-" in prefix else [prefix]:
+            index.setdefault(p.strip(), (priority, group))
+    return index
+
+
+def _lookup_industry(code, index: dict[str, tuple[int, str]]) -> str | None:
+    if code is None:
         return None
+    tokens = NAICS_TOKEN_RE.findall(str(code).strip())
+    best = None
+    for token in tokens:
+        for k in range(1, len(token) + 1):
+            hit = index.get(token[:k])
+            if hit is not None and (best is None or hit[0] < best[0]):
+                best = hit
+    return best[1] if best else None
+
+
+def _map_industry(df: pd.DataFrame, naics_col: str) -> pd.DataFrame:
+    index = _crosswalk_index(CROSSWALK_PATH)
 
-    df["industry"] = df[naics_col].map(map_prefix)
+    # Match each distinct NAICS code once, then broadcast back via factorized codes.
+    codes, uniques = pd.factorize(df[naics_col])
+    df["industry"] = _broadcast_categorical([_lookup_industry(u, index) for u in uniques], codes)
     return df
 
 
@@ -88,41 +177,80 @@ def _map_region(df: pd.DataFrame, state_col: str) -> pd.DataFrame:
     state_map["state_abbr"] = state_map["state_abbr"].str.upper().str.strip()
     state_map["state_name"] = state_map["state_name"].str.upper().str.strip()
 
-    df[state_col] = df[state_col].astype(str).str.strip()
-    df_state = df[state_col].str.upper()
-
     by_abbr = state_map.set_index("state_abbr")["region"]
     by_name = state_map.set_index("state_name")["region"]
 
-    df["region"] = df_state.map(by_abbr)
-    df.loc[df["region"].isna(), "region"] = df_state.map(by_name)
+    # Clean and look up each distinct state once; both columns come back as categoricals.
+    codes, uniques = pd.factorize(df[state_col])
+    states = pd.Series(pd.Index(uniques).astype(str)).str.strip()
+    upper = states.str.upper()
+    region = upper.map(by_abbr).fillna(upper.map(by_name))
+
+    df[state_col] = _broadcast_categorical(states, codes)
+    df["region"] = _broadcast_categorical(region, codes)
     return df
 
 
 def _filter_months(df: pd.DataFrame, date_col: str) -> pd.DataFrame:
-    df = df.copy()
-    df[date_col] = _to_yyyymm(df[date_col])
-    return df[(df[date_col] >= DATE_START) & (df[date_col] <= DATE_END)]
+    """Rows inside ``DATE_START..DATE_END``, with ``date_col`` as a ``YYYY-MM`` categorical.
+
+    Each distinct date is parsed once; months outside the window (or unparseable) are dropped.
+    """
+    codes, uniques = pd.factorize(df[date_col])
+    months = _to_yyyymm(pd.Series(pd.Index(uniques).astype(object)))
+    dtype = _month_dtype(months)
+    month_codes = np.append(dtype.categories.get_indexer(months), -1)[codes]
+    keep = month_codes >= 0
+    df = df[keep].copy()
+    df[date_col] = pd.Categorical.from_codes(month_codes[keep], dtype=dtype)
+    return df
 
 
-def _melt_wide_yyyy_mm(df: pd.DataFrame, id_vars: Iterable[str]) -> pd.DataFrame:
-    date_cols = [c for c in df.columns if re.fullmatch(r"\d{6}", str(c))]
+def _wide_date_columns(columns: Iterable) -> list:
+    date_cols = [c for c in columns if re.fullmatch(r"\d{6}", str(c))]
     if not date_cols:
-        date_cols = [c for c in df.columns if re.fullmatch(r"yy\d{6}", str(c), flags=re.IGNORECASE)]
+        date_cols = [c for c in columns if re.fullmatch(r"yy\d{6}", str(c), flags=re.IGNORECASE)]
+    return date_cols
+
+
+def _in_window(col) -> bool:
+    month = f"{str(col)[-6:-2]}-{str(col)[-2:]}"
+    return (DATE_START is None or DATE_START <= month) and (DATE_END is None or month <= DATE_END)
+
+
+def _melt_wide_yyyy_mm(df: pd.DataFrame, id_vars: Iterable[str]) -> pd.DataFrame:
+    """Wide ``[yy]YYYYMM`` columns to long rows (same order as ``DataFrame.melt``).
+
+    ``date`` is a ``YYYY-MM`` categorical built from the column labels, so no
+    per-row date strings are created; id columns keep their (categorical) dtypes.
+    """
+    date_cols = _wide_date_columns(df.columns)
     if not date_cols:
         raise ValueError("No YYYYMM columns found for wide format.")
 
-    long = df.melt(id_vars=list(id_vars), value_vars=date_cols, var_name="date", value_name="value")
-    long["date"] = long["date"].astype(str).str.replace("yy", "", case=False, regex=False)
-    long["date"] = pd.to_datetime(long["date"], format="%Y%m", errors="coerce")
+    labels = [f"{str(c)[-6:-2]}-{str(c)[-2:]}" for c in date_cols]
+    col_codes, months = pd.factorize(pd.Series(labels), sort=True)
+    n = len(df)
+
+    long = df[list(id_vars)].take(np.tile(np.arange(n), len(date_cols))).reset_index(drop=True)
+    long["date"] = pd.Categorical.from_codes(np.repeat(col_codes, n), categories=months)
+    long["value"] = df[date_cols].to_numpy().ravel(order="F")
     return long
 
 
+def _find_month_header(df: pd.DataFrame) -> int | None:
+    """Position of the first row with a "Jan" cell, scanning column-wise."""
+    hits = np.zeros(len(df), dtype=bool)
+    for col in df.columns:
+        hits |= df[col].astype(str).str.contains("Jan", case=False, na=False).to_numpy(dtype=bool)
+    found = np.flatnonzero(hits)
+    return int(found[0]) if found.size else None
+
+
 def _parse_mtrs_sheet(df: pd.DataFrame, year: int) -> pd.DataFrame:
-    header_idx = df[df.apply(lambda r: r.astype(str).str.contains("Jan", case=False, na=False).any(), axis=1)].index
-    if header_idx.empty:
+    header_idx = _find_month_header(df)
+    if header_idx is None:
         raise ValueError(f"Unable to locate month header row for {year}")
-    header_idx = header_idx[0]
 
     header_row = df.iloc[header_idx].tolist()
     col_names = []
@@ -154,25 +282,154 @@ def _parse_mtrs_sheet(df: pd.DataFrame, year: int) -> pd.DataFrame:
     long = _map_industry(long, "naics")
     long = long.dropna(subset=["industry"])
     long = long[["date", "industry", "sales_amount"]]
-    long = long.groupby(["date", "industry"], as_index=False)["sales_amount"].sum()
+    long = long.groupby(["date", "industry"], as_index=False, observed=True)["sales_amount"].sum()
     return long
 
 
-def load_mtrs() -> pd.DataFrame:
+def _file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _read_workbook_sheets(path: Path, sheet_names: Iterable[str]) -> dict[str, pd.DataFrame]:
+    """Read the requested sheets (header=None) from a single open of the workbook."""
+    wanted = set(sheet_names)
+    if path.suffix.lower() == ".xls":
+        with pd.ExcelFile(path) as xls:
+            return {s: xls.parse(s, header=None) for s in xls.sheet_names if s in wanted}
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        return {ws.title: pd.DataFrame(list(ws.values)) for ws in wb.worksheets if ws.title in wanted}
+    finally:
+        wb.close()
+
+
+def _sheet_names(path: Path) -> list[str]:
+    if path.suffix.lower() == ".xls":
+        with pd.ExcelFile(path) as xls:
+            return [str(s) for s in xls.sheet_names]
+    wb = load_workbook(path, read_only=True)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+
+def _mtrs_cache_dir(path: Path, prune: bool = True) -> Path:
+    """Where a workbook's parsed sheets are cached; older versions of it are dropped when ``prune``.
+
+    The key covers the workbook, the crosswalk and ``MTRS_PARSER_VERSION``.
+    """
+    parser_key = hashlib.sha256(f"{_file_sha256(CROSSWALK_PATH)}:{MTRS_PARSER_VERSION}".encode()).hexdigest()
+    cache_dir = MTRS_CACHE_DIR / f"{path.stem}-{_file_sha256(path)}-{parser_key[:12]}"
+    if prune and not cache_dir.exists() and MTRS_CACHE_DIR.exists():
+        for stale in MTRS_CACHE_DIR.glob(f"{path.stem}-*"):
+            if stale.name.rsplit("-", 2)[0] == path.stem:
+                shutil.rmtree(stale, ignore_errors=True)
+    return cache_dir
+
+
+def _mtrs_years(path: Path, cache_dir: Path, use_cache: bool) -> list[int]:
+    """The workbook's year sheets inside the window.
+
+    A closed window needs no lookup; an open one lists the sheets once and caches
+    the names next to the parsed sheets.
+    """
+    if DATE_START and DATE_END:
+        return list(range(int(DATE_START[:4]), int(DATE_END[:4]) + 1))
+
+    listing = cache_dir / "sheets.txt"
+    if use_cache and listing.exists():
+        sheets = listing.read_text(encoding="utf-8").splitlines()
+    else:
+        sheets = _sheet_names(path)
+        if use_cache:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            listing.write_text("\n".join(sheets), encoding="utf-8")
+
+    years = sorted(int(s) for s in sheets if re.fullmatch(r"\d{4}", s.strip()))
+    return [
+        year
+        for year in years
+        if (DATE_START is None or year >= int(DATE_START[:4])) and (DATE_END is None or year <= int(DATE_END[:4]))
+    ]
+
+
+def _empty_mtrs_frame() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "date": pd.Series(dtype="datetime64[ns]"),
+            "industry": pd.Series(dtype=object),
+            "sales_amount": pd.Series(dtype=float),
+        }
+    )
+
+
+def _parse_mtrs_year(path: Path, year: int) -> pd.DataFrame:
+    """Read and parse one year sheet (empty when the workbook has none); runs in a worker process."""
+    raw = _read_workbook_sheets(path, [str(year)]).get(str(year))
+    return _empty_mtrs_frame() if raw is None else _parse_mtrs_sheet(raw, year)
+
+
+def _load_mtrs_workbook(
+    path: Path, years: Sequence[int] | None, use_cache: bool = True, jobs: int = 1
+) -> list[pd.DataFrame]:
+    """Parse the year sheets of an MRTS workbook, reusing cached results when unchanged.
+
+    Parsed sheets are cached as Parquet under a key made of the workbook's name and
+    sha256 and the crosswalk's sha256, so an unchanged workbook is never reopened;
+    a new key replaces the workbook's previous one. Years without a
+    sheet are cached as empty frames so they are not looked up again. ``years=None``
+    takes every year sheet in the window. With ``jobs > 1`` each uncached sheet is
+    read and parsed in its own worker process, so a full backfill takes about as
+    long as the slowest sheet.
+    """
+    cache_dir = _mtrs_cache_dir(path, prune=use_cache)
+    if years is None:
+        years = _mtrs_years(path, cache_dir, use_cache)
+
+    parsed: dict[int, pd.DataFrame] = {}
+    if use_cache:
+        for year in years:
+            cached = cache_dir / f"{year}.parquet"
+            if cached.exists():
+                parsed[year] = pd.read_parquet(cached)
+
+    missing = [year for year in years if year not in parsed]
+    if jobs > 1 and len(missing) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(missing))) as pool:
+            parsed.update(zip(missing, pool.map(_parse_mtrs_year, [path] * len(missing), missing)))
+    elif missing:
+        sheets = _read_workbook_sheets(path, [str(year) for year in missing])
+        for year in missing:
+            raw = sheets.get(str(year))
+            parsed[year] = _parse_mtrs_sheet(raw, year) if raw is not None else _empty_mtrs_frame()
+
+    if use_cache:
+        for year in missing:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = cache_dir / f"{year}.parquet.tmp"
+            parsed[year].to_parquet(tmp, index=False)
+            tmp.replace(cache_dir / f"{year}.parquet")
+
+    return [parsed[year] for year in years if not parsed[year].empty]
+
+
+@instrumented("transform_fact_tables")
+def load_mtrs(use_cache: bool = True, jobs: int = 1) -> pd.DataFrame:
     files = _list_files(RAW_MTRS_DIR)
     if not files:
         raise FileNotFoundError(f"No MRTS files found in {RAW_MTRS_DIR}")
+    current().read(*files)
 
     frames = []
     for path in files:
         if path.suffix.lower() in {".xlsx", ".xls"}:
-            xls = pd.ExcelFile(path)
-            for year in MTRS_YEARS:
-                sheet = str(year)
-                if sheet not in xls.sheet_names:
-                    continue
-                raw = pd.read_excel(path, sheet_name=sheet, header=None)
-                frames.append(_parse_mtrs_sheet(raw, year))
+            frames.extend(_load_mtrs_workbook(path, MTRS_YEARS, use_cache=use_cache, jobs=jobs))
         else:
             # Fallback: try CSV as long format with date + value
             raw = pd.read_csv(path)
@@ -187,76 +444,161 @@ def load_mtrs() -> pd.DataFrame:
                     df = _map_industry(df, naics_col)
                     df = df.dropna(subset=["industry"])
                 else:
-                    df["industry"] = "Total Retail"
+                    df["industry"] = pd.Categorical(["Total Retail"] * len(df))
                 frames.append(df[["date", "industry", "sales_amount"]])
 
-    df = pd.concat(frames, ignore_index=True)
+    df = _concat_frames(frames)
+    current().rows_in = len(df)
     df = _filter_months(df, "date")
     df = df.dropna(subset=["date", "sales_amount"])
-    return df
+    return _with_month_date(_drop_unused_categories(df))
 
 
-def load_msrs() -> pd.DataFrame:
-    files = _list_files(RAW_MSRS_DIR)
-    if not files:
-        raise FileNotFoundError(f"No MSRS files found in {RAW_MSRS_DIR}")
+def _msrs_columns(path: Path) -> tuple[str, str | None, list[str]]:
+    """Resolve the state/NAICS id columns and the in-window date columns from the header."""
+    columns = [str(c).strip() for c in pd.read_csv(path, nrows=0).columns]
 
-    frames = []
-    for path in files:
-        df = pd.read_csv(path)
-        frames.append(df)
+    state_col = next((c for c in columns if c.lower() in {"state", "state_abbr", "stateabbr", "state_name"}), None)
+    naics_col = next((c for c in columns if "naics" in c.lower()), None)
+    if state_col is None:
+        raise ValueError("MSRS file missing state column.")
 
-    raw = pd.concat(frames, ignore_index=True)
-    raw.columns = [str(c).strip() for c in raw.columns]
+    date_cols = _wide_date_columns(columns)
+    if not date_cols:
+        raise ValueError("No YYYYMM columns found for wide format.")
+    return state_col, naics_col, [c for c in date_cols if _in_window(c)]
 
-    state_col = next((c for c in raw.columns if c.lower() in {"state", "state_abbr", "stateabbr", "state_name"}), None)
-    naics_col = next((c for c in raw.columns if "naics" in c.lower()), None)
 
-    if state_col is None:
-        raise ValueError("MSRS file missing state column.")
+def _iter_msrs_chunks(path: Path, chunksize: int | None) -> Iterator[tuple[pd.DataFrame, str | None]]:
+    state_col, naics_col, date_cols = _msrs_columns(path)
+    keep = {state_col, *date_cols} | ({naics_col} if naics_col else set())
 
-    id_vars = [state_col] + ([naics_col] if naics_col else [])
-    long = _melt_wide_yyyy_mm(raw, id_vars=id_vars)
-    long.rename(columns={state_col: "state", "value": "yoy_pct"}, inplace=True)
-    long["yoy_pct"] = pd.to_numeric(long["yoy_pct"], errors="coerce")
+    reader = pd.read_csv(path, usecols=lambda c: str(c).strip() in keep, chunksize=chunksize)
+    for chunk in [reader] if chunksize is None else reader:
+        chunk.columns = [str(c).strip() for c in chunk.columns]
+        yield chunk.rename(columns={state_col: "state"}), naics_col
 
+
+def _aggregate_msrs_chunk(raw: pd.DataFrame, naics_col: str | None) -> pd.DataFrame:
+    """Map, melt and partially aggregate one chunk into yoy sum/count per key.
+
+    Industry and region are resolved on the wide rows (one per state x NAICS
+    code) before the melt multiplies them by the number of months.
+    """
     if naics_col:
-        long = _map_industry(long, naics_col)
+        raw = _map_industry(raw, naics_col)
     else:
-        long["industry"] = "Total Retail"
+        raw["industry"] = pd.Categorical(["Total Retail"] * len(raw))
+    raw = _map_region(raw, "state")
+    raw = raw.dropna(subset=["state", "industry", "region"])
+
+    long = _melt_wide_yyyy_mm(raw, id_vars=["state", "region", "industry"])
+    long.rename(columns={"value": "yoy_pct"}, inplace=True)
+    long["yoy_pct"] = pd.to_numeric(long["yoy_pct"], errors="coerce")
 
-    long = _map_region(long, "state")
     long = _filter_months(long, "date")
-    long = long[["date", "state", "region", "industry", "yoy_pct"]]
-    long = long.dropna(subset=["date", "state", "industry", "region"])
-    long = long.groupby(["date", "state", "region", "industry"], as_index=False)["yoy_pct"].mean()
-    return long
+    return _combine_msrs_partials([long.assign(yoy_sum=long["yoy_pct"], yoy_count=long["yoy_pct"].notna())])
 
 
-def _write_outputs(df: pd.DataFrame, name: str) -> None:
-    PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
-    PUBLISHED_DIR.mkdir(parents=True, exist_ok=True)
+def _combine_msrs_partials(partials: list[pd.DataFrame]) -> pd.DataFrame:
+    df = _concat_frames(partials)
+    return df.groupby(MSRS_KEYS, as_index=False, observed=True)[["yoy_sum", "yoy_count"]].sum()
 
-    parquet_path = PROCESSED_DIR / f"{name}.parquet"
-    csv_path = PUBLISHED_DIR / f"{name}.csv"
 
-    df.to_parquet(parquet_path, index=False)
-    df.to_csv(csv_path, index=False)
+@instrumented("transform_fact_tables")
+def load_msrs(chunksize: int | None = None) -> pd.DataFrame:
+    """Load MSRS wide files into the state growth fact table.
 
+    Only the ``yy`` columns inside ``DATE_START..DATE_END`` (every one when open) are read. With
+    ``chunksize`` set, each file is streamed in row chunks that are melted and
+    reduced to partial sums/counts, so peak memory follows the chunk size.
+    """
+    files = _list_files(RAW_MSRS_DIR)
+    if not files:
+        raise FileNotFoundError(f"No MSRS files found in {RAW_MSRS_DIR}")
+    current().read(*files)
+
+    partials: list[pd.DataFrame] = []
+    for path in files:
+        for raw, naics_col in _iter_msrs_chunks(path, chunksize):
+            current().add_rows_in(len(raw))
+            partials.append(_aggregate_msrs_chunk(raw, naics_col))
+            if len(partials) >= MSRS_FOLD_EVERY:
+                partials = [_combine_msrs_partials(partials)]
+
+    long = _combine_msrs_partials(partials)
+    long["yoy_pct"] = long["yoy_sum"] / long["yoy_count"].where(long["yoy_count"] > 0)
+    return _with_month_date(_drop_unused_categories(long[MSRS_KEYS + ["yoy_pct"]]))
+
+
+def _write_outputs(df: pd.DataFrame, name: str, partitioned: bool = False) -> None:
+    PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+
+    with step("transform_fact_tables", f"write_{name}") as s:
+        s.rows_in = s.rows_out = len(df)
+        parquet_path = write_fact(df, PROCESSED_DIR / f"{name}.parquet", partitioned=partitioned)
+        s.wrote(parquet_path)
+
+    # The published CSVs keep the YYYY-MM string as their only date column.
+    publish_csv(to_arrow(df), csv_path(PUBLISHED_DIR, name), "transform_fact_tables", exclude=[MONTH_COL])
     print(f"wrote {parquet_path}")
-    print(f"wrote {csv_path}")
 
 
-def main() -> int:
+def load_facts(
+    jobs: int = 1, use_cache: bool = True, chunksize: int | None = None
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Both fact frames (national sales, state growth), loaded in parallel when ``jobs > 1``.
+
+    ``jobs`` also bounds the worker processes parsing MRTS year sheets.
+    """
+    if jobs > 1:
+        # The MRTS and MSRS branches are independent until the marts.
+        with ProcessPoolExecutor(max_workers=2, initializer=set_window, initargs=(DATE_START, DATE_END)) as pool:
+            mtrs_future = pool.submit(load_mtrs, use_cache=use_cache, jobs=jobs)
+            msrs_future = pool.submit(load_msrs, chunksize=chunksize)
+            return mtrs_future.result(), msrs_future.result()
+    return load_mtrs(use_cache=use_cache), load_msrs(chunksize=chunksize)
+
+
+@instrumented("transform_fact_tables", "main")
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Transform raw MRTS/MSRS files into fact tables.")
+    parser.add_argument(
+        "--msrs-chunksize",
+        type=int,
+        default=None,
+        help="stream MSRS files in chunks of this many rows (default: read each file whole)",
+    )
+    parser.add_argument("--no-mtrs-cache", action="store_true", help="re-parse the MRTS workbook even if unchanged")
+    parser.add_argument(
+        "--start", type=month_bound, default=DATE_START, help="first month (YYYY-MM) to keep, or 'all' (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--end", type=month_bound, default=DATE_END, help="last month (YYYY-MM) to keep, or 'all' (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="when > 1, load MRTS and MSRS in parallel and parse MRTS year sheets in up to this many worker processes",
+    )
+    parser.add_argument(
+        "--partitioned",
+        action="store_true",
+        help="write fact tables as Hive-partitioned datasets (date[/industry]) instead of single files",
+    )
+    args = parser.parse_args(argv)
+    set_window(args.start, args.end)
+
     try:
-        mtrs = load_mtrs()
-        msrs = load_msrs()
+        mtrs, msrs = load_facts(args.jobs, use_cache=not args.no_mtrs_cache, chunksize=args.msrs_chunksize)
     except Exception as exc:
         print(f"transform failed: {exc}", file=sys.stderr)
         return 1
 
-    _write_outputs(mtrs, "fact_national_retail_sales")
-    _write_outputs(msrs, "fact_state_retail_growth")
+    _write_outputs(mtrs, "fact_national_retail_sales", partitioned=args.partitioned)
+    _write_outputs(msrs, "fact_state_retail_growth", partitioned=args.partitioned)
+    flush()
     return 0
 
 
@@ -0,0 +1,217 @@
+"""Declarative data-quality checks for the fact tables, evaluated in one scan per table.
+
+Each table's checks (period coverage, key uniqueness, null rates, value ranges,
+domain sets, lookup/mapping coverage) are compiled into a single DuckDB
+aggregate query over the Parquet file or an in-memory frame::
+
+    result = validate(PROCESSED_DIR / "fact_state_retail_growth.parquet", "fact_state_retail_growth")
+    result["duplicate_rows"], result["nulls"]["yoy_pct"], result["out_of_range"]["yoy_pct"]
+
+Results for files are cached (in memory and under ``data/cache/validation/``)
+keyed by the files' size/mtime and the checks, so the report and the test suite
+share one scan until the fact table is rewritten.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Union
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+
+from fact_store import filter_sql, resolve, scan_sql
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+CACHE_DIR = REPO_ROOT / "data" / "cache" / "validation"
+
+EXPECTED_INDUSTRIES = [
+    "Food & Beverage Stores",
+    "General Merchandise",
+    "Motor Vehicles & Parts",
+    "Clothing & Accessories",
+    "Electronics & Appliances",
+    "Nonstore Retail (E-commerce)",
+    "Other Specialty Retail",
+]
+
+
+@dataclass(frozen=True)
+class TableChecks:
+    keys: tuple[str, ...]
+    period: str = "date"
+    not_null: tuple[str, ...] = ()
+    ranges: tuple[tuple[str, float, float], ...] = ()
+    domains: tuple[tuple[str, tuple[str, ...]], ...] = ()
+    mapped: tuple[str, ...] = ()  # lookup columns every row must have
+    distinct: tuple[str, ...] = ()
+
+
+CHECKS = {
+    "fact_national_retail_sales": TableChecks(
+        keys=("date", "industry"),
+        not_null=("sales_amount",),
+        domains=(("industry", tuple(EXPECTED_INDUSTRIES)),),
+    ),
+    "fact_state_retail_growth": TableChecks(
+        keys=("date", "state", "industry"),
+        not_null=("yoy_pct",),
+        ranges=(("yoy_pct", -100.0, 300.0),),
+        domains=(("industry", tuple(EXPECTED_INDUSTRIES)),),
+        mapped=("region",),
+        distinct=("state",),
+    ),
+}
+
+Source = Union[Path, pd.DataFrame, pa.Table]
+
+_memo: dict[tuple[str, str], dict] = {}
+
+
+def _ident(col: str) -> str:
+    return '"' + col.replace('"', '""') + '"'
+
+
+def compile_sql(checks: TableChecks, relation: str) -> tuple[str, list[str]]:
+    """One aggregate query computing every check; returns (sql, output column names)."""
+    exprs = {
+        "rows": "count(*)",
+        # Lists of an empty (or fully filtered) source come back NULL without the coalesce.
+        "periods": f"coalesce(list(DISTINCT {_ident(checks.period)}), [])",
+        "duplicate_rows": f"count(*) - count(DISTINCT ({', '.join(_ident(k) for k in checks.keys)}))",
+    }
+    for col in checks.not_null + checks.mapped:
+        exprs[f"nulls:{col}"] = f"count(*) FILTER (WHERE {_ident(col)} IS NULL)"
+    for col, lo, hi in checks.ranges:
+        exprs[f"min:{col}"] = f"min({_ident(col)})"
+        exprs[f"max:{col}"] = f"max({_ident(col)})"
+        exprs[f"out_of_range:{col}"] = f"count(*) FILTER (WHERE {_ident(col)} < {lo!r} OR {_ident(col)} > {hi!r})"
+    for col, _ in checks.domains:
+        exprs[f"values:{col}"] = f"coalesce(list(DISTINCT {_ident(col)}), [])"
+    for col in checks.distinct:
+        exprs[f"distinct:{col}"] = f"count(DISTINCT {_ident(col)})"
+
+    select = ",\n    ".join(f"{expr} AS {_ident(name)}" for name, expr in exprs.items())
+    return f"SELECT\n    {select}\nFROM {relation}", list(exprs)
+
+
+def _shape(checks: TableChecks, names: list[str], row: tuple) -> dict:
+    result: dict = {
+        "nulls": {},
+        "min": {},
+        "max": {},
+        "out_of_range": {},
+        "values": {},
+        "distinct": {},
+        "missing_values": {},
+        "unexpected_values": {},
+    }
+    for name, value in zip(names, row):
+        if ":" in name:
+            group, col = name.split(":", 1)
+            result[group][col] = value
+        else:
+            result[name] = value
+    # Distinct lists come back unordered (and as ENUM labels for categorical frames).
+    result["periods"] = sorted(str(v) for v in result["periods"])
+    for col in result["values"]:
+        result["values"][col] = sorted(str(v) for v in result["values"][col])
+    for col, domain in checks.domains:
+        present = set(result["values"][col])
+        result["missing_values"][col] = sorted(set(domain) - present)
+        result["unexpected_values"][col] = sorted(present - set(domain))
+    return result
+
+
+def _query(source: Source, where: str, query):
+    con = duckdb.connect()
+    try:
+        if isinstance(source, (pd.DataFrame, pa.Table)):
+            con.register("source", source)
+            relation = "source"
+        else:
+            relation = scan_sql(Path(source))
+        if where:
+            relation = f"(SELECT * FROM {relation} WHERE {where})"
+        return query(con, relation)
+    finally:
+        con.close()
+
+
+def _fingerprint(path: Path, checks: TableChecks, where: str) -> str:
+    source = resolve(path)
+    files = sorted(source.rglob("*.parquet")) if source.is_dir() else [source]
+    h = hashlib.sha256(f"{checks!r}\n{where}\n".encode())
+    for f in files:
+        st = f.stat()
+        h.update(f"{f}:{st.st_size}:{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+def validate(
+    source: Source,
+    table: str,
+    date_start: str | None = None,
+    date_end: str | None = None,
+    industries: Iterable[str] | None = None,
+    use_cache: bool = True,
+) -> dict:
+    """Evaluate ``CHECKS[table]`` over a fact file or frame in a single scan.
+
+    The optional month/industry filters match ``fact_store.read_fact``.
+    """
+    checks = CHECKS[table]
+    where = filter_sql(date_start, date_end, industries)
+    is_file = not isinstance(source, (pd.DataFrame, pa.Table))
+    if is_file and not resolve(Path(source)).exists():
+        raise FileNotFoundError(f"missing fact table: {source}")
+
+    if is_file and use_cache:
+        key = (str(resolve(Path(source))), _fingerprint(Path(source), checks, where))
+        if key in _memo:
+            return _memo[key]
+        cache_path = CACHE_DIR / f"{table}-{hashlib.sha256(key[0].encode()).hexdigest()[:12]}.json"
+        if cache_path.exists():
+            cached = json.loads(cache_path.read_text(encoding="utf-8"))
+            if cached.get("key") == list(key):
+                _memo[key] = cached["result"]
+                return cached["result"]
+
+    def aggregate(con, relation):
+        sql, names = compile_sql(checks, relation)
+        return _shape(checks, names, con.execute(sql).fetchone())
+
+    result = _query(source, where, aggregate)
+
+    if is_file and use_cache:
+        _memo[key] = result
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(json.dumps({"key": list(key), "result": result}, default=str), encoding="utf-8")
+    return result
+
+
+def out_of_range_rows(
+    source: Source,
+    table: str,
+    col: str,
+    columns: list[str],
+    limit: int = 5,
+    date_start: str | None = None,
+    date_end: str | None = None,
+    industries: Iterable[str] | None = None,
+) -> pd.DataFrame:
+    """The most negative rows violating ``col``'s range (run only when the aggregate found some)."""
+    lo, hi = next((lo, hi) for c, lo, hi in CHECKS[table].ranges if c == col)
+    select = ", ".join(_ident(c) for c in columns)
+
+    def query(con, relation):
+        return con.execute(
+            f"SELECT {select} FROM {relation} WHERE {_ident(col)} < ? OR {_ident(col)} > ? "
+            f"ORDER BY {_ident(col)} LIMIT {int(limit)}",
+            [lo, hi],
+        ).df()
+
+    return _query(source, filter_sql(date_start, date_end, industries), query)
@@ -0,0 +1,53 @@
+-- Growth Rank Index (states ranked by positive YoY within each month x industry, and within region)
+-- Dialect: DuckDB
+--
+-- One row per date x industry x state, including an 'All Industries' row per state
+-- (mean YoY across industries). cum_pos_share is the share of the month's positive
+-- growth held by the states ranked 1..state_rank, so the top-N share for any N is the
+-- cum_pos_share of the row with state_rank = N (or of the last row when fewer states).
+
+WITH base_pos AS (
+    -- One pass: the (date, state, industry) rows pass through (AVG of one row) and the
+    -- (date, state) grouping set adds the 'All Industries' rows.
+    SELECT
+        date,
+        month_date,
+        state,
+        region,
+        CASE WHEN GROUPING(industry) = 1 THEN 'All Industries' ELSE industry END AS industry,
+        AVG(yoy_pct) AS yoy_pct,
+        GREATEST(AVG(yoy_pct), 0) AS pos_yoy
+    FROM fact_state_retail_growth
+    GROUP BY GROUPING SETS ((date, month_date, state, region, industry), (date, month_date, state, region))
+),
+ranked AS (
+    SELECT
+        *,
+        ROW_NUMBER() OVER (PARTITION BY date, industry ORDER BY pos_yoy DESC, state) AS state_rank,
+        ROW_NUMBER() OVER (PARTITION BY date, industry, region ORDER BY pos_yoy DESC, state) AS region_rank,
+        SUM(pos_yoy) OVER (PARTITION BY date, industry) AS total_pos,
+        SUM(pos_yoy) OVER (PARTITION BY date, industry, region) AS region_total_pos,
+        SUM(pos_yoy) OVER (
+            PARTITION BY date, industry ORDER BY pos_yoy DESC, state ROWS UNBOUNDED PRECEDING
+        ) AS cum_pos,
+        SUM(pos_yoy) OVER (
+            PARTITION BY date, industry, region ORDER BY pos_yoy DESC, state ROWS UNBOUNDED PRECEDING
+        ) AS region_cum_pos
+    FROM base_pos
+)
+SELECT
+    date,
+    month_date,
+    industry,
+    region,
+    state,
+    yoy_pct,
+    pos_yoy,
+    state_rank,
+    region_rank,
+    total_pos,
+    region_total_pos,
+    cum_pos / NULLIF(total_pos, 0) AS cum_pos_share,
+    region_cum_pos / NULLIF(region_total_pos, 0) AS region_cum_pos_share
+FROM ranked
+ORDER BY date, industry, state_rank;
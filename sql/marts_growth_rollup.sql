@@ -0,0 +1,87 @@
+-- Growth Rollup Cube (positive YoY contribution and rank at state, division, region and national level)
+-- Dialect: DuckDB
+--
+-- One GROUPING SETS pass over marts_growth_rank_index (state rows per industry plus the
+-- 'All Industries' rows), with divisions from data/reference/state_region_map.csv. Every
+-- level keeps the rank index definitions: pos_yoy is the sum of the member states' positive
+-- YoY, yoy_pct their unweighted mean, so state rows match the rank index and region rows
+-- match region_contribution in marts_growth_contribution.
+
+WITH base AS (
+    SELECT
+        i.date,
+        i.month_date,
+        i.industry,
+        i.region,
+        m.division,
+        i.state,
+        i.yoy_pct,
+        i.pos_yoy
+    FROM marts_growth_rank_index i
+    LEFT JOIN state_region_map m ON m.state_abbr = i.state
+),
+cube AS (
+    SELECT
+        date,
+        month_date,
+        industry,
+        CASE
+            WHEN GROUPING(state) = 0 THEN 'state'
+            WHEN GROUPING(division) = 0 THEN 'division'
+            WHEN GROUPING(region) = 0 THEN 'region'
+            ELSE 'national'
+        END AS geo_level,
+        -- NULL marks a subtotal only: a state missing from state_region_map (or without a
+        -- region) is grouped under 'Unmapped' instead of merging into the subtotal rows.
+        CASE WHEN GROUPING(region) = 0 THEN COALESCE(region, 'Unmapped') END AS region,
+        CASE WHEN GROUPING(division) = 0 THEN COALESCE(division, 'Unmapped') END AS division,
+        state,
+        COUNT(*) AS states,
+        AVG(yoy_pct) AS yoy_pct,
+        SUM(pos_yoy) AS pos_yoy
+    FROM base
+    GROUP BY date, month_date, industry, GROUPING SETS ((region, division, state), (region, division), (region), ())
+),
+named AS (
+    SELECT
+        *,
+        COALESCE(state, division, region, 'United States') AS geo_name,
+        -- Sums of equal rates can differ in the last bit with the aggregation order, so
+        -- aggregated levels rank on pos_yoy rounded to 1e-9 (ties go to geo_name); state
+        -- rows keep the rank index order.
+        CASE WHEN geo_level = 'state' THEN pos_yoy ELSE ROUND(pos_yoy, 9) END AS rank_key,
+        -- The level above: division for states, region for divisions, the nation for regions.
+        CASE geo_level
+            WHEN 'state' THEN division
+            WHEN 'division' THEN region
+            WHEN 'region' THEN 'United States'
+        END AS parent_name
+    FROM cube
+)
+SELECT
+    date,
+    month_date,
+    industry,
+    geo_level,
+    region,
+    division,
+    state,
+    geo_name,
+    parent_name,
+    states,
+    yoy_pct,
+    pos_yoy,
+    pos_yoy / NULLIF(SUM(pos_yoy) OVER (PARTITION BY date, industry, geo_level), 0) AS contribution,
+    ROW_NUMBER() OVER (PARTITION BY date, industry, geo_level ORDER BY rank_key DESC, geo_name) AS geo_rank,
+    CASE WHEN parent_name IS NOT NULL THEN
+        pos_yoy / NULLIF(SUM(pos_yoy) OVER (PARTITION BY date, industry, geo_level, parent_name), 0)
+    END AS parent_contribution,
+    CASE WHEN parent_name IS NOT NULL THEN
+        ROW_NUMBER() OVER (PARTITION BY date, industry, geo_level, parent_name ORDER BY rank_key DESC, geo_name)
+    END AS parent_rank
+FROM named
+ORDER BY
+    date,
+    industry,
+    CASE geo_level WHEN 'national' THEN 0 WHEN 'region' THEN 1 WHEN 'division' THEN 2 ELSE 3 END,
+    geo_rank;
@@ -6,16 +6,23 @@ WITH base AS (
         date,
         industry,
         sales_amount,
-        CAST(date || '-01' AS DATE) AS month_date
-    FROM read_parquet('data/processed/fact_national_retail_sales.parquet')
+        month_date
+    FROM fact_national_retail_sales
 ),
 calc AS (
     SELECT
         date,
         industry,
         sales_amount,
-        (sales_amount / LAG(sales_amount) OVER (PARTITION BY industry ORDER BY month_date) - 1) AS mom_growth_pct,
-        (sales_amount / LAG(sales_amount, 12) OVER (PARTITION BY industry ORDER BY month_date) - 1) AS yoy_growth_pct,
+        -- Prior month / same month last year by calendar, so a missing month yields NULL, not a shifted comparison.
+        (sales_amount / FIRST_VALUE(sales_amount) OVER (
+            PARTITION BY industry ORDER BY month_date
+            RANGE BETWEEN INTERVAL 1 MONTH PRECEDING AND INTERVAL 1 MONTH PRECEDING
+        ) - 1) AS mom_growth_pct,
+        (sales_amount / FIRST_VALUE(sales_amount) OVER (
+            PARTITION BY industry ORDER BY month_date
+            RANGE BETWEEN INTERVAL 12 MONTH PRECEDING AND INTERVAL 12 MONTH PRECEDING
+        ) - 1) AS yoy_growth_pct,
         (sales_amount / FIRST_VALUE(sales_amount) OVER (PARTITION BY industry ORDER BY month_date)) * 100 AS sales_index
     FROM base
 )
@@ -0,0 +1,12 @@
+import os
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS_DIR = REPO_ROOT / "scripts"
+
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+# Keep test runs out of the pipeline's run log unless a test opts in.
+os.environ.setdefault("PIPELINE_RUN_LOG", "off")
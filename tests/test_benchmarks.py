@@ -0,0 +1,44 @@
+import sys
+from pathlib import Path
+
+import build_marts
+import generate_reports
+import transform_fact_tables as tft
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
+
+import run_benchmarks  # noqa: E402
+import synthetic  # noqa: E402
+
+PATCHED = {
+    tft: [
+        "RAW_MTRS_DIR", "RAW_MSRS_DIR", "CROSSWALK_PATH", "STATE_REGION_PATH", "MTRS_CACHE_DIR",
+        "PROCESSED_DIR", "PUBLISHED_DIR", "MTRS_YEARS", "DATE_START", "DATE_END",
+    ],
+    build_marts: ["PROCESSED_DIR", "PUBLISHED_DIR", "MARTS_DIR", "FACTS", "REFERENCE"],
+    generate_reports: ["PROCESSED_DIR", "MARTS_DIR", "DOCS_DIR", "FIG_DIR", "FANOUT_DIR", "DATE_START", "DATE_END"],
+}
+
+
+def test_synthetic_tree_loads_at_requested_scale(tmp_path, monkeypatch):
+    for module, names in PATCHED.items():
+        for name in names:
+            monkeypatch.setattr(module, name, getattr(module, name))
+
+    layout = synthetic.generate(tmp_path, years=2, states=60, naics=30)
+    run_benchmarks._configure(tmp_path, layout["years"])
+    assert generate_reports.MARTS_DIR == build_marts.MARTS_DIR == tmp_path / "marts"
+
+    msrs = tft.load_msrs()
+    assert msrs["state"].nunique() == 60
+    assert msrs["region"].notna().all()
+    assert msrs["date"].nunique() == 24
+
+    mtrs = tft.load_mtrs(use_cache=False)
+    assert sorted(mtrs["date"].unique()) == sorted(msrs["date"].unique())
+    assert mtrs["industry"].nunique() == 7
+
+
+def test_compare_reports_median_ratios():
+    baseline = {"results": {"load_msrs": {"seconds_median": 2.0}, "load_mtrs": {"seconds_median": 1.0}}}
+    current = {"results": {"load_msrs": {"seconds_median": 3.0}, "build_marts": {"seconds_median": 1.0}}}
+    assert run_benchmarks.compare(current, baseline) == {"load_msrs": 1.5}
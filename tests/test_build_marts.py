@@ -0,0 +1,276 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import build_marts
+
+
+@pytest.fixture
+def mart_dirs(tmp_path, monkeypatch):
+    if not all(p.exists() for p in build_marts.FACTS.values()):
+        pytest.skip("Processed fact tables not found. Run scripts/run_pipeline.sh")
+    monkeypatch.setattr(build_marts, "MARTS_DIR", tmp_path / "marts")
+    monkeypatch.setattr(build_marts, "PUBLISHED_DIR", tmp_path / "published")
+    return tmp_path
+
+
+def test_marts_written_by_duckdb_copy(mart_dirs):
+    assert build_marts.main(["--jobs", "2", "--compression", "zstd"]) == 0
+
+    for name in build_marts.MARTS:
+        parquet = pd.read_parquet(mart_dirs / "marts" / f"{name}.parquet")
+        csv = pd.read_csv(mart_dirs / "published" / f"{name}.csv")
+        assert len(parquet) > 0
+        assert list(parquet.columns) == list(csv.columns)
+        assert len(parquet) == len(csv)
+
+    trends = pd.read_parquet(mart_dirs / "marts" / "marts_market_trends.parquet")
+    assert not trends.duplicated(subset=["date", "industry"]).any()
+
+
+def _write_facts(tmp_path, monkeypatch, facts):
+    paths = {}
+    for name, df in facts.items():
+        paths[name] = tmp_path / f"{name}.parquet"
+        df.to_parquet(paths[name], index=False)
+    monkeypatch.setattr(build_marts, "FACTS", paths)
+
+
+def _full_marts(tmp_path, monkeypatch):
+    monkeypatch.setattr(build_marts, "MARTS_DIR", tmp_path / "full")
+    build_marts.main([])
+    monkeypatch.setattr(build_marts, "MARTS_DIR", tmp_path / "marts")
+    return {name: pd.read_parquet(tmp_path / "full" / f"{name}.parquet") for name in build_marts.MARTS}
+
+
+def test_incremental_refresh_matches_full_rebuild(mart_dirs, monkeypatch, capsys):
+    mtrs = pd.read_parquet(build_marts.FACTS["fact_national_retail_sales"])
+    msrs = pd.read_parquet(build_marts.FACTS["fact_state_retail_growth"])
+    last = mtrs["date"].max()
+
+    # Initial load without the latest month, then Census publishes it.
+    _write_facts(mart_dirs, monkeypatch, {
+        "fact_national_retail_sales": mtrs[mtrs["date"] < last],
+        "fact_state_retail_growth": msrs[msrs["date"] < last],
+    })
+    build_marts.main(["--incremental"])
+    _write_facts(mart_dirs, monkeypatch, {"fact_national_retail_sales": mtrs, "fact_state_retail_growth": msrs})
+    build_marts.main(["--incremental"])
+    assert "marts_market_trends: 1 of 36 months (incremental)" in capsys.readouterr().out
+
+    # A revision to a mid-history month invalidates it plus the 12 months of YoY after it.
+    revised = mtrs.copy()
+    revised.loc[revised["date"] == "2023-03", "sales_amount"] *= 1.01
+    _write_facts(mart_dirs, monkeypatch, {"fact_national_retail_sales": revised, "fact_state_retail_growth": msrs})
+    build_marts.main(["--incremental"])
+    out = capsys.readouterr().out
+    assert "marts_market_trends: 13 of 36 months (incremental)" in out
+    assert "marts_growth_contribution: 0 of 36 months (incremental)" in out
+
+    incremental = {name: pd.read_parquet(mart_dirs / "marts" / f"{name}.parquet") for name in build_marts.MARTS}
+    full = _full_marts(mart_dirs, monkeypatch)
+    for name in build_marts.MARTS:
+        pd.testing.assert_frame_equal(incremental[name], full[name], rtol=1e-12)
+
+
+def test_rank_index_serves_any_top_n(tmp_path, monkeypatch):
+    rng = np.random.default_rng(1)
+    states = [f"S{i:02d}" for i in range(12)]
+    msrs = pd.DataFrame(
+        {
+            "date": np.repeat(["2024-01", "2024-02"], len(states) * 2),
+            "state": np.tile(np.repeat(states, 2), 2),
+            "industry": np.tile(["Food", "Motor Vehicles"], len(states) * 2),
+            "yoy_pct": rng.normal(1, 4, len(states) * 4),
+        }
+    )
+    msrs["month_date"] = pd.to_datetime(msrs["date"])
+    msrs["region"] = np.where(msrs["state"] < "S06", "West", "South")
+    msrs.loc[3, "yoy_pct"] = np.nan
+    mtrs = pd.DataFrame({"date": ["2024-01"], "month_date": pd.to_datetime(["2024-01"]), "industry": ["Food"], "sales_amount": [1.0]})
+    _write_facts(tmp_path, monkeypatch, {"fact_national_retail_sales": mtrs, "fact_state_retail_growth": msrs})
+    monkeypatch.setattr(build_marts, "MARTS_DIR", tmp_path / "marts")
+    monkeypatch.setattr(build_marts, "PUBLISHED_DIR", tmp_path / "published")
+    assert build_marts.main([]) == 0
+
+    index = pd.read_parquet(tmp_path / "marts" / "marts_growth_rank_index.parquet")
+    assert len(index) == len(msrs) + 2 * len(states)  # plus one 'All Industries' row per state and month
+    assert not index.duplicated(["date", "industry", "state_rank"]).any()
+
+    all_ind = msrs.groupby(["date", "state"])["yoy_pct"].mean().clip(lower=0).rename("pos_yoy").reset_index()
+    for n in (3, 5, 10, 20):
+        expected = all_ind.groupby("date")["pos_yoy"].apply(lambda g: g.nlargest(n).sum() / g.sum())
+        got = index[(index["industry"] == "All Industries") & (index["state_rank"] <= n)].groupby("date")["cum_pos_share"].max()
+        np.testing.assert_allclose(got.to_numpy(), expected.to_numpy(), rtol=1e-12)
+
+    region = index[(index["industry"] == "Food") & (index["region"] == "West") & (index["date"] == "2024-01")]
+    assert region["region_rank"].tolist() == sorted(region["region_rank"])
+    assert region["region_cum_pos_share"].iloc[-1] == pytest.approx(1.0)
+
+    growth = pd.read_parquet(tmp_path / "marts" / "marts_growth_contribution.parquet")
+    top5 = index.loc[index["state_rank"] <= 5, ["date", "industry", "state"]]
+    flagged = growth.loc[growth["topN_flag"] == "Top5", ["date", "industry", "state"]]
+    assert len(top5.merge(flagged)) == len(top5) == len(flagged)
+
+
+def test_rollup_cube_levels_agree(mart_dirs):
+    assert build_marts.main([]) == 0
+    cube = pd.read_parquet(mart_dirs / "marts" / "marts_growth_rollup.parquet")
+    index = pd.read_parquet(mart_dirs / "marts" / "marts_growth_rank_index.parquet")
+    growth = pd.read_parquet(mart_dirs / "marts" / "marts_growth_contribution.parquet")
+
+    assert set(cube["geo_level"]) == {"national", "region", "division", "state"}
+    assert cube["division"].notna()[cube["geo_level"].isin(["division", "state"])].all()
+    # Every level splits the month x industry's positive growth completely.
+    totals = cube.groupby(["date", "industry", "geo_level"])["contribution"].sum()
+    np.testing.assert_allclose(totals.dropna().to_numpy(), 1.0)
+    assert not cube.duplicated(["date", "industry", "geo_level", "geo_rank"]).any()
+
+    states = cube[cube["geo_level"] == "state"].merge(index, on=["date", "industry", "state"], suffixes=("", "_index"))
+    assert len(states) == len(index)
+    assert (states["geo_rank"] == states["state_rank"]).all()
+    np.testing.assert_allclose(states["pos_yoy"], states["pos_yoy_index"])
+
+    regions = cube[cube["geo_level"] == "region"].merge(
+        growth[["date", "industry", "region", "region_contribution"]].drop_duplicates(), on=["date", "industry", "region"]
+    )
+    np.testing.assert_allclose(regions["contribution"], regions["region_contribution"], rtol=1e-12)
+
+
+def test_incremental_rollup_rebuilds_on_reference_edit(mart_dirs, monkeypatch, capsys):
+    mapping = pd.read_csv(build_marts.REFERENCE["state_region_map"], dtype=str)
+    path = mart_dirs / "state_region_map.csv"
+    mapping.to_csv(path, index=False)
+    monkeypatch.setattr(build_marts, "REFERENCE", {"state_region_map": path})
+    build_marts.main(["--incremental"])
+    capsys.readouterr()
+
+    mapping.loc[mapping["state_abbr"] == "CA", "division"] = "California"
+    mapping.to_csv(path, index=False)
+    build_marts.main(["--incremental"])
+    out = capsys.readouterr().out
+    assert "marts_growth_rollup: 36 of 36 months (full)" in out
+    assert "marts_growth_rank_index: 0 of 36 months (incremental)" in out
+
+    rollup = pd.read_parquet(mart_dirs / "marts" / "marts_growth_rollup.parquet")
+    assert (rollup.loc[rollup["state"] == "CA", "division"] == "California").all()
+
+
+def test_rollup_keeps_unmapped_states_out_of_subtotals(mart_dirs, monkeypatch):
+    mapping = pd.read_csv(build_marts.REFERENCE["state_region_map"], dtype=str)
+    path = mart_dirs / "state_region_map.csv"
+    mapping[mapping["state_abbr"] != "CA"].to_csv(path, index=False)
+    monkeypatch.setattr(build_marts, "REFERENCE", {"state_region_map": path})
+    build_marts.main([])
+
+    cube = pd.read_parquet(mart_dirs / "marts" / "marts_growth_rollup.parquet")
+    ca = cube[cube["state"] == "CA"]
+    assert (ca["division"] == "Unmapped").all() and (ca["parent_name"] == "Unmapped").all()
+    unmapped = cube[(cube["geo_level"] == "division") & (cube["division"] == "Unmapped")]
+    assert (unmapped["geo_name"] == "Unmapped").all() and (unmapped["states"] == 1).all()
+    assert len(unmapped) == len(ca)
+    # Subtotal rows are still one per month x industry at the region and national levels.
+    assert not cube[cube["geo_level"] != "state"].duplicated(["date", "industry", "geo_level", "geo_name"]).any()
+    assert (cube.loc[cube["geo_level"] != "national", "geo_name"] != "United States").all()
+
+
+def test_in_memory_build_matches_parquet_build(mart_dirs):
+    from fact_store import read_fact, to_arrow
+
+    build_marts.main([])
+    facts = {name: to_arrow(read_fact(path)) for name, path in build_marts.FACTS.items()}
+    marts = build_marts.build_in_memory(facts, jobs=2)
+    assert list(marts) == list(build_marts.MARTS)
+    for name, table in marts.items():
+        on_disk = pd.read_parquet(mart_dirs / "marts" / f"{name}.parquet")
+        pd.testing.assert_frame_equal(table.to_pandas(), on_disk)
+
+    build_marts.export_arrow("marts_growth_rank_index", marts["marts_growth_rank_index"])
+    build_marts.flush()
+    assert len(pd.read_csv(mart_dirs / "published" / "marts_growth_rank_index.csv")) == marts["marts_growth_rank_index"].num_rows
+
+
+def test_catalog_refresh_rebuilds_only_what_changed(mart_dirs, monkeypatch):
+    import catalog
+    from fact_store import read_fact
+
+    mtrs = pd.read_parquet(build_marts.FACTS["fact_national_retail_sales"])
+    msrs = pd.read_parquet(build_marts.FACTS["fact_state_retail_growth"])
+    _write_facts(mart_dirs, monkeypatch, {"fact_national_retail_sales": mtrs, "fact_state_retail_growth": msrs})
+    path = mart_dirs / "catalog.duckdb"
+
+    con = catalog.open_catalog(path)
+    assert set(catalog.refresh(con)) == {*build_marts.FACTS, *build_marts.REFERENCE, *build_marts.MARTS}
+    assert catalog.refresh(con) == []
+
+    # A revised state fact reloads it and rebuilds only the marts downstream of it.
+    revised = msrs.copy()
+    revised.loc[revised["date"] == "2023-03", "yoy_pct"] += 0.5
+    revised.to_parquet(build_marts.FACTS["fact_state_retail_growth"], index=False)
+    assert catalog.refresh(con) == [
+        "fact_state_retail_growth",
+        "marts_growth_rank_index",
+        "marts_growth_contribution",
+        "marts_growth_rollup",
+    ]
+    con.close()
+
+    # The exported marts match a Parquet build; readers get read_fact's frames.
+    assert build_marts.main(["--catalog", str(path)]) == 0
+    from_catalog = {name: pd.read_parquet(mart_dirs / "marts" / f"{name}.parquet") for name in build_marts.MARTS}
+    full = _full_marts(mart_dirs, monkeypatch)
+    for name in build_marts.MARTS:
+        pd.testing.assert_frame_equal(from_catalog[name], full[name])
+
+    con = catalog.open_catalog(path, read_only=True)
+    catalog.check_current(con)
+    for name, fact_path in build_marts.FACTS.items():
+        filters = {"date_start": "2023-01", "industries": ["General Merchandise"]}
+        # read_fact's categories are whatever dictionary the row groups it read carry.
+        expected = read_fact(fact_path, **filters)
+        got = catalog.read_table(con, name, **filters)
+        pd.testing.assert_frame_equal(got, expected, check_categorical=False)
+        for col in expected.select_dtypes("category"):
+            assert got[col].dtype.ordered == expected[col].dtype.ordered
+            assert list(got[col].cat.categories) == sorted(got[col].unique())
+
+    # Rewriting a fact after the refresh makes the catalog stale; its stored dtypes still apply.
+    msrs.astype({"industry": str}).to_parquet(build_marts.FACTS["fact_state_retail_growth"], index=False)
+    assert catalog.stale(con) == [
+        "fact_state_retail_growth",
+        "marts_growth_rank_index",
+        "marts_growth_contribution",
+        "marts_growth_rollup",
+    ]
+    with pytest.raises(RuntimeError, match="out of date"):
+        catalog.check_current(con)
+    assert isinstance(catalog.read_table(con, "fact_state_retail_growth")["industry"].dtype, pd.CategoricalDtype)
+    con.close()
+
+
+def test_compression_must_be_a_known_codec(mart_dirs):
+    with pytest.raises(SystemExit):
+        build_marts.main(["--compression", "snappy); DROP TABLE x; --"])
+    with pytest.raises(ValueError, match="unknown Parquet compression"):
+        build_marts._parquet_options("brotli", 1000)
+
+
+def test_incremental_lookback_spans_calendar_months_over_gaps(mart_dirs, monkeypatch, capsys):
+    mtrs = pd.read_parquet(build_marts.FACTS["fact_national_retail_sales"])
+    msrs = pd.read_parquet(build_marts.FACTS["fact_state_retail_growth"])
+    gappy = mtrs[~mtrs["date"].isin(["2023-05", "2023-06"])]  # two months never published
+    _write_facts(mart_dirs, monkeypatch, {"fact_national_retail_sales": gappy, "fact_state_retail_growth": msrs})
+    build_marts.main(["--incremental"])
+
+    revised = gappy.copy()
+    revised.loc[revised["date"] == "2024-03", "sales_amount"] *= 1.01
+    _write_facts(mart_dirs, monkeypatch, {"fact_national_retail_sales": revised, "fact_state_retail_growth": msrs})
+    build_marts.main(["--incremental"])
+    assert "marts_market_trends: 10 of 34 months (incremental)" in capsys.readouterr().out
+
+    incremental = pd.read_parquet(mart_dirs / "marts" / "marts_market_trends.parquet")
+    full = _full_marts(mart_dirs, monkeypatch)["marts_market_trends"]
+    pd.testing.assert_frame_equal(incremental, full, rtol=1e-12)
+    # Months after the gap compare with the same calendar month, or with nothing.
+    assert incremental.loc[incremental["date"] == "2024-05", "yoy_growth_pct"].isna().all()
+    assert incremental.loc[incremental["date"] == "2023-07", "mom_growth_pct"].isna().all()
@@ -2,57 +2,53 @@ from pathlib import Path
 import pandas as pd
 import pytest
 
+import validation
+
 REPO_ROOT = Path(__file__).resolve().parents[1]
 MTRS_PATH = REPO_ROOT / "data" / "processed" / "fact_national_retail_sales.parquet"
 MSRS_PATH = REPO_ROOT / "data" / "processed" / "fact_state_retail_growth.parquet"
 
 EXPECTED_MONTHS = pd.period_range("2022-01", "2024-12", freq="M").astype(str).tolist()
-EXPECTED_INDUSTRIES = {
-    "Food & Beverage Stores",
-    "General Merchandise",
-    "Motor Vehicles & Parts",
-    "Clothing & Accessories",
-    "Electronics & Appliances",
-    "Nonstore Retail (E-commerce)",
-    "Other Specialty Retail",
-}
-
-
-def _skip_if_missing():
+EXPECTED_INDUSTRIES = set(validation.EXPECTED_INDUSTRIES)
+
+
+@pytest.fixture(scope="module")
+def checks():
+    """One cached aggregate scan per fact table, shared by every test (and the report)."""
     if not MTRS_PATH.exists() or not MSRS_PATH.exists():
         pytest.skip("Processed fact tables not found. Run scripts/run_pipeline.sh")
+    return {
+        "mtrs": validation.validate(MTRS_PATH, "fact_national_retail_sales"),
+        "msrs": validation.validate(MSRS_PATH, "fact_state_retail_growth"),
+    }
 
 
-def test_coverage_months():
-    _skip_if_missing()
-    mtrs = pd.read_parquet(MTRS_PATH)
-    msrs = pd.read_parquet(MSRS_PATH)
+def test_coverage_months(checks):
+    assert checks["mtrs"]["periods"] == EXPECTED_MONTHS
+    assert checks["msrs"]["periods"] == EXPECTED_MONTHS
 
-    assert sorted(mtrs["date"].unique().tolist()) == EXPECTED_MONTHS
-    assert sorted(msrs["date"].unique().tolist()) == EXPECTED_MONTHS
 
+def test_uniqueness_keys(checks):
+    assert checks["mtrs"]["duplicate_rows"] == 0
+    assert checks["msrs"]["duplicate_rows"] == 0
 
-def test_uniqueness_keys():
-    _skip_if_missing()
-    mtrs = pd.read_parquet(MTRS_PATH)
-    msrs = pd.read_parquet(MSRS_PATH)
 
-    assert mtrs.duplicated(subset=["date", "industry"]).sum() == 0
-    assert msrs.duplicated(subset=["date", "state", "industry"]).sum() == 0
+def test_yoy_range(checks):
+    assert checks["msrs"]["out_of_range"]["yoy_pct"] == 0
 
 
-def test_yoy_range():
-    _skip_if_missing()
-    msrs = pd.read_parquet(MSRS_PATH)
-    out_of_range = msrs[(msrs["yoy_pct"] < -100) | (msrs["yoy_pct"] > 300)]
-    assert len(out_of_range) == 0
+def test_industry_set(checks):
+    assert set(checks["mtrs"]["values"]["industry"]) == EXPECTED_INDUSTRIES
+    # MSRS lacks Nonstore Retail (expected)
+    assert set(checks["msrs"]["values"]["industry"]).issubset(EXPECTED_INDUSTRIES)
 
 
-def test_industry_set():
-    _skip_if_missing()
-    mtrs = pd.read_parquet(MTRS_PATH)
-    msrs = pd.read_parquet(MSRS_PATH)
+def test_region_mapping(checks):
+    assert checks["msrs"]["nulls"]["region"] == 0
 
-    assert set(mtrs["industry"].unique()) == EXPECTED_INDUSTRIES
-    # MSRS lacks Nonstore Retail (expected)
-    assert set(msrs["industry"].unique()).issubset(EXPECTED_INDUSTRIES)
+
+def test_every_state_maps_to_a_division(checks):
+    mapping = pd.read_csv(REPO_ROOT / "data" / "reference" / "state_region_map.csv", dtype=str)
+    mapped = set(mapping.loc[mapping["division"].notna() & mapping["region"].notna(), "state_abbr"])
+    states = set(pd.read_parquet(MSRS_PATH, columns=["state"])["state"].astype(str))
+    assert states <= mapped, sorted(states - mapped)
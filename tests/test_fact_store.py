@@ -0,0 +1,75 @@
+import duckdb
+import pandas as pd
+
+import fact_store
+
+
+def _state_fact():
+    df = pd.DataFrame(
+        {
+            "date": ["2024-01", "2024-01", "2024-02", "2024-02"],
+            "state": ["CA", "TX", "CA", "TX"],
+            "region": ["West", "South", "West", "South"],
+            "industry": ["Food & Beverage Stores", "General Merchandise"] * 2,
+            "yoy_pct": [1.0, 2.0, 3.0, None],
+        }
+    )
+    # As written by the transform: categorical dimensions (months ordered) and a native month.
+    df = df.astype({c: "category" for c in ["state", "region", "industry"]})
+    df["date"] = df["date"].astype(pd.CategoricalDtype(["2024-01", "2024-02"], ordered=True))
+    df.insert(1, "month_date", pd.to_datetime(df["date"].astype(str)).astype("datetime64[ms]"))
+    return df
+
+
+def test_partitioned_roundtrip_with_filters(tmp_path):
+    path = tmp_path / "fact_state_retail_growth.parquet"
+    df = _state_fact()
+
+    written = fact_store.write_fact(df, path, partitioned=True)
+    assert written == tmp_path / "fact_state_retail_growth"
+    assert not path.exists()
+    assert fact_store.resolve(path) == written
+
+    full = fact_store.read_fact(path)
+    assert list(full.columns) == fact_store.COLUMNS["fact_state_retail_growth"]
+    pd.testing.assert_frame_equal(full.sort_values(["date", "state"], ignore_index=True), df)
+
+    sliced = fact_store.read_fact(path, date_start="2024-02", industries=["Food & Beverage Stores"])
+    assert sliced[["date", "state"]].values.tolist() == [["2024-02", "CA"]]
+    assert sliced["date"].cat.categories.tolist() == ["2024-02"]
+
+    count = duckdb.sql(
+        f"SELECT count(*) FROM {fact_store.scan_sql(path)} WHERE industry = 'General Merchandise'"
+    ).fetchone()[0]
+    assert count == 2
+
+    # Switching back to a single file removes the dataset directory.
+    fact_store.write_fact(df, path)
+    assert fact_store.resolve(path) == path and not written.exists()
+
+
+def test_month_date_stored_as_parquet_date_and_derived_for_old_files(tmp_path):
+    path = tmp_path / "fact_state_retail_growth.parquet"
+    df = _state_fact()
+    fact_store.write_fact(df, path)
+    assert duckdb.sql(f"SELECT typeof(month_date) FROM {fact_store.scan_sql(path)} LIMIT 1").fetchone()[0] == "DATE"
+
+    # Files from before month_date existed get it parsed from the distinct YYYY-MM strings.
+    df.drop(columns="month_date").to_parquet(path, index=False)
+    legacy = fact_store.read_fact(path)
+    assert list(legacy.columns) == fact_store.COLUMNS["fact_state_retail_growth"]
+    assert (legacy["month_date"] == df["month_date"]).all()
+
+
+def test_fact_frame_filters_arrow_like_read_fact(tmp_path):
+    path = tmp_path / "fact_state_retail_growth.parquet"
+    df = _state_fact()
+    fact_store.write_fact(df, path)
+    table = fact_store.to_arrow(df)
+
+    filters = {"date_start": "2024-02", "industries": ["General Merchandise"]}
+    pd.testing.assert_frame_equal(fact_store.fact_frame(table), fact_store.read_fact(path))
+    sliced = fact_store.fact_frame(table, **filters)
+    # Category sets of a filtered read depend on the Parquet dictionaries; compare values.
+    pd.testing.assert_frame_equal(sliced.astype(object), fact_store.read_fact(path, **filters).astype(object))
+    assert sliced[["date", "state"]].values.tolist() == [["2024-02", "TX"]]
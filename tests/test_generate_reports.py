@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import generate_reports as gr
+
+
+def _loop_topn_share(all_ind, n):
+    """Reference: the per-month sort/head loop the metrics engine replaced."""
+    shares = {}
+    for d, g in all_ind.groupby("date_dt"):
+        total_pos = g["pos_yoy"].sum()
+        shares[d] = np.nan if total_pos == 0 else g.sort_values("pos_yoy", ascending=False).head(n)["pos_yoy"].sum() / total_pos * 100
+    return pd.Series(shares)
+
+
+def _state_fact(all_ind):
+    """One-industry state fact rows, so the all-industry mean is the state's YoY itself."""
+    return pd.DataFrame(
+        {
+            "date": all_ind["date_dt"].dt.strftime("%Y-%m"),
+            "state": all_ind["state"],
+            "region": "South",
+            "industry": "Food",
+            "yoy_pct": all_ind["yoy_pct"],
+        }
+    )
+
+
+def test_topn_shares_match_reference_loop():
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2022-01-01", periods=24, freq="MS")
+    all_ind = pd.DataFrame(
+        {
+            "date_dt": np.repeat(dates, 51),
+            "state": np.tile([f"S{i:02d}" for i in range(51)], len(dates)),
+            "yoy_pct": rng.normal(2, 5, len(dates) * 51),
+        }
+    )
+    all_ind.loc[rng.choice(len(all_ind), 40, replace=False), "yoy_pct"] = np.nan
+    all_ind.loc[all_ind["date_dt"] == dates[3], "yoy_pct"] = -1.0  # no positive growth that month
+    all_ind["pos_yoy"] = all_ind["yoy_pct"].clip(lower=0)
+
+    shares = gr._topn_shares(_state_fact(all_ind), [3, 5, 10]).set_index("date_dt")
+    for n in (3, 5, 10):
+        expected = _loop_topn_share(all_ind, n)
+        np.testing.assert_allclose(shares[f"top{n}_share_pct"].to_numpy(), expected.to_numpy(), rtol=1e-12)
+    assert np.isnan(shares.loc[dates[3], "top5_share_pct"])
+
+
+def test_topn_shares_from_rank_index_match_ranking():
+    rng = np.random.default_rng(2)
+    dates = pd.date_range("2022-01-01", periods=6, freq="MS")
+    all_ind = pd.DataFrame(
+        {
+            "date_dt": np.repeat(dates, 8),
+            "state": np.tile([f"S{i}" for i in range(8)], len(dates)),
+            "yoy_pct": rng.normal(1, 5, len(dates) * 8),
+        }
+    )
+    all_ind.loc[all_ind["date_dt"] == dates[2], "yoy_pct"] = -2.0
+    all_ind["pos_yoy"] = all_ind["yoy_pct"].clip(lower=0)
+
+    # The rank index rows as the marts_growth_rank_index SQL lays them out.
+    index = all_ind.sort_values(["date_dt", "pos_yoy", "state"], ascending=[True, False, True], ignore_index=True)
+    index["state_rank"] = index.groupby("date_dt").cumcount() + 1
+    total = index.groupby("date_dt")["pos_yoy"].transform("sum")
+    index["cum_pos_share"] = index.groupby("date_dt")["pos_yoy"].cumsum() / total.where(total != 0)
+    index = index.rename(columns={"date_dt": "month_date"})
+
+    ns = [3, 5, 20]  # 20 exceeds the 8 states: everything is in the top 20
+    expected = gr._topn_shares(_state_fact(all_ind), ns)
+    got = gr._topn_shares_from_index(index, ns)
+    pd.testing.assert_frame_equal(got, expected, rtol=1e-12)
+    np.testing.assert_allclose(got.loc[got["date_dt"] != dates[2], "top20_share_pct"], 100.0)
+
+
+def test_figures_skip_unchanged_inputs(tmp_path, monkeypatch):
+    monkeypatch.setattr(gr, "FIG_DIR", tmp_path)
+    dates = pd.date_range("2023-01-01", periods=24, freq="MS")
+    total = pd.DataFrame({"date_dt": dates, "sales_amount": np.linspace(100, 200, 24)})
+    total["mom_growth_pct"] = total["sales_amount"].pct_change() * 100
+    total["yoy_growth_pct"] = total["sales_amount"].pct_change(12) * 100
+    metrics = {
+        "total": total,
+        "industry_share": pd.DataFrame({"date_dt": dates, "industry": "Total", "share_pct": 100.0}),
+        "topn_share": pd.DataFrame({"date_dt": dates, "top5_share_pct": 30.0}),
+    }
+
+    assert sorted(gr._figures(metrics, jobs=2)) == sorted(gr.FIGURES)
+    assert gr._figures(metrics) == []
+
+    metrics["topn_share"] = metrics["topn_share"].assign(top5_share_pct=35.0)
+    assert gr._figures(metrics) == ["top5_growth_share_trend.png"]
+
+
+def test_fanout_renders_each_chart_once(tmp_path):
+    dates = pd.date_range("2023-01-01", periods=24, freq="MS")
+    industry_yoy = pd.DataFrame(
+        {"date_dt": np.tile(dates, 2), "industry": np.repeat(["Food", "Motor Vehicles"], 24), "yoy_growth_pct": 1.0}
+    )
+    total = pd.DataFrame({"date_dt": dates, "yoy_growth_pct": 2.0})
+    state_yoy = pd.DataFrame(
+        {
+            "date_dt": np.tile(dates, 2),
+            "state": np.repeat(["CA", "NV"], 24),
+            "region": "West",
+            "industry": "Food",
+            "yoy_pct": np.arange(48, dtype=float),
+        }
+    )
+    metrics = {"total": total, "industry_yoy": industry_yoy, "state_yoy": state_yoy}
+
+    timings = gr._fanout_figures(metrics, out_dir=tmp_path, batch_size=2)
+    assert set(timings["chart"]) == {
+        "industry/food", "industry/motor_vehicles", "region/west-food", "state/CA-food", "state/NV-food"
+    }
+    assert (timings["status"] == "rendered").all()
+    assert (tmp_path / "state" / "CA-food.png").exists()
+
+    assert (gr._fanout_figures(metrics, out_dir=tmp_path)["status"] == "skipped").all()
+
+
+def test_report_for_mrts_only_industry(tmp_path, monkeypatch):
+    monkeypatch.setattr(gr, "DOCS_DIR", tmp_path)
+    monkeypatch.setattr(gr, "FIG_DIR", tmp_path / "figures")
+    monkeypatch.setattr(gr, "FANOUT_DIR", tmp_path / "figures" / "fanout")
+    dates = pd.date_range("2023-01-01", periods=24, freq="MS")
+    industry = "Nonstore Retail (E-commerce)"  # published nationally only, so no state rows
+    mtrs = pd.DataFrame(
+        {
+            "date": dates.strftime("%Y-%m"),
+            "month_date": dates,
+            "industry": industry,
+            "sales_amount": np.linspace(100, 200, 24),
+        }
+    )
+    msrs = pd.DataFrame(
+        {
+            "date": pd.Series(dtype=str),
+            "month_date": pd.Series(dtype="datetime64[ms]"),
+            "state": pd.Series(dtype=str),
+            "region": pd.Series(dtype=str),
+            "industry": pd.Series(dtype=str),
+            "yoy_pct": pd.Series(dtype=float),
+        }
+    )
+
+    gr.report(mtrs, msrs, None, None, None, fan_out=True, industries=[industry])
+
+    snapshot = pd.read_csv(tmp_path / "metrics_snapshot.csv").set_index("metric")
+    assert snapshot.loc["total_sales", "latest_value"] == 200.0
+    assert snapshot.loc["top5_state_growth_share_pct"].isna().all()
+    assert not (tmp_path / "figures" / "top5_growth_share_trend.png").exists()
+    assert (tmp_path / "figures" / "total_sales_trend.png").exists()
+    assert "MSRS missing months = 0" in (tmp_path / "data_validation.md").read_text(encoding="utf-8")
+
+
+def test_filtered_report_keeps_yoy_history_and_its_own_directory(tmp_path, monkeypatch):
+    if not (gr.PROCESSED_DIR / "fact_national_retail_sales.parquet").exists():
+        pytest.skip("Processed fact tables not found. Run scripts/run_pipeline.sh")
+    monkeypatch.setattr(gr, "DOCS_DIR", tmp_path)
+    monkeypatch.setattr(gr, "FIG_DIR", tmp_path / "figures")
+    monkeypatch.setattr(gr, "REPORTS_DIR", tmp_path / "reports")
+    monkeypatch.setattr(gr, "MARTS_DIR", tmp_path / "no_marts")  # rank the facts in both runs
+
+    gr.main([])
+    gr.main(["--start", "2024-01"])
+
+    window = tmp_path / "reports" / "2024-01_last"
+    full = pd.read_csv(tmp_path / "metrics_snapshot.csv").set_index("metric")
+    filtered = pd.read_csv(window / "metrics_snapshot.csv").set_index("metric")
+    assert filtered.loc["yoy_growth_pct"].notna().all()
+    pd.testing.assert_frame_equal(filtered, full)  # the unfiltered last 12 months are 2024
+    assert (window / "figures" / "total_sales_trend.png").exists()
+
+    mtrs, msrs = gr._load()
+    metrics = gr._compute_metrics(mtrs, msrs)
+    pd.testing.assert_frame_equal(
+        gr._compute_metrics(*gr._load(gr._history_start("2024-01")), date_start="2024-01")["total"],
+        metrics["total"][metrics["total"]["date_dt"] >= "2024-01-01"].reset_index(drop=True),
+    )
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import growth_cube
+from growth_cube import GrowthCube
+
+
+def _fact():
+    rng = np.random.default_rng(3)
+    states = ["CA", "NY", "TX", "WA"]
+    df = pd.DataFrame(
+        {
+            "date": np.repeat(["2024-01", "2024-02", "2024-03"], 8),
+            "state": np.tile(np.repeat(states, 2), 3),
+            "industry": np.tile(["Food", "Motor"], 12),
+            "yoy_pct": rng.normal(1, 4, 24),
+        }
+    )
+    df["region"] = df["state"].map({"CA": "West", "WA": "West", "NY": "Northeast", "TX": "South"})
+    df.loc[5, "yoy_pct"] = np.nan
+    return df.drop(index=[22, 23]).reset_index(drop=True)  # WA has no March rows
+
+
+def test_slices_match_long_table():
+    df = _fact()
+    cube = GrowthCube.from_frame(df)
+    assert cube.values.shape == (3, 4, 2) and cube.values.dtype == np.float32
+    assert cube.mask.sum() == df["yoy_pct"].notna().sum()
+
+    ny_food = df[(df["state"] == "NY") & (df["industry"] == "Food")]["yoy_pct"].to_numpy(dtype=np.float32)
+    np.testing.assert_array_equal(cube.sel(state="NY", industry="Food"), ny_food)
+    assert cube.sel(date=["2024-03", "2024-01"], state="TX").shape == (2, 2)
+    assert np.isnan(cube.sel(date="2024-03", state="WA")).all()
+    with pytest.raises(KeyError):
+        cube.sel(state="ZZ")
+
+    mean = df.groupby(["date", "state"])["yoy_pct"].mean().unstack()
+    np.testing.assert_allclose(cube.all_industries(), mean.to_numpy(), rtol=1e-6, atol=1e-6)  # float32
+
+    positive = cube.positive(cube.all_industries())
+    regions = cube.region_sums(positive)
+    by_region = pd.DataFrame(positive, columns=cube.states).T.groupby(df.groupby("state")["region"].first()).sum().T
+    np.testing.assert_allclose(regions, by_region[list(cube.regions)].to_numpy(), rtol=1e-6)
+
+
+def test_cached_cube_is_memory_mapped(tmp_path, monkeypatch):
+    path = tmp_path / "fact_state_retail_growth.parquet"
+    _fact().to_parquet(path, index=False)
+    monkeypatch.setattr(growth_cube, "CACHE_DIR", tmp_path / "cube")
+
+    first = growth_cube.load_cube(path)
+    second = growth_cube.load_cube(path)
+    assert isinstance(second.values, np.memmap)
+    assert len(list((tmp_path / "cube").iterdir())) == 1
+    np.testing.assert_array_equal(first.values, second.values)
+    assert second.states == ("CA", "NY", "TX", "WA")
+    assert [second.regions[i] for i in second.state_region] == ["West", "Northeast", "South", "West"]
+    np.testing.assert_allclose(second.topn_shares([1, 10])[:, 1], 100.0)
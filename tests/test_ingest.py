@@ -0,0 +1,149 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import ingest_common
+
+
+class _CensusStandIn(BaseHTTPRequestHandler):
+    """Serves one file with ETag/Last-Modified validators and byte-range support."""
+
+    body = b""
+    etag = '"v1"'
+    last_modified = "Wed, 01 Jan 2025 00:00:00 GMT"
+    log: list = []
+
+    def do_GET(self):
+        cls = type(self)
+        cls.log.append({k: v for k, v in self.headers.items()})
+
+        if self.headers.get("If-None-Match") == cls.etag:
+            cls.log[-1]["status"] = 304
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        body, status = cls.body, 200
+        rng = self.headers.get("Range")
+        if rng and self.headers.get("If-Range") in (cls.etag, cls.last_modified):
+            start = int(rng.split("=")[1].rstrip("-"))
+            body, status = cls.body[start:], 206
+
+        cls.log[-1]["status"] = status
+        self.send_response(status)
+        self.send_header("ETag", cls.etag)
+        self.send_header("Last-Modified", cls.last_modified)
+        self.send_header("Content-Length", str(len(body)))
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{len(cls.body) - 1}/{len(cls.body)}")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _CensusStandIn.body = b"state,yy202401\nCA,1.5\n" * 1000
+    _CensusStandIn.etag = '"v1"'
+    _CensusStandIn.log = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _CensusStandIn)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/retail/state_retail_yy.csv"
+    httpd.shutdown()
+
+
+def test_unchanged_file_returns_304(server, tmp_path):
+    assert ingest_common.download_all([server], tmp_path) == [tmp_path / "state_retail_yy.csv"]
+    assert (tmp_path / "state_retail_yy.csv").read_bytes() == _CensusStandIn.body
+
+    manifest = ingest_common.load_manifest(tmp_path)[server]
+    assert manifest["etag"] == '"v1"'
+    assert manifest["size"] == len(_CensusStandIn.body)
+
+    assert ingest_common.download_all([server], tmp_path) == []
+    assert _CensusStandIn.log[-1]["status"] == 304
+
+    _CensusStandIn.body += b"TX,2.0\n"
+    _CensusStandIn.etag = '"v2"'
+    assert ingest_common.download_all([server], tmp_path) == [tmp_path / "state_retail_yy.csv"]
+    assert (tmp_path / "state_retail_yy.csv").read_bytes() == _CensusStandIn.body
+
+
+def test_partial_download_resumes_with_range(server, tmp_path):
+    half = len(_CensusStandIn.body) // 2
+    (tmp_path / ".state_retail_yy.csv.part").write_bytes(_CensusStandIn.body[:half])
+    ingest_common.save_manifest(tmp_path, {server: {"partial": {"etag": '"v1"', "last_modified": None}}})
+
+    ingest_common.download_all([server], tmp_path)
+
+    assert _CensusStandIn.log[-1]["Range"] == f"bytes={half}-"
+    assert _CensusStandIn.log[-1]["status"] == 206
+    assert (tmp_path / "state_retail_yy.csv").read_bytes() == _CensusStandIn.body
+    assert not (tmp_path / ".state_retail_yy.csv.part").exists()
+
+
+class _Response:
+    def __init__(self, status, body=b"", headers=None):
+        self.status_code, self.body = status, body
+        self.headers = {"ETag": '"v2"', **(headers or {})}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        yield self.body
+
+
+class _Session:
+    """Replays canned responses and records the headers of each request."""
+
+    def __init__(self, *responses):
+        self.responses, self.sent = list(responses), []
+
+    def get(self, url, headers, **kwargs):
+        self.sent.append(dict(headers))
+        return self.responses.pop(0)
+
+
+def test_misplaced_range_restarts_without_range(tmp_path):
+    url = "https://example.test/state_retail_yy.csv"
+    part = tmp_path / ".state_retail_yy.csv.part"
+    part.write_bytes(b"0123")
+    manifest = {url: {"partial": {"etag": '"v1"', "last_modified": None}}}
+    session = _Session(
+        _Response(206, b"456789", {"Content-Range": "bytes 0-5/10"}),  # ignores our offset
+        _Response(200, b"full body"),
+    )
+
+    assert ingest_common.download(session, url, tmp_path / "state_retail_yy.csv", manifest)
+
+    assert session.sent[0]["Range"] == "bytes=4-"
+    assert "Range" not in session.sent[1] and "If-Range" not in session.sent[1]
+    assert (tmp_path / "state_retail_yy.csv").read_bytes() == b"full body"
+    assert not part.exists()
+
+
+def test_not_modified_clears_partial_in_saved_manifest(tmp_path):
+    url = "https://example.test/state_retail_yy.csv"
+    (tmp_path / "state_retail_yy.csv").write_bytes(b"body")
+    (tmp_path / ".state_retail_yy.csv.part").write_bytes(b"bo")
+    manifest = {url: {"etag": '"v1"', "sha256": "abc", "partial": {"etag": '"v1"', "last_modified": None}}}
+    ingest_common.save_manifest(tmp_path, manifest)
+
+    assert not ingest_common.download(_Session(_Response(304)), url, tmp_path / "state_retail_yy.csv", manifest)
+
+    assert ingest_common.load_manifest(tmp_path)[url] == {"etag": '"v1"', "sha256": "abc"}
+    assert not (tmp_path / ".state_retail_yy.csv.part").exists()
@@ -0,0 +1,69 @@
+import json
+
+import pandas as pd
+import pytest
+
+import instrument
+
+
+def _records(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_steps_log_rows_bytes_and_status(tmp_path, monkeypatch):
+    log = tmp_path / "run_log.jsonl"
+    monkeypatch.setenv("PIPELINE_RUN_LOG", str(log))
+    monkeypatch.setenv("PIPELINE_RUN_ID", "test-run")
+    src = tmp_path / "in.csv"
+    src.write_text("a\n1\n2\n", encoding="utf-8")
+
+    @instrument.instrumented("stage")
+    def load():
+        instrument.current().read(src)
+        instrument.current().add_rows_in(2)
+        return pd.DataFrame({"a": [1, 2]})
+
+    with instrument.step("stage", "main"):
+        load()
+        with pytest.raises(ValueError):
+            with instrument.step("stage", "broken"):
+                raise ValueError("boom")
+
+    inner, broken, outer = _records(log)
+    assert (inner["step"], inner["rows_in"], inner["rows_out"]) == ("load", 2, 2)
+    assert inner["bytes_read"] == src.stat().st_size
+    assert broken["status"] == "error: ValueError"
+    assert outer["step"] == "main" and outer["bytes_read"] == 0
+    assert {r["run_id"] for r in (inner, broken, outer)} == {"test-run"}
+    assert all(r["wall_s"] >= 0 and r["cpu_s"] >= 0 for r in (inner, broken, outer))
+    assert all("process_peak_rss_mb" in r and "max_rss_mb" not in r for r in (inner, broken, outer))
+
+
+def test_bytes_count_the_paths_given(tmp_path, monkeypatch):
+    monkeypatch.setenv("PIPELINE_RUN_LOG", "off")
+    part_dir = tmp_path / "fact" / "date=2024-01"
+    part_dir.mkdir(parents=True)
+    (part_dir / "part-0.parquet").write_bytes(b"x" * 10)
+
+    with instrument.step("stage", "read") as s:
+        s.read(tmp_path / "fact", tmp_path / "fact.parquet")  # a directory, and a path never written
+
+    assert s.bytes_read == 10
+
+
+def test_profile_env_wraps_matching_steps(tmp_path, monkeypatch):
+    log = tmp_path / "run_log.jsonl"
+    monkeypatch.setenv("PIPELINE_RUN_LOG", str(log))
+    monkeypatch.setenv("PIPELINE_PROFILE", "cprofile,tracemalloc")
+    monkeypatch.setenv("PIPELINE_PROFILE_STEP", "stage.heavy")
+    monkeypatch.setattr(instrument, "PROFILE_DIR", tmp_path / "profiles")
+
+    with instrument.step("stage", "light"):
+        pass
+    with instrument.step("stage", "heavy"):
+        sum(list(range(100_000)))
+
+    light, heavy = _records(log)
+    assert "profile" not in light and "tracemalloc_peak_mb" not in light
+    assert heavy["tracemalloc_peak_mb"] > 0
+    assert (tmp_path / "profiles").joinpath(heavy["profile"].split("/")[-1]).exists()
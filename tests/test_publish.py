@@ -0,0 +1,38 @@
+import gzip
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+import publish
+
+
+def _table():
+    return pa.table({"date": ["2024-01", "2024-02"], "month_date": [1, 2], "industry": ["Food, Drink", "Motor"], "v": [1.0, None]})
+
+
+def test_publish_csv_matches_pandas_and_switches_to_gzip(tmp_path, monkeypatch):
+    path = publish.csv_path(tmp_path, "fact")
+    publish.publish_csv(_table(), path, "test", exclude=["month_date"])
+    assert publish.flush() == [path]
+    expected = _table().to_pandas().drop(columns="month_date").to_csv(index=False)
+    assert path.read_text() == expected
+    assert [p.name for p in tmp_path.iterdir()] == ["fact.csv"]  # no temp files left behind
+
+    monkeypatch.setenv(publish.GZIP_ENV, "1")
+    pq.write_table(_table(), tmp_path / "fact.parquet")
+    gz_path = publish.csv_path(tmp_path, "fact")
+    assert gz_path.name == "fact.csv.gz"
+    publish.publish_csv(tmp_path / "fact.parquet", gz_path, "test")
+    publish.flush()
+    assert not path.exists()
+    assert pd.read_csv(gzip.open(gz_path))["industry"].tolist() == ["Food, Drink", "Motor"]
+
+
+def test_flush_reraises_failed_writes(tmp_path):
+    publish.publish_csv(tmp_path / "missing.parquet", tmp_path / "out.csv", "test")
+    with pytest.raises(duckdb.Error):
+        publish.flush()
+    assert publish.flush() == []
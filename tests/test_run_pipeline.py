@@ -0,0 +1,65 @@
+import run_pipeline as rp
+
+
+def _stage(tmp_path, name, inputs, outputs, deps=()):
+    script = tmp_path / f"{name}.py"
+    log = tmp_path / "runs.log"
+    writes = "".join(f"open({str(o)!r}, 'w').write('x')\n" for o in outputs)
+    script.write_text(f"open({str(log)!r}, 'a').write({name!r} + '\\n')\n{writes}")
+    return rp.Stage(name, script, inputs=tuple(inputs), outputs=tuple(outputs), deps=tuple(deps))
+
+
+def _runs(tmp_path):
+    log = tmp_path / "runs.log"
+    return log.read_text().split() if log.exists() else []
+
+
+def test_unchanged_inputs_skip_stages(tmp_path):
+    raw = tmp_path / "raw.csv"
+    raw.write_text("a,b\n1,2\n")
+    fact, mart = tmp_path / "fact.out", tmp_path / "mart.out"
+    stages = [
+        _stage(tmp_path, "transform", [raw], [fact]),
+        _stage(tmp_path, "marts", [fact], [mart], deps=["transform"]),
+    ]
+    state = tmp_path / "state.json"
+
+    assert rp.run_stages(stages, state_path=state) == 0
+    assert rp.run_stages(stages, state_path=state) == 0
+    assert _runs(tmp_path) == ["transform", "marts"]
+
+    raw.write_text("a,b\n1,3\n")
+    assert rp.run_stages(stages, state_path=state) == 0
+    # transform reruns; its output bytes are identical, so marts stays skipped
+    assert _runs(tmp_path) == ["transform", "marts", "transform"]
+
+    mart.unlink()
+    assert rp.run_stages(stages, state_path=state) == 0
+    assert _runs(tmp_path)[-1] == "marts"
+
+
+def test_failed_stage_is_not_recorded(tmp_path):
+    raw = tmp_path / "raw.csv"
+    raw.write_text("x")
+    stage = _stage(tmp_path, "transform", [raw], [tmp_path / "fact.out"])
+    stage.script.write_text("raise SystemExit(3)\n")
+    state = tmp_path / "state.json"
+
+    assert rp.run_stages([stage], state_path=state) == 3
+    assert "transform" not in rp._load_state(state)["stages"]
+
+
+def test_independent_stages_run_concurrently(tmp_path):
+    raw = tmp_path / "raw.csv"
+    raw.write_text("x")
+    a, b, c = tmp_path / "a.out", tmp_path / "b.out", tmp_path / "c.out"
+    stages = [
+        _stage(tmp_path, "left", [raw], [a]),
+        _stage(tmp_path, "right", [raw], [b]),
+        _stage(tmp_path, "join", [a, b], [c], deps=["left", "right"]),
+    ]
+
+    assert rp.run_stages(stages, state_path=tmp_path / "state.json", jobs=2) == 0
+    runs = _runs(tmp_path)
+    assert sorted(runs[:2]) == ["left", "right"]
+    assert runs[2] == "join"
@@ -0,0 +1,128 @@
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+import serve_marts
+
+
+def _growth_mart():
+    return pd.DataFrame(
+        {
+            "date": ["2024-01"] * 3 + ["2024-02"] * 3,
+            "region": ["West", "South", "West"] * 2,
+            "state": ["CA", "TX", "WA"] * 2,
+            "industry": ["General Merchandise"] * 6,
+            "yoy_pct": [3.0, 2.0, 1.0, 4.0, -1.0, 0.5],
+            "topN_flag": ["Top5"] * 6,
+        }
+    )
+
+
+@pytest.fixture
+def service(tmp_path):
+    _growth_mart().to_parquet(tmp_path / "marts_growth_contribution.parquet", index=False)
+    svc = serve_marts.MartService(marts_dir=tmp_path, pool_size=2, cache_size=2)
+    yield svc
+    svc.close()
+
+
+def _rows(payload):
+    return json.loads(payload)["rows"]
+
+
+def test_filters_cache_and_invalidation(service, tmp_path):
+    params = {"start": ["2024-02"], "region": ["West"], "columns": ["state,yoy_pct"]}
+    payload, content_type, cached = service.query("marts_growth_contribution", params)
+    assert content_type == "application/json" and not cached
+    assert _rows(payload) == [{"state": "CA", "yoy_pct": 4.0}, {"state": "WA", "yoy_pct": 0.5}]
+
+    assert service.query("marts_growth_contribution", params)[2] is True
+
+    # Rebuilding the mart invalidates its cached results.
+    path = tmp_path / "marts_growth_contribution.parquet"
+    _growth_mart().assign(yoy_pct=9.0).to_parquet(path, index=False)
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 1_000_000))
+    payload, _, cached = service.query("marts_growth_contribution", params)
+    assert not cached and {r["yoy_pct"] for r in _rows(payload)} == {9.0}
+
+    arrow, _, _ = service.query("marts_growth_contribution", {"state": ["TX"], "format": ["arrow"]})
+    assert pa.ipc.open_stream(arrow).read_all().num_rows == 2
+
+    with pytest.raises(serve_marts.QueryError):
+        service.query("marts_growth_contribution", {"sales_amount": ["1"]})
+
+
+def test_partition_rewrite_invalidates_cache(tmp_path):
+    mart_dir = tmp_path / "marts_growth_contribution"
+    for date, month in _growth_mart().groupby("date"):
+        (mart_dir / f"date={date}").mkdir(parents=True)
+        month.drop(columns="date").to_parquet(mart_dir / f"date={date}" / "part.parquet", index=False)
+    svc = serve_marts.MartService(marts_dir=tmp_path, pool_size=1)
+    try:
+        params = {"state": ["CA"], "columns": ["yoy_pct"]}
+        assert not svc.query("marts_growth_contribution", params)[2]
+        assert svc.query("marts_growth_contribution", params)[2]
+
+        # An incremental refresh replaces one partition file; the directory itself is untouched.
+        part = mart_dir / "date=2024-02" / "part.parquet"
+        dir_mtime = mart_dir.stat().st_mtime_ns
+        _growth_mart().iloc[3:].drop(columns="date").assign(yoy_pct=7.0).to_parquet(part, index=False)
+        os.utime(part, ns=(part.stat().st_atime_ns, part.stat().st_mtime_ns + 1_000_000))
+        assert mart_dir.stat().st_mtime_ns == dir_mtime
+
+        payload, _, cached = svc.query("marts_growth_contribution", params)
+        assert not cached and sorted(r["yoy_pct"] for r in _rows(payload)) == [3.0, 7.0]
+    finally:
+        svc.close()
+
+
+def test_rank_index_top_n(service, tmp_path):
+    index = _growth_mart().drop(columns="topN_flag")
+    index["state_rank"] = index.groupby("date")["yoy_pct"].rank(ascending=False).astype(int)
+    index["region_rank"] = index.groupby(["date", "region"])["yoy_pct"].rank(ascending=False).astype(int)
+    index.to_parquet(tmp_path / "marts_growth_rank_index.parquet", index=False)
+
+    payload, _, _ = service.query("marts_growth_rank_index", {"max_rank": ["2"], "columns": ["date,state"]})
+    assert _rows(payload) == [
+        {"date": "2024-01", "state": "CA"},
+        {"date": "2024-01", "state": "TX"},
+        {"date": "2024-02", "state": "CA"},
+        {"date": "2024-02", "state": "WA"},
+    ]
+    payload, _, _ = service.query("marts_growth_rank_index", {"max_region_rank": ["1"], "start": ["2024-02"]})
+    assert [r["state"] for r in _rows(payload)] == ["CA", "TX"]
+
+    with pytest.raises(serve_marts.QueryError):
+        service.query("marts_growth_rank_index", {"max_rank": ["top"]})
+
+
+def test_http_endpoint(service):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), serve_marts.make_handler(service))
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{httpd.server_address[1]}"
+    try:
+        with urllib.request.urlopen(f"{base}/marts") as r:
+            assert "marts_growth_contribution" in json.loads(r.read())
+        url = f"{base}/marts/marts_growth_contribution?industry=General%20Merchandise&end=2024-01&format=csv"
+        with urllib.request.urlopen(url) as r:
+            assert r.headers["X-Cache"] == "miss"
+            assert len(r.read().decode().strip().splitlines()) == 4
+        with pytest.raises(urllib.error.HTTPError) as err:
+            urllib.request.urlopen(f"{base}/marts/marts_market_trends")
+        assert err.value.code == 404
+
+        # A corrupt (e.g. half-written) mart file answers 500 with a JSON error.
+        (service.marts_dir / "marts_growth_contribution.parquet").write_bytes(b"not parquet")
+        with pytest.raises(urllib.error.HTTPError) as err:
+            urllib.request.urlopen(f"{base}/marts/marts_growth_contribution?industry=Other")
+        assert err.value.code == 500
+        assert "query failed" in json.loads(err.value.read())["error"]
+    finally:
+        httpd.shutdown()
@@ -0,0 +1,115 @@
+import pandas as pd
+import pytest
+
+import transform_fact_tables as tft
+
+
+@pytest.mark.parametrize(
+    "code, expected",
+    [
+        ("441", "Motor Vehicles & Parts"),
+        (4411, "Motor Vehicles & Parts"),
+        ("4411,4412", "Motor Vehicles & Parts"),
+        ("442,443", "Electronics & Appliances"),
+        ("452", "General Merchandise"),
+        ("45221", "General Merchandise"),
+        ("4541", "Nonstore Retail (E-commerce)"),
+        ("446", "Other Specialty Retail"),
+        ("451211", "Other Specialty Retail"),
+        ("722", None),
+        ("TOTAL", None),
+        ("", None),
+        (None, None),
+    ],
+)
+def test_map_industry_codes(code, expected):
+    df = pd.DataFrame({"naics": [code]})
+    result = tft._map_industry(df, "naics")["industry"].iloc[0]
+    if expected is None:
+        assert pd.isna(result)
+    else:
+        assert result == expected
+
+
+def test_map_industry_broadcasts_unique_codes():
+    codes = ["445", "TOTAL", "4481", None, "445"] * 1000
+    df = tft._map_industry(pd.DataFrame({"naics": codes}), "naics")
+    assert len(df) == len(codes)
+    assert df["industry"].iloc[:5].astype(object).fillna("").tolist() == [
+        "Food & Beverage Stores",
+        "",
+        "Clothing & Accessories",
+        "",
+        "Food & Beverage Stores",
+    ]
+
+
+def test_load_msrs_chunked_matches_whole_file():
+    if not tft._list_files(tft.RAW_MSRS_DIR):
+        pytest.skip("Raw MSRS files not found. Run scripts/ingest_msrs.py")
+    whole = tft.load_msrs()
+    chunked = tft.load_msrs(chunksize=100)
+    pd.testing.assert_frame_equal(whole, chunked, rtol=1e-12)
+
+
+def test_mtrs_workbook_cache_skips_reparse(tmp_path, monkeypatch):
+    workbooks = [p for p in tft._list_files(tft.RAW_MTRS_DIR) if p.suffix.lower() == ".xlsx"]
+    if not workbooks:
+        pytest.skip("Raw MRTS workbook not found. Run scripts/ingest_mtrs.py")
+    monkeypatch.setattr(tft, "MTRS_CACHE_DIR", tmp_path)
+    stem = workbooks[0].stem
+    (tmp_path / f"{stem}-{'0' * 64}-{'0' * 12}").mkdir()  # an older revision of this workbook
+    (tmp_path / f"{stem}-2-{'0' * 64}-{'0' * 12}").mkdir()  # another workbook
+
+    first = tft._load_mtrs_workbook(workbooks[0], [2024, 1900])
+    assert sorted(p.name.startswith(f"{stem}-2-") for p in tmp_path.iterdir()) == [False, True]
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("workbook reopened despite warm cache")
+
+    monkeypatch.setattr(tft, "_read_workbook_sheets", _fail)
+    second = tft._load_mtrs_workbook(workbooks[0], [2024, 1900])
+
+    assert len(first) == len(second) == 1
+    pd.testing.assert_frame_equal(first[0], second[0])
+
+
+def test_open_window_parses_every_year_sheet_in_parallel(tmp_path, monkeypatch):
+    workbooks = [p for p in tft._list_files(tft.RAW_MTRS_DIR) if p.suffix.lower() == ".xlsx"]
+    if not workbooks:
+        pytest.skip("Raw MRTS workbook not found. Run scripts/ingest_mtrs.py")
+    monkeypatch.setattr(tft, "MTRS_CACHE_DIR", tmp_path)
+    monkeypatch.setattr(tft, "DATE_START", "2019-01")
+    monkeypatch.setattr(tft, "DATE_END", None)
+
+    serial = tft._load_mtrs_workbook(workbooks[0], None, use_cache=False)
+    parallel = tft._load_mtrs_workbook(workbooks[0], None, use_cache=False, jobs=2)
+
+    assert [f["date"].min().year for f in serial][:6] == [2019, 2020, 2021, 2022, 2023, 2024]
+    assert len(serial) == len(parallel)
+    for a, b in zip(serial, parallel):
+        pd.testing.assert_frame_equal(a, b)
+
+
+def test_filter_months_open_window_spans_observed_months(monkeypatch):
+    monkeypatch.setattr(tft, "DATE_START", None)
+    monkeypatch.setattr(tft, "DATE_END", "2020-03")
+    df = pd.DataFrame({"date": ["2019-11-01", "2020-02-01", "2020-04-01", "bad"]})
+
+    out = tft._filter_months(df, "date")
+    assert out["date"].astype(str).tolist() == ["2019-11", "2020-02"]
+    assert list(out["date"].cat.categories) == ["2019-11", "2019-12", "2020-01", "2020-02", "2020-03"]
+
+
+def test_mtrs_cache_key_tracks_parser_version(tmp_path, monkeypatch):
+    monkeypatch.setattr(tft, "MTRS_CACHE_DIR", tmp_path)
+    workbook = tmp_path / "book.xlsx"
+    workbook.write_bytes(b"workbook")
+    old = tft._mtrs_cache_dir(workbook)
+    old.mkdir()
+
+    monkeypatch.setattr(tft, "MTRS_PARSER_VERSION", tft.MTRS_PARSER_VERSION + 1)
+    new = tft._mtrs_cache_dir(workbook)
+
+    assert new != old
+    assert not old.exists()  # superseded by the new parser's entry
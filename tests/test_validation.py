@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+import validation
+
+
+def _state_fact():
+    return pd.DataFrame(
+        {
+            "date": ["2024-01", "2024-01", "2024-01", "2024-02", "2024-02"],
+            "state": ["CA", "CA", "TX", "CA", "TX"],
+            "region": ["West", "West", None, "West", "South"],
+            "industry": ["General Merchandise", "General Merchandise", "Food & Beverage Stores", "Pets", "Pets"],
+            "yoy_pct": [1.0, 2.0, np.nan, 450.0, -120.0],
+        }
+    )
+
+
+def test_checks_compile_to_one_scan_and_match_pandas():
+    df = _state_fact()
+    sql, _ = validation.compile_sql(validation.CHECKS["fact_state_retail_growth"], "t")
+    assert sql.count("FROM") == 1
+
+    result = validation.validate(df, "fact_state_retail_growth")
+    assert result["rows"] == 5
+    assert result["periods"] == ["2024-01", "2024-02"]
+    assert result["duplicate_rows"] == df.duplicated(["date", "state", "industry"]).sum() == 1
+    assert result["nulls"] == {"yoy_pct": 1, "region": 1}
+    assert (result["min"]["yoy_pct"], result["max"]["yoy_pct"]) == (-120.0, 450.0)
+    assert result["out_of_range"]["yoy_pct"] == 2
+    assert result["unexpected_values"]["industry"] == ["Pets"]
+    assert "Motor Vehicles & Parts" in result["missing_values"]["industry"]
+    assert result["distinct"]["state"] == 2
+
+    sliced = validation.validate(df, "fact_state_retail_growth", date_start="2024-02", industries=["Pets"])
+    assert sliced["rows"] == 2 and sliced["periods"] == ["2024-02"]
+
+    sample = validation.out_of_range_rows(df, "fact_state_retail_growth", "yoy_pct", ["state", "yoy_pct"])
+    assert sample.values.tolist() == [["TX", -120.0], ["CA", 450.0]]
+
+
+def test_file_results_cached_until_rewritten(tmp_path, monkeypatch):
+    monkeypatch.setattr(validation, "CACHE_DIR", tmp_path / "cache")
+    path = tmp_path / "fact_state_retail_growth.parquet"
+    _state_fact().to_parquet(path, index=False)
+    first = validation.validate(path, "fact_state_retail_growth")
+
+    scans = []
+    monkeypatch.setattr(validation, "_query", lambda *args: scans.append(args) or first)
+    validation._memo.clear()
+    assert validation.validate(path, "fact_state_retail_growth") == first  # served from the cache file
+    assert not scans
+
+    _state_fact().head(2).to_parquet(path, index=False)
+    validation.validate(path, "fact_state_retail_growth")
+    assert len(scans) == 1
+
+
+def test_empty_source_validates_without_values():
+    df = _state_fact()
+    for source in (df.iloc[:0], df.astype({"date": "category", "industry": "category"})):
+        result = validation.validate(source, "fact_state_retail_growth", industries=["Nope"])
+        assert result["rows"] == 0 and result["duplicate_rows"] == 0
+        assert result["periods"] == [] and result["values"]["industry"] == []
+        assert result["missing_values"]["industry"] == sorted(validation.EXPECTED_INDUSTRIES)
+        assert result["distinct"]["state"] == 0